@@ -22,6 +22,15 @@ NODE_RED_PORT = "1880"
 SIMPLE_GET_HOST = "10.0.7.10"
 SIMPLE_GET_PORT = "6061"
 
+# MQTT Configuration
+MQTT_HOST = "10.0.0.10"
+MQTT_PORT = "1883"
+MQTT_USERNAME = None
+MQTT_PASSWORD = None
+
+# UDP Configuration
+UDP_HMAC_KEY = None  # Shared with the listeners to sign datagrams, e.g. a long random string
+
 # Twilio Configuration
 TWILIO_ACCOUNT_SID = "YOUR_ACCOUNT_SID"
 TWILIO_AUTH_TOKEN = "YOUR_AUTH_TOKEN"
@@ -6,6 +6,10 @@ import credentials as creds
 # Hardware Configuration
 LED_PIN = "LED"
 DOORBELL_PIN = 21
+DOORBELL_INPUT_MODE = 'irq'  # 'irq' (edge interrupt) or 'poll' (sampling loop)
+DOORBELL_DEBOUNCE_MS = 20  # Pin must stay low this long to count as a press
+DOORBELL_EDGE_BUFFER_SIZE = 32  # Edges, both directions, buffered by the IRQ between reads
+DOORBELL_POLL_INTERVAL_MS = 0  # Sampling interval in 'poll' mode
 LED_ENABLED = True
 
 # Network Configuration
@@ -13,6 +17,24 @@ WIFI_SSID = creds.WIFI_SSID
 WIFI_PASS = creds.WIFI_PASS
 
 WIFI_CONNECT_TIMEOUT = 60  # seconds
+WIFI_FAST_RECONNECT = True  # Reconnect straight to the last AP before scanning
+WIFI_FAST_CONNECT_TIMEOUT_MS = 5000  # Then fall back to a scan and full connect
+WIFI_CACHE_FILE = '/wifi.json'  # Last good BSSID, channel and address
+WIFI_STATIC_IP = None  # (ip, mask, gateway, dns) skips DHCP, 'cached' reuses the last lease
+HTTP_TIMEOUT_MS = 10000  # Connect and per-read timeout for provider requests
+HTTP_KEEP_ALIVE = True  # Reuse provider connections instead of a TLS handshake per send
+HTTP_POOL_MAX_CONNECTIONS = 2  # Open sockets across all hosts, idle or in use
+HTTP_POOL_IDLE_TIMEOUT_MS = 30000  # Close pooled sockets idle for longer than this
+HTTP_BODY_PREFIX_BYTES = 256  # Response body kept for error logs, the rest is discarded
+DNS_CACHE_TTL_S = 300  # Reuse resolved provider host addresses for this long
+
+# Keep-warm level, trades power draw against press-to-notify latency
+# 0: connect WiFi lazily on the first press (lowest power)
+# 1: keep WLAN associated
+# 2: also keep provider host DNS answers fresh
+# 3: also hold an open TLS connection per provider host, WiFi power save off
+KEEP_WARM_LEVEL = 2
+KEEP_WARM_INTERVAL_S = 30  # How often the link supervisor checks the link
 
 # LED Patterns (state, duration_ms)
 LED_PATTERNS = {
@@ -30,6 +52,72 @@ LED_PATTERNS = {
     }
 }
 
+# Press Handling
+DOORBELL_MESSAGE = "¡Sonó el timbre!"
+DOORBELL_COUNT_MESSAGE = "{message} (x{count})"  # Used for coalesced presses
+PRESS_QUEUE_SIZE = 4  # Press events waiting for delivery
+PRESS_COALESCE_WINDOW_MS = 10000  # Presses this close to a waiting one are merged
+PRESS_QUEUE_FULL_POLICY = 'merge'  # 'merge', 'drop_oldest' or 'drop_newest'
+
+# Notification Dispatch
+NOTIFY_CONCURRENT = True  # Send to every provider/recipient as its own task
+NOTIFY_MAX_CONCURRENCY = 2  # Simultaneous sends, each TLS socket costs ~40KB
+NOTIFY_BATCH_RECIPIENTS = True  # One batched/pipelined send per provider
+NOTIFY_TIER_OVERLAP_MS = 300  # Next tier starts after this even if the last is busy, None waits
+NOTIFY_LEARN_ORDER = True  # Within a tier, the provider with the fastest sends goes first
+NOTIFY_LEARN_FAILURE_MS = 10000  # Send time a failed attempt counts as when learning
+
+# Provider statistics, recent sends per provider drive timeouts, order and retries
+STATS_WINDOW = 16  # Recent sends kept per provider
+STATS_MIN_SAMPLES = 4  # Sends needed before the timeout and retries adapt
+STATS_TIMEOUT_FACTOR = 3  # Send timeout as a multiple of the p95 send time, 0 disables
+STATS_TIMEOUT_MIN_MS = 3000  # Adaptive timeouts never go below this, room for a TLS handshake
+STATS_RETRY_MIN_SUCCESS = 0.25  # Below this success rate a provider gets one retry at most
+STATS_FILE = '/stats.json'  # Snapshot kept across reboots, None keeps stats in RAM only
+STATS_SAVE_INTERVAL_S = 900  # Least time between snapshots, flash wears
+
+# Dispatch tiers, lower tiers are sent first, e.g. LAN channels before TLS clouds
+PROVIDER_TIERS = {
+    'UDPMulticastProvider': 0,
+    'MQTTProvider': 0,
+    'NodeRedProvider': 0,
+    'SimpleGetProvider': 0,
+}
+PROVIDER_DEFAULT_TIER = 1  # Tier of the providers not listed above
+
+# Heap budget, a TLS handshake allocates ~40KB at once
+HEAP_BUDGET_BYTES = 48000  # Free heap needed to start a send, 0 disables
+HEAP_COLLECT_BELOW_BYTES = 64000  # gc.collect() before a phase when less is free
+HEAP_SHED_PRIORITY = 1  # Providers with PRIORITY >= this are shed (retried later)
+HEAP_SAMPLE_INTERVAL_MS = 50  # Heap sampling during a notification, 0 = phase edges only
+
+# Retries, each provider recipient backs off on its own timeline
+RETRY_MAX_ATTEMPTS = 5  # Attempts per recipient, including the first
+RETRY_BASE_DELAY_MS = 500  # Delay before the first retry, doubled each time
+RETRY_MAX_DELAY_MS = 8000  # Cap on a single delay and on honored Retry-After
+RETRY_JITTER = 0.5  # Randomized fraction of each delay (0 fixed, 1 full jitter)
+
+# Circuit breaker, skips a provider that keeps failing
+CIRCUIT_FAILURE_THRESHOLD = 3  # Consecutive failed attempts that open the circuit
+CIRCUIT_RESET_TIMEOUT_S = 60  # Time open before the next send probes recovery
+
+# Outbox, keeps notifications that failed every retry on flash
+OUTBOX_ENABLED = True
+OUTBOX_DIR = '/outbox'
+OUTBOX_MAX_ENTRIES = 16  # Undelivered notifications kept, oldest dropped first
+OUTBOX_SEGMENT_RECORDS = 64  # 128-byte records per file before rotating
+OUTBOX_DRAIN_INTERVAL_S = 30  # How often stored notifications are retried
+OUTBOX_RESEND_MESSAGE = "{message} (delayed)"
+
+# Status server, /health and Prometheus /metrics on the LAN
+STATUS_SERVER_ENABLED = False
+STATUS_SERVER_HOST = '0.0.0.0'
+STATUS_SERVER_PORT = 8080
+STATUS_SERVER_TIMEOUT_MS = 2000  # Per read of a request, slow clients are dropped
+
+# Provider loading, only enabled providers are ever imported
+PROVIDER_LAZY_IMPORT = False  # Import a provider on its first send instead of at boot
+
 # Provider Specific Settings
 PROVIDER_TELEGRAM_ENABLED = True
 TELEGRAM_BOT_TOKEN = creds.TELEGRAM_BOT_TOKEN
@@ -55,6 +143,42 @@ SIMPLE_GET_CONFIG = {
 
 # Debug Configuration
 SERIAL_LOGS = True
+LOG_LEVEL = 20  # Lowest level logged: 10 debug, 20 info, 30 warning, 40 error
+LOG_RING_SIZE = 0  # Last log lines kept in RAM (utils.logging.recent()), 0 = off
+TRACE_BUFFER_SPANS = 128  # Latency spans kept in RAM (utils.trace), 0 = off
+TRACE_FILE = None  # e.g. '/trace.bin', appends each press's spans to flash
+TRACE_FILE_MAX_BYTES = 65536  # Then renamed to <file>.1 and started over
+
+# MQTT Configuration, one connection kept open to a local broker
+PROVIDER_MQTT_ENABLED = False
+MQTT_CONFIG = {
+    'host': creds.MQTT_HOST,
+    'port': creds.MQTT_PORT,
+    'username': creds.MQTT_USERNAME,  # None for anonymous brokers
+    'password': creds.MQTT_PASSWORD,
+    'client_id': 'doorbell',
+    'topic': 'doorbell/ring',
+    'qos': 1,  # 0 fire and forget, 1 waits for the broker's PUBACK
+    'retain': False,
+    'status_topic': 'doorbell/status',  # Retained online/offline (last will), None = off
+    'online_message': 'online',
+    'offline_message': 'offline',
+    'keepalive_s': 60,  # Pinged at half this when idle
+    'clean_session': True,  # False keeps the broker session across reconnects
+    'timeout_ms': 5000  # Connect and PUBACK timeout
+}
+
+# UDP Configuration, a datagram to LAN listeners the moment a press is detected
+PROVIDER_UDP_ENABLED = False
+UDP_CONFIG = {
+    'address': '239.255.68.66',  # Multicast group, or a broadcast/unicast address
+    'port': 5068,
+    'ttl': 1,  # Multicast hops, 1 stays on the LAN
+    'retransmits': 2,  # Extra copies of every datagram, listeners drop repeats
+    'retransmit_interval_ms': 20,
+    'max_text_bytes': 200,  # Notification text cut to this in message datagrams
+    'hmac_key': creds.UDP_HMAC_KEY  # None sends unsigned datagrams
+}
 
 # Twilio WhatsApp Configuration
 PROVIDER_TWILIO_WHATSAPP_ENABLED = False
@@ -0,0 +1,222 @@
+"""
+Keep-alive connection pool for the HTTP client.
+"""
+import uasyncio
+import utime
+from utils import logging as log
+from utils import trace
+
+
+class ConnectionPool:
+    """
+    Pool of open uasyncio stream connections keyed by (scheme, host, port).
+    Reusing a warm socket skips the TCP and TLS handshakes, which cost
+    about a second of CPU and a large heap spike on the RP2040.
+    """
+
+    def __init__(self, max_connections=2, idle_timeout_ms=30000, resolver=None):
+        """
+        Initialize the pool.
+
+        Args:
+            max_connections (int): Cap on sockets open at the same time,
+                idle or in use
+            idle_timeout_ms (int): Idle connections older than this are
+                closed instead of reused
+            resolver (DNSCache, optional): Cache used to resolve host names
+        """
+        self.max_connections = max(1, max_connections)
+        self.idle_timeout_ms = idle_timeout_ms
+        self.resolver = resolver
+        self._idle = []  # [(key, reader, writer, released_at)], oldest first
+        self._open = 0
+        self._released = uasyncio.Event()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _close(self, writer):
+        self._open -= 1
+        self._released.set()
+        try:
+            writer.close()
+        except Exception:
+            pass
+
+    def evict_idle(self):
+        """Close idle connections that exceeded the idle timeout."""
+        now = utime.ticks_ms()
+        keep = []
+
+        for entry in self._idle:
+            if utime.ticks_diff(now, entry[3]) >= self.idle_timeout_ms:
+                self.evictions += 1
+                self._close(entry[2])
+            else:
+                keep.append(entry)
+
+        self._idle = keep
+
+    async def _connect(self, scheme, host, port, timeout_ms):
+        """Open a new connection, with TLS for https."""
+        address = host
+        if self.resolver:
+            span = trace.start('dns')
+            try:
+                address = self.resolver.resolve(host, port)
+            finally:
+                trace.end(span)
+
+        # uasyncio does the TCP connect and the TLS handshake in one call
+        if scheme == "https":
+            span = trace.start('tls_connect')
+            connecting = uasyncio.open_connection(
+                address, port, ssl=True, server_hostname=host)
+        else:
+            span = trace.start('connect')
+            connecting = uasyncio.open_connection(address, port)
+
+        try:
+            return await uasyncio.wait_for_ms(connecting, timeout_ms)
+        except OSError:
+            # The cached address may be outdated, resolve again next time
+            if self.resolver:
+                self.resolver.invalidate(host)
+            raise
+        finally:
+            trace.end(span)
+
+    async def acquire(self, scheme, host, port, timeout_ms):
+        """
+        Get a connection to a host, reusing an idle one when possible.
+
+        Args:
+            scheme (str): 'http' or 'https'
+            host (str): Host name
+            port (int): Port number
+            timeout_ms (int): Timeout for opening a new connection
+
+        Returns:
+            tuple: (reader, writer, reused)
+        """
+        key = (scheme, host, port)
+
+        while True:
+            self.evict_idle()
+
+            # Most recently released first, it is the least likely to be stale
+            for index in range(len(self._idle) - 1, -1, -1):
+                if self._idle[index][0] == key:
+                    _, reader, writer, _ = self._idle.pop(index)
+                    self.hits += 1
+                    return reader, writer, True
+
+            if self._open < self.max_connections:
+                break
+
+            if self._idle:
+                # Make room by closing the oldest idle socket of another host
+                self.evictions += 1
+                self._close(self._idle.pop(0)[2])
+            else:
+                self._released.clear()
+                await self._released.wait()
+
+        self.misses += 1
+        self._open += 1
+
+        try:
+            reader, writer = await self._connect(scheme, host, port, timeout_ms)
+        except BaseException:
+            self._open -= 1
+            self._released.set()
+            raise
+
+        return reader, writer, False
+
+    async def warm(self, scheme, host, port, timeout_ms):
+        """
+        Open an idle connection to a host ahead of the next request.
+        Does nothing if one is already idle or the pool is full.
+
+        Args:
+            scheme (str): 'http' or 'https'
+            host (str): Host name
+            port (int): Port number
+            timeout_ms (int): Timeout for opening the connection
+
+        Returns:
+            bool: True if a new connection was opened
+        """
+        key = (scheme, host, port)
+        self.evict_idle()
+
+        for entry in self._idle:
+            if entry[0] == key:
+                return False
+
+        if self._open >= self.max_connections:
+            return False
+
+        self._open += 1
+
+        try:
+            reader, writer = await self._connect(scheme, host, port, timeout_ms)
+        except BaseException:
+            self._open -= 1
+            self._released.set()
+            raise
+
+        self.release(scheme, host, port, reader, writer)
+        return True
+
+    def release(self, scheme, host, port, reader, writer):
+        """
+        Return a healthy connection so later requests can reuse it.
+
+        Args:
+            scheme (str): 'http' or 'https'
+            host (str): Host name
+            port (int): Port number
+            reader (Stream): Connection reader
+            writer (Stream): Connection writer
+        """
+        self._idle.append(((scheme, host, port), reader, writer,
+                           utime.ticks_ms()))
+        self._released.set()
+
+    def discard(self, writer):
+        """
+        Close a connection that can not be reused.
+
+        Args:
+            writer (Stream): Connection writer
+        """
+        self._close(writer)
+
+    def close_all(self):
+        """Close every idle connection, e.g. before WiFi goes down."""
+        for entry in self._idle:
+            self._close(entry[2])
+        self._idle = []
+
+    def stats(self):
+        """
+        Get the pool counters.
+
+        Returns:
+            dict: hits, misses, evictions, open and idle socket counts
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'open': self._open,
+            'idle': len(self._idle)
+        }
+
+    def log_stats(self):
+        """Print the pool counters."""
+        log.info("Connection pool: %s hits, %s misses (handshakes), "
+                 "%s evictions, %s open", self.hits, self.misses,
+                 self.evictions, self._open)
@@ -0,0 +1,91 @@
+"""
+DNS cache for provider hosts.
+"""
+import usocket
+import utime
+from utils import logging as log
+
+
+class DNSCache:
+    """
+    Caches resolved addresses so a press does not wait on getaddrinfo.
+    getaddrinfo blocks the whole event loop on MicroPython, so entries
+    are refreshed from the link supervisor between presses.
+    """
+
+    def __init__(self, ttl_s=300):
+        """
+        Initialize the cache.
+
+        Args:
+            ttl_s (int): Seconds an answer is used before resolving again
+        """
+        self.ttl_ms = ttl_s * 1000
+        self._entries = {}  # host -> (address, resolved_at)
+
+    def _is_ip(self, host):
+        return all(c in "0123456789." for c in host)
+
+    def refresh(self, host, port):
+        """
+        Resolve a host now and store the answer.
+
+        Args:
+            host (str): Host name
+            port (int): Port number
+
+        Returns:
+            str: The resolved IP address
+        """
+        address = usocket.getaddrinfo(host, port, 0, usocket.SOCK_STREAM)[0][-1][0]
+        self._entries[host] = (address, utime.ticks_ms())
+        return address
+
+    def resolve(self, host, port):
+        """
+        Get the address of a host, from the cache when still fresh.
+
+        Args:
+            host (str): Host name or IP address
+            port (int): Port number
+
+        Returns:
+            str: The IP address to connect to
+        """
+        if self._is_ip(host):
+            return host
+
+        entry = self._entries.get(host)
+        if entry and utime.ticks_diff(utime.ticks_ms(), entry[1]) < self.ttl_ms:
+            return entry[0]
+
+        return self.refresh(host, port)
+
+    def needs_refresh(self, host):
+        """
+        Check if an answer is missing or past half of its TTL.
+        Refreshing early keeps the press path from ever hitting a miss.
+
+        Args:
+            host (str): Host name
+
+        Returns:
+            bool: True if the host should be resolved again
+        """
+        if self._is_ip(host):
+            return False
+
+        entry = self._entries.get(host)
+        if not entry:
+            return True
+        return utime.ticks_diff(utime.ticks_ms(), entry[1]) >= self.ttl_ms // 2
+
+    def invalidate(self, host):
+        """
+        Drop a cached answer, e.g. after connecting to it failed.
+
+        Args:
+            host (str): Host name
+        """
+        if self._entries.pop(host, None):
+            log.debug("DNS cache entry for %s dropped", host)
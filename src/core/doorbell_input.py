@@ -0,0 +1,203 @@
+"""
+Doorbell button input with interrupt-driven edge capture and debouncing.
+"""
+import array
+import micropython
+import uasyncio
+import utime
+from machine import Pin
+from config import settings
+from utils import logging as log
+
+
+class DoorbellInput:
+    """
+    Detects doorbell presses on an active-low input pin.
+
+    In IRQ mode an interrupt on both edges timestamps each edge and the
+    level it left into preallocated ring buffers and wakes the waiting
+    task, so the CPU idles between presses. Presses are debounced on
+    that history, not on the pin's current level, so a press is still
+    counted when the loop was blocked (a TLS handshake, a WiFi scan)
+    until after the button was released. Poll mode keeps the old
+    sampling loop as a fallback.
+    """
+
+    MODE_IRQ = 'irq'
+    MODE_POLL = 'poll'
+
+    def __init__(self, pin):
+        """
+        Initialize the input.
+
+        Args:
+            pin (Pin): Pin configured as Pin.IN with pull-up
+        """
+        self.pin = pin
+        self.mode = settings.DOORBELL_INPUT_MODE
+        self.debounce_ms = settings.DOORBELL_DEBOUNCE_MS
+        self.poll_interval_ms = settings.DOORBELL_POLL_INTERVAL_MS
+        self._pressed = False
+
+        self.presses = 0
+        self.glitches = 0  # Edges that did not hold low for debounce_ms
+        self.overflows = 0  # Edges dropped because the ring buffer was full
+
+        if self.mode == self.MODE_IRQ:
+            # Size rounded up to a power of two so the IRQ can mask the index
+            size = 1
+            while size < settings.DOORBELL_EDGE_BUFFER_SIZE:
+                size <<= 1
+            self._edges = array.array('I', [0] * size)
+            self._levels = bytearray(size)
+            self._mask = size - 1
+            self._head = 0  # Written only by the IRQ handler
+            self._tail = 0  # Written only by the task
+            self._flag = uasyncio.ThreadSafeFlag()
+            self._level = pin.value()  # Level after the last edge taken
+            self._burst = None  # First fall of a press not yet accepted
+            self._overflows_seen = 0
+
+            micropython.alloc_emergency_exception_buf(100)
+            self.pin.irq(handler=self._on_edge,
+                         trigger=Pin.IRQ_FALLING | Pin.IRQ_RISING, hard=True)
+
+    def _on_edge(self, pin):
+        """Hard IRQ handler, must not allocate."""
+        head = self._head
+        next_head = (head + 1) & self._mask
+
+        if next_head == self._tail:
+            self.overflows += 1
+            return
+
+        self._edges[head] = utime.ticks_ms()
+        self._levels[head] = pin.value()
+        self._head = next_head
+        self._flag.set()
+
+    def _peek(self, offset):
+        """Get a buffered (timestamp, level) edge, or None past the end."""
+        if offset >= ((self._head - self._tail) & self._mask):
+            return None
+        index = (self._tail + offset) & self._mask
+        return self._edges[index], self._levels[index]
+
+    def _resync(self):
+        """Take the pin's level as the state after edges were dropped."""
+        if self.overflows == self._overflows_seen:
+            return
+        self._overflows_seen = self.overflows
+        self._level = self.pin.value()
+        self._pressed = self._level == 0
+        self._burst = None
+
+    async def _next_press_irq(self):
+        """
+        Take buffered edges until one completes a press.
+
+        A level change counts once the next edge comes debounce_ms or more
+        after it, or nothing has come for that long. A stable fall is a
+        press, reported with the first fall of its bounces. A stable rise
+        ends it, or marks a glitch if the line never held low.
+        """
+        while True:
+            edge = self._peek(0)
+            if edge is None:
+                self._resync()
+                await self._flag.wait()
+                continue
+
+            at, level = edge
+            if level == self._level:
+                # The line bounced back before the IRQ read it
+                self._tail = (self._tail + 1) & self._mask
+                continue
+
+            following = self._peek(1)
+            if following is None:
+                remaining = self.debounce_ms - utime.ticks_diff(
+                    utime.ticks_ms(), at)
+                if remaining > 0:
+                    # Edges arriving meanwhile are buffered, look again after
+                    await uasyncio.sleep_ms(remaining)
+                    continue
+                stable = True
+            else:
+                stable = utime.ticks_diff(following[0], at) >= self.debounce_ms
+
+            self._tail = (self._tail + 1) & self._mask
+            self._level = level
+
+            if level == 0:
+                if self._burst is None:
+                    self._burst = at
+                if stable and not self._pressed:
+                    self._pressed = True
+                    self.presses += 1
+                    pressed_at = self._burst
+                    self._burst = None
+                    return pressed_at
+            elif stable:
+                if not self._pressed and self._burst is not None:
+                    self.glitches += 1
+                self._pressed = False
+                self._burst = None
+
+    async def _next_edge(self):
+        """Wait for a falling edge and return its timestamp."""
+        last_state = self.pin.value()
+        while True:
+            current_state = self.pin.value()
+            if current_state == 0 and last_state == 1:
+                return utime.ticks_ms()
+            last_state = current_state
+            await uasyncio.sleep_ms(self.poll_interval_ms)
+
+    async def _wait_release(self):
+        """Wait until the pin has stayed high for a full debounce window."""
+        while True:
+            if self.pin.value() == 1:
+                await uasyncio.sleep_ms(self.debounce_ms)
+                if self.pin.value() == 1:
+                    break
+            else:
+                await uasyncio.sleep_ms(self.debounce_ms)
+
+        self._pressed = False
+
+    async def next_press(self):
+        """
+        Wait for the next debounced press.
+
+        In poll mode a falling edge is accepted if the pin is still low
+        debounce_ms after it, then every edge is ignored until the pin is
+        released again, which filters contact bounce on press and release.
+
+        Returns:
+            int: utime.ticks_ms() of the edge that started the press
+        """
+        if self.mode == self.MODE_IRQ:
+            return await self._next_press_irq()
+
+        while True:
+            if self._pressed:
+                await self._wait_release()
+
+            edge = await self._next_edge()
+
+            remaining = self.debounce_ms - utime.ticks_diff(utime.ticks_ms(), edge)
+            if remaining > 0:
+                await uasyncio.sleep_ms(remaining)
+
+            if self.pin.value() == 0:
+                self._pressed = True
+                self.presses += 1
+                return edge
+
+            self.glitches += 1
+
+    def log_stats(self):
+        """Print the press counters."""
+        log.info("Doorbell input (%s): %s presses, %s glitches, %s overflows",
+                 self.mode, self.presses, self.glitches, self.overflows)
@@ -0,0 +1,218 @@
+"""
+Heap instrumentation and budget for the notification path.
+"""
+import gc
+import uasyncio
+import utime
+from utils import logging as log
+
+
+class HeapBudgetError(Exception):
+    """Raised instead of sending when too little heap is free for it."""
+
+
+class HeapMonitor:
+    """
+    Tracks free and allocated heap around each phase of a notification.
+
+    A TLS handshake allocates tens of KB at once, and running out halfway
+    raises MemoryError. Collections are run at the start of a phase, when
+    free heap is below ``collect_below``, so the collector rarely has to
+    run inside a handshake. With a ``budget`` set, admit() checks a send
+    has that much heap free: critical providers go ahead anyway, lower
+    priority ones are shed for this attempt. The retry policy tries them
+    again after its backoff, and the outbox keeps them if the heap never
+    recovers.
+
+    Outside MicroPython (no gc.mem_free) every method is a no-op.
+    """
+
+    def __init__(self, budget=0, collect_below=0, shed_priority=1,
+                 sample_interval_ms=0, pool=None):
+        """
+        Initialize the monitor.
+
+        Args:
+            budget (int): Free bytes needed to start a send, 0 disables
+            collect_below (int): Collect before a phase when less is free
+            shed_priority (int): Providers with PRIORITY at or above this
+                may be shed, lower values always send
+            sample_interval_ms (int): Heap sampling period while a
+                notification runs, 0 samples only at phase boundaries
+            pool (ConnectionPool, optional): Idle sockets are closed
+                before a send is shed
+        """
+        self.enabled = hasattr(gc, 'mem_free')
+        self.budget = budget
+        self.collect_below = collect_below
+        self.shed_priority = shed_priority
+        self.sample_interval_ms = sample_interval_ms
+        self.pool = pool
+
+        self.collections = 0
+        self.low_headroom = 0  # Critical sends let through below budget
+        self.shed = 0
+        self.low_water = None  # Least free heap seen since boot
+
+        self._phases = {}
+        self._active = {}
+        self._sampler = None
+
+    def _sample(self):
+        """Read the heap, updating the low-water marks of active phases."""
+        free = gc.mem_free()
+        if self.low_water is None or free < self.low_water:
+            self.low_water = free
+        for record in self._active.values():
+            if free < record['min_free']:
+                record['min_free'] = free
+        return free
+
+    def collect(self, force=False):
+        """
+        Run a collection if free heap is below collect_below.
+
+        Args:
+            force (bool): Collect regardless of the free heap
+
+        Returns:
+            int: Free bytes afterwards
+        """
+        if not self.enabled:
+            return 0
+        if force or gc.mem_free() < self.collect_below:
+            gc.collect()
+            self.collections += 1
+        return self._sample()
+
+    async def _run_sampler(self):
+        while True:
+            self._sample()
+            await uasyncio.sleep_ms(self.sample_interval_ms)
+
+    def start(self):
+        """Begin recording a notification, dropping the previous one."""
+        if not self.enabled:
+            return
+        self._phases = {}
+        self._active = {}
+        self.collect()
+        if self.sample_interval_ms and self._sampler is None:
+            self._sampler = uasyncio.create_task(self._run_sampler())
+
+    def stop(self):
+        """Stop recording, the phases stay available through stats()."""
+        if self._sampler is not None:
+            self._sampler.cancel()
+            self._sampler = None
+
+    def begin(self, phase):
+        """
+        Mark the start of a phase, collecting first if heap is low.
+
+        Args:
+            phase (str): Phase name, e.g. 'connect' or a provider label
+        """
+        if not self.enabled:
+            return
+        free = self.collect()
+        record = {
+            'free_before': free,
+            'alloc_before': gc.mem_alloc(),
+            'min_free': free,
+            'started': utime.ticks_ms()
+        }
+        self._active[phase] = record
+
+    def end(self, phase):
+        """
+        Mark the end of a phase and keep its numbers.
+
+        Args:
+            phase (str): Name given to begin()
+        """
+        record = self._active.pop(phase, None)
+        if record is None:
+            return
+        free = self._sample()
+        self._phases[phase] = {
+            'free_before': record['free_before'],
+            'free_after': free,
+            'min_free': record['min_free'],
+            # Peak allocated on top of what was in use when it began
+            'peak_alloc': record['free_before'] - record['min_free'],
+            'net_alloc': gc.mem_alloc() - record['alloc_before'],
+            'ms': utime.ticks_diff(utime.ticks_ms(), record['started'])
+        }
+
+    def admit(self, priority, label):
+        """
+        Check a send fits the heap budget.
+
+        Args:
+            priority (int): PRIORITY of the provider, 0 is the highest
+            label (str): Job label for the logs
+
+        Raises:
+            HeapBudgetError: A sheddable send found no headroom
+        """
+        if not self.enabled or not self.budget:
+            return
+
+        free = self.collect()
+        if free >= self.budget:
+            return
+
+        if self.pool is not None:
+            self.pool.close_all()
+            free = self.collect(force=True)
+            if free >= self.budget:
+                return
+
+        if priority < self.shed_priority:
+            self.low_headroom += 1
+            log.warning("Low heap (%s free) sending %s anyway", free, label)
+            return
+
+        self.shed += 1
+        log.warning("Low heap (%s free), %s shed", free, label)
+        raise HeapBudgetError(label)
+
+    def stats(self):
+        """
+        Get the heap counters and the phases of the last notification.
+
+        Returns:
+            dict: free, allocated and low-water bytes, collection,
+                low_headroom and shed counts, and 'phases' (name -> dict of
+                free_before, free_after, min_free, peak_alloc, net_alloc
+                and ms). Empty outside MicroPython.
+        """
+        if not self.enabled:
+            return {}
+        return {
+            'free': gc.mem_free(),
+            'alloc': gc.mem_alloc(),
+            'low_water': self.low_water,
+            'collections': self.collections,
+            'low_headroom': self.low_headroom,
+            'shed': self.shed,
+            'phases': self._phases
+        }
+
+    def log_stats(self):
+        """Print the heap counters and the tightest phase."""
+        if not self.enabled:
+            return
+        tightest = None
+        for phase, record in self._phases.items():
+            if tightest is None or \
+                    record['min_free'] < self._phases[tightest]['min_free']:
+                tightest = phase
+        log.info("Heap: %s free, low water %s, %s collections, "
+                 "%s sent low, %s shed", gc.mem_free(), self.low_water,
+                 self.collections, self.low_headroom, self.shed)
+        if tightest is not None:
+            record = self._phases[tightest]
+            log.info("Heap: tightest phase %s, %s free, peak %s bytes",
+                     tightest, record['min_free'], record['peak_alloc'])
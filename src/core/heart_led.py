@@ -4,7 +4,7 @@ LED heartbeat indicator module with multiple states and patterns.
 import uasyncio
 from machine import Pin
 from config import settings
-from utils.logging import dprint as print
+from utils import logging as log
 
 
 class HeartLED:
@@ -42,7 +42,7 @@ class HeartLED:
                 # Print "Alive" only in normal state when turning on
                 if (self.current_state == self.STATE_NORMAL and
                     state == 1):
-                    print("Alive")
+                    log.debug("Alive")
 
                 await uasyncio.sleep_ms(duration)
 
@@ -55,7 +55,7 @@ class HeartLED:
             self.current_state = state
 
         else:
-            print(f"Unknown LED state: {state}")
+            log.warning("Unknown LED state: %s", state)
 
     def off(self):
         """Turn off the LED."""
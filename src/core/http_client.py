@@ -0,0 +1,691 @@
+"""
+Non-blocking HTTP/1.1 client built on uasyncio streams.
+"""
+import uasyncio
+from config import settings
+from core.connection_pool import ConnectionPool
+from core.dns_cache import DNSCache
+from utils import logging as log
+from utils import trace
+
+# Shared by every provider so repeat sends to a host reuse a warm socket
+dns = DNSCache(settings.DNS_CACHE_TTL_S)
+pool = ConnectionPool(settings.HTTP_POOL_MAX_CONNECTIONS,
+                      settings.HTTP_POOL_IDLE_TIMEOUT_MS, dns)
+
+
+class HTTPError(Exception):
+    """Raised when a server answers with a status the caller did not expect."""
+
+    def __init__(self, status_code, retry_after_ms=None):
+        """
+        Initialize the error.
+
+        Args:
+            status_code (int): HTTP status code of the response
+            retry_after_ms (int, optional): Delay requested by the server
+                through the Retry-After header
+        """
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.retry_after_ms = retry_after_ms
+
+
+# Response headers the client acts on, the others are skipped
+_HEADERS = (b"content-length", b"transfer-encoding", b"connection",
+            b"retry-after")
+
+# Body buffers lent to responses, one per socket the pool may open, so
+# reading a body allocates nothing once the firmware is up
+_buffers = [bytearray(settings.HTTP_BODY_PREFIX_BYTES)
+            for _ in range(settings.HTTP_POOL_MAX_CONNECTIONS)]
+
+
+def _borrow():
+    if _buffers:
+        return _buffers.pop()
+    return bytearray(settings.HTTP_BODY_PREFIX_BYTES)
+
+
+def _give_back(buf):
+    if len(_buffers) < settings.HTTP_POOL_MAX_CONNECTIONS:
+        _buffers.append(buf)
+
+
+def _decode(buf, size):
+    """Decode a UTF-8 prefix, dropping a character cut off at the end."""
+    for end in range(size, max(size - 4, -1), -1):
+        try:
+            return str(buf[:end], "utf-8")
+        except UnicodeError:
+            pass
+    return ""
+
+
+class Response:
+    """
+    HTTP response read from a uasyncio stream.
+    The status line and headers are parsed up front. The body is streamed:
+    text() keeps at most HTTP_BODY_PREFIX_BYTES of it and close() reads
+    the rest through a reused buffer without keeping it.
+    """
+
+    def __init__(self, reader, writer, timeout_ms, key=None):
+        """
+        Initialize the response.
+
+        Args:
+            reader (Stream): Stream to read the response from
+            writer (Stream): Stream owning the underlying socket
+            timeout_ms (int): Timeout for each read operation
+            key (tuple, optional): (scheme, host, port) to return the
+                connection to the pool under, None to close it
+        """
+        self._reader = reader
+        self._writer = writer
+        self._timeout_ms = timeout_ms
+        self._key = key
+        self.status_code = 0
+        self.reason = ""
+        self.headers = {}
+        self._chunked = False
+        self._left = None  # Bytes left in the body or chunk, None until EOF
+        self._done = False
+        self._text = None
+
+    async def _readline(self):
+        line = await uasyncio.wait_for_ms(
+            self._reader.readline(), self._timeout_ms)
+        if not line:
+            raise OSError("Connection closed by server")
+        return line
+
+    async def _read_head(self):
+        """Parse the status line and the headers the client needs."""
+        parts = (await self._readline()).split(b" ", 2)
+        self.status_code = int(parts[1])
+        self.reason = parts[2].strip().decode() if len(parts) > 2 else ""
+
+        while True:
+            line = await self._readline()
+            if line in (b"\r\n", b"\n"):
+                break
+            name, _, value = line.partition(b":")
+            name = name.strip().lower()
+            if name in _HEADERS:
+                self.headers[name.decode()] = value.strip().decode()
+
+        if self.headers.get("transfer-encoding", "").lower() == "chunked":
+            self._chunked = True
+            self._left = 0
+        elif "content-length" in self.headers:
+            self._left = int(self.headers["content-length"])
+            self._done = not self._left
+
+    def error(self):
+        """
+        Build the error to raise for an unexpected status.
+
+        Returns:
+            HTTPError: Error carrying the status and any Retry-After delay
+        """
+        retry_after = self.headers.get("retry-after", "")
+        retry_after_ms = int(retry_after) * 1000 if retry_after.isdigit() else None
+        return HTTPError(self.status_code, retry_after_ms)
+
+    async def readinto(self, buf):
+        """
+        Read the next part of the body.
+
+        Args:
+            buf (memoryview): Buffer to fill, up to its length
+
+        Returns:
+            int: Bytes read, 0 once the whole body has been read
+        """
+        if self._done:
+            return 0
+
+        if self._chunked and not self._left:
+            size = int((await self._readline()).split(b";")[0].strip(), 16)
+            if not size:
+                # Skip trailers up to the final blank line
+                while (await self._readline()) not in (b"\r\n", b"\n"):
+                    pass
+                self._done = True
+                return 0
+            self._left = size
+
+        if self._left is not None and self._left < len(buf):
+            buf = buf[:self._left]
+        read = await uasyncio.wait_for_ms(
+            self._reader.readinto(buf), self._timeout_ms)
+
+        if not read:
+            if self._left is not None:
+                raise OSError("Connection closed by server")
+            self._done = True  # Unframed body, ends at EOF
+            return 0
+
+        if self._left is not None:
+            self._left -= read
+            if not self._left:
+                if self._chunked:
+                    await self._readline()  # CRLF closing the chunk
+                else:
+                    self._done = True
+        return read
+
+    async def discard(self):
+        """Read the rest of the body without keeping it."""
+        if self._done:
+            return
+        buf = _borrow()
+        try:
+            view = memoryview(buf)
+            while await self.readinto(view):
+                pass
+        finally:
+            _give_back(buf)
+
+    async def text(self):
+        """
+        Read the start of the body as text, e.g. an error description.
+        At most HTTP_BODY_PREFIX_BYTES are kept, the rest is discarded.
+
+        Returns:
+            str: The decoded body prefix, '...' appended if cut short
+        """
+        if self._text is not None:
+            return self._text
+
+        buf = _borrow()
+        try:
+            view = memoryview(buf)
+            size = 0
+            while size < len(buf):
+                read = await self.readinto(view[size:])
+                if not read:
+                    break
+                size += read
+            self._text = _decode(buf, size)
+        finally:
+            _give_back(buf)
+
+        if not self._done:
+            self._text += "..."
+            await self.discard()
+        return self._text
+
+    async def _settle(self):
+        """Finish the body, keeping the text of an error for text()."""
+        if self.status_code >= 300:
+            await self.text()
+        else:
+            await self.discard()
+
+    def _reusable(self):
+        """Check if the connection can carry another request."""
+        if self._key is None:
+            return False
+        if self.headers.get("connection", "").lower() == "close":
+            return False
+        # Without framing the body ends at EOF, so the socket is spent
+        return ("content-length" in self.headers or
+                self.headers.get("transfer-encoding", "").lower() == "chunked")
+
+    async def close(self):
+        """Return the connection to the pool, or close it."""
+        if self._writer is None:
+            return
+
+        writer = self._writer
+
+        if self._reusable():
+            try:
+                # Drain the unread body so the next response starts clean
+                await self.discard()
+                pool.release(self._key[0], self._key[1], self._key[2],
+                             self._reader, writer)
+                self._reader = self._writer = None
+                return
+            except Exception:
+                pass
+            except BaseException:
+                # Cancelled mid-drain, e.g. by a send timeout
+                self._reader = self._writer = None
+                pool.discard(writer)
+                raise
+
+        self._reader = self._writer = None
+        pool.discard(writer)
+
+
+def parse_url(url):
+    """
+    Split a URL into its components.
+
+    Args:
+        url (str): Absolute http or https URL
+
+    Returns:
+        tuple: (scheme, host, port, path)
+    """
+    scheme, _, rest = url.partition("://")
+    if scheme not in ("http", "https"):
+        raise ValueError(f"Unsupported URL scheme: {scheme}")
+
+    host, slash, path = rest.partition("/")
+    path = slash + path if slash else "/"
+
+    if ":" in host:
+        host, port = host.split(":", 1)
+        port = int(port)
+    else:
+        port = 443 if scheme == "https" else 80
+
+    return scheme, host, port, path
+
+
+def _body_length(body):
+    """Get the length of a body, or None if it must be chunked."""
+    if body is None:
+        return 0
+    if isinstance(body, (bytes, bytearray, memoryview)):
+        return len(body)
+    if isinstance(body, (list, tuple)):
+        return sum(len(chunk) for chunk in body)
+    return None
+
+
+async def _write_body(writer, body, chunked):
+    """Stream the request body to the connection."""
+    if body is None:
+        return
+
+    if isinstance(body, (bytes, bytearray, memoryview)):
+        writer.write(body)
+        await writer.drain()
+        return
+
+    for chunk in body:
+        if isinstance(chunk, str):
+            chunk = chunk.encode()
+        if not chunk:
+            continue
+        if chunked:
+            writer.write(("%x\r\n" % len(chunk)).encode())
+            writer.write(chunk)
+            writer.write(b"\r\n")
+        else:
+            writer.write(chunk)
+        await writer.drain()
+
+    if chunked:
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+
+def _compile_head(method, host, path, headers):
+    """Encode the request line and headers, without framing headers."""
+    head = [f"{method} {path} HTTP/1.1\r\nHost: {host}\r\n"]
+    for name, value in (headers or {}).items():
+        head.append(f"{name}: {value}\r\n")
+    return "".join(head).encode()
+
+
+async def _write_request(writer, head, body, key):
+    """Write the request head with its framing headers, then the body."""
+    length = _body_length(body)
+    chunked = length is None
+
+    for part in head:
+        writer.write(part)
+    if chunked:
+        writer.write(b"Transfer-Encoding: chunked\r\n")
+    elif body is not None:
+        writer.write(f"Content-Length: {length}\r\n".encode())
+    if key is None:
+        writer.write(b"Connection: close\r\n")
+    writer.write(b"\r\n")
+    await writer.drain()
+    await _write_body(writer, body, chunked)
+
+
+async def _exchange(reader, writer, head, body, timeout_ms, key):
+    """Write one request and read the response head."""
+    span = trace.start('request')
+    try:
+        await _write_request(writer, head, body, key)
+    finally:
+        trace.end(span)
+
+    # Until the status line and headers are in, i.e. the service's time
+    span = trace.start('response')
+    try:
+        response = Response(reader, writer, timeout_ms, key)
+        await response._read_head()
+    finally:
+        trace.end(span)
+    return response
+
+
+async def _send(scheme, host, port, head, body, timeout_ms):
+    """
+    Send a compiled request over a pooled connection.
+
+    Args:
+        head (tuple): Byte chunks of the request line and headers
+        body: None, bytes, a list/tuple of byte chunks, or an iterable
+    """
+    key = (scheme, host, port) if settings.HTTP_KEEP_ALIVE else None
+    # A one-shot chunk iterator can not be replayed on a fresh connection
+    replayable = _body_length(body) is not None
+
+    while True:
+        span = trace.start('acquire')
+        try:
+            reader, writer, reused = await pool.acquire(
+                scheme, host, port, timeout_ms)
+        finally:
+            trace.end(span)
+
+        try:
+            return await _exchange(reader, writer, head, body, timeout_ms,
+                                   key)
+
+        except uasyncio.TimeoutError:
+            pool.discard(writer)
+            raise
+
+        except OSError as e:
+            pool.discard(writer)
+            if not reused or not replayable:
+                raise
+            # The server closed the idle socket, retry on a fresh one
+            log.debug("Stale pooled connection to %s: %s", host, e)
+
+        except BaseException:
+            pool.discard(writer)
+            raise
+
+
+async def _timed(method, sending, timeout_ms):
+    """Run a send under the overall request timeout."""
+    try:
+        return await uasyncio.wait_for_ms(trace.carry(sending), timeout_ms)
+
+    except uasyncio.TimeoutError:
+        log.warning("HTTP %s timed out after %s ms", method, timeout_ms)
+        raise
+
+
+class RequestTemplate:
+    """
+    Request compiled once into byte buffers, with a slot for the message.
+
+    The URL or the body may contain MESSAGE once. Sending only encodes the
+    message and splices it between the precompiled parts, so the request
+    line, headers and body skeleton are not rebuilt on every press.
+    """
+
+    MESSAGE = "{message}"
+
+    def __init__(self, method, url, headers=None, body=None, encode=None):
+        """
+        Compile the request.
+
+        Args:
+            method (str): HTTP method
+            url (str): Absolute URL, already encoded, MESSAGE may appear
+                in the path or query
+            headers (dict, optional): Extra request headers
+            body (str, optional): Body, MESSAGE marks where the message goes
+            encode (callable, optional): Turns the message into the str or
+                bytes placed in the slot, e.g. quote or ujson.dumps
+        """
+        scheme, host, port, path = parse_url(url)
+        marker = self.MESSAGE.encode()
+
+        self.method = method
+        self.scheme = scheme
+        self.host = host
+        self.port = port
+        self._head = tuple(
+            _compile_head(method, host, path, headers).split(marker, 1))
+        self._body = None
+        if body is not None:
+            self._body = tuple(body.encode().split(marker, 1))
+        self._encode = encode
+
+    def render(self, message):
+        """
+        Splice a message into the template.
+
+        Returns:
+            tuple: (head chunks, body chunks or None)
+        """
+        head = self._head
+        body = self._body
+        if len(head) == 1 and (body is None or len(body) == 1):
+            return head, body
+
+        slot = self._encode(message) if self._encode else message
+        if isinstance(slot, str):
+            slot = slot.encode()
+
+        if len(head) == 2:
+            head = (head[0], slot, head[1])
+        if body is not None and len(body) == 2:
+            body = (body[0], slot, body[1])
+        return head, body
+
+
+async def send(template, message=None, timeout_ms=None):
+    """
+    Send a precompiled request.
+
+    Args:
+        template (RequestTemplate): The compiled request
+        message (str, optional): Message for the template's slot
+        timeout_ms (int, optional): Timeout for connecting and for each
+            read, defaults to settings.HTTP_TIMEOUT_MS
+
+    Returns:
+        Response: Response with status and headers read, the caller must
+            close it
+    """
+    if timeout_ms is None:
+        timeout_ms = settings.HTTP_TIMEOUT_MS
+
+    head, body = template.render(message)
+    return await _timed(template.method,
+                        _send(template.scheme, template.host, template.port,
+                              head, body, timeout_ms),
+                        timeout_ms)
+
+
+async def _pipeline_batch(key, batch, message, results, timeout_ms):
+    """
+    Write a batch of requests back to back on one connection, then read
+    the responses in order.
+
+    Returns:
+        int: Number of requests answered, the rest must be sent again
+    """
+    scheme, host, port = key
+    span = trace.start('acquire')
+    try:
+        reader, writer, reused = await pool.acquire(scheme, host, port,
+                                                    timeout_ms)
+    finally:
+        trace.end(span)
+    answered = 0
+    reusable = False
+
+    try:
+        span = trace.start('request')
+        for _, template in batch:
+            head, body = template.render(message)
+            await _write_request(writer, head, body, key)
+        trace.end(span)
+
+        for index, _ in batch:
+            span = trace.start('response')
+            response = Response(reader, writer, timeout_ms, key)
+            await response._read_head()
+            await response._settle()
+            trace.end(span)
+            reusable = response._reusable()
+            # The pipeline owns the connection, closing the response is a no-op
+            response._reader = response._writer = None
+            results[index] = response
+            answered += 1
+            if not reusable:
+                break  # The server will not read the requests after this one
+
+    except Exception as e:
+        trace.end(span)
+        pool.discard(writer)
+        # A closed connection is resent from the first unanswered request,
+        # a timeout is not, the server may still be working on it
+        if isinstance(e, OSError) and (answered or reused):
+            return answered
+        raise e
+
+    except BaseException:
+        # Cancelled by a caller's timeout, the connection is mid-response
+        trace.end(span)
+        pool.discard(writer)
+        raise
+
+    if reusable and answered == len(batch):
+        pool.release(scheme, host, port, reader, writer)
+    else:
+        pool.discard(writer)
+    return answered
+
+
+async def _pipeline(templates, message, results, timeout_ms):
+    """Fill results with a response or an error for every template."""
+    # Requests to the same endpoint share one connection
+    batches = {}
+    for index, template in enumerate(templates):
+        key = (template.scheme, template.host, template.port)
+        batches.setdefault(key, []).append((index, template))
+
+    for key, batch in batches.items():
+        stalled = False
+        while batch:
+            try:
+                answered = await _pipeline_batch(key, batch, message, results,
+                                                 timeout_ms)
+            except Exception as e:
+                for index, _ in batch:
+                    if results[index] is None:
+                        results[index] = e
+                break
+
+            if answered:
+                stalled = False
+            elif stalled:
+                for index, _ in batch:
+                    results[index] = OSError("Connection closed by server")
+                break
+            else:
+                # A stale pooled socket, try once more on a fresh one
+                stalled = True
+            batch = batch[answered:]
+
+
+async def pipeline(templates, message=None, timeout_ms=None):
+    """
+    Send several precompiled requests with HTTP/1.1 pipelining.
+
+    Requests to the same host are written back to back over one kept-alive
+    connection before the responses are read, so N requests cost about
+    one round trip instead of N. Requests the server did not answer
+    before closing the connection are sent again on a fresh one.
+
+    Args:
+        templates (list): RequestTemplate objects, one per request
+        message (str, optional): Message for the templates' slots
+        timeout_ms (int, optional): Timeout for connecting and for each
+            read, defaults to settings.HTTP_TIMEOUT_MS
+
+    Returns:
+        list: A Response with its body read (the text() prefix of an
+            error is kept), or the exception raised, for each template in
+            order. The responses need no closing.
+    """
+    if timeout_ms is None:
+        timeout_ms = settings.HTTP_TIMEOUT_MS
+
+    results = [None] * len(templates)
+    if not settings.HTTP_KEEP_ALIVE:
+        # No connection to share, fall back to one request at a time
+        for index, template in enumerate(templates):
+            try:
+                response = await send(template, message, timeout_ms)
+                try:
+                    await response._settle()
+                finally:
+                    await response.close()
+                results[index] = response
+            except Exception as e:
+                results[index] = e
+        return results
+
+    try:
+        await uasyncio.wait_for_ms(
+            trace.carry(_pipeline(templates, message, results, timeout_ms)),
+            timeout_ms * 2)
+    except uasyncio.TimeoutError as e:
+        log.warning("HTTP pipeline timed out after %s ms", timeout_ms * 2)
+        for index, result in enumerate(results):
+            if result is None:
+                results[index] = e
+    return results
+
+
+async def request(method, url, headers=None, body=None, timeout_ms=None):
+    """
+    Send an HTTP request without blocking the event loop.
+
+    Args:
+        method (str): HTTP method
+        url (str): Absolute http or https URL
+        headers (dict, optional): Extra request headers
+        body (optional): str/bytes, or an iterable of chunks which is
+            streamed as it is produced (chunked if the length is unknown)
+        timeout_ms (int, optional): Timeout for connecting and for each
+            read, defaults to settings.HTTP_TIMEOUT_MS
+
+    Returns:
+        Response: Response with status and headers read, the caller must
+            close it
+    """
+    if timeout_ms is None:
+        timeout_ms = settings.HTTP_TIMEOUT_MS
+
+    scheme, host, port, path = parse_url(url)
+    head = (_compile_head(method, host, path, headers),)
+
+    if isinstance(body, str):
+        body = body.encode()
+    elif isinstance(body, (list, tuple)):
+        body = [c.encode() if isinstance(c, str) else c for c in body]
+
+    return await _timed(method,
+                        _send(scheme, host, port, head, body, timeout_ms),
+                        timeout_ms)
+
+
+async def get(url, headers=None, timeout_ms=None):
+    """Send a GET request, see request()."""
+    return await request("GET", url, headers, None, timeout_ms)
+
+
+async def post(url, headers=None, data=None, timeout_ms=None):
+    """Send a POST request, see request()."""
+    return await request("POST", url, headers, data, timeout_ms)
@@ -0,0 +1,122 @@
+"""
+Link supervisor keeping WiFi, DNS and provider connections warm.
+"""
+import uasyncio
+from config import settings
+from core import http_client
+from core.network_manager import NetworkManager
+from utils import logging as log
+
+
+class LinkSupervisor:
+    """
+    Background task that keeps the network ready between presses, so a
+    press goes straight to sending instead of associating, resolving and
+    handshaking first. How much is kept warm is set by KEEP_WARM_LEVEL.
+    """
+
+    LEVEL_OFF = 0          # Connect lazily on the first press
+    LEVEL_LINK = 1         # Keep WLAN associated
+    LEVEL_DNS = 2          # Also keep provider host DNS answers fresh
+    LEVEL_CONNECTIONS = 3  # Also hold an open TLS connection per host
+
+    def __init__(self, providers):
+        """
+        Initialize the supervisor.
+
+        Args:
+            providers (list): Enabled notification providers
+        """
+        self.network = NetworkManager()
+        self.level = settings.KEEP_WARM_LEVEL
+        self.interval_ms = settings.KEEP_WARM_INTERVAL_S * 1000
+        self.reconnects = 0
+        self._running = True
+        self._providers = providers
+        self._hosts = None
+
+    @property
+    def hosts(self):
+        """
+        Provider endpoints, without duplicates.
+        Collected on first use, so lazily imported providers are not
+        loaded at boot just to list their hosts.
+        """
+        if self._hosts is None:
+            # MicroPython's ssl module has no session resumption API, so the
+            # closest thing to a warm TLS session is a pooled open connection
+            self._hosts = []
+            for provider in self._providers:
+                for host in provider.get_hosts():
+                    if host not in self._hosts:
+                        self._hosts.append(host)
+        return self._hosts
+
+    async def _check_link(self):
+        """Reconnect WiFi if the link dropped."""
+        if self.network.is_connected():
+            return True
+
+        # Sockets opened on the old link are dead
+        http_client.pool.close_all()
+
+        log.warning("Link supervisor: WiFi down, reconnecting")
+        if await self.network.connect():
+            self.reconnects += 1
+            return True
+
+        return False
+
+    def _refresh_dns(self):
+        """Resolve provider hosts whose answers are getting old."""
+        for _, host, port in self.hosts:
+            if not http_client.dns.needs_refresh(host):
+                continue
+            try:
+                http_client.dns.refresh(host, port)
+            except Exception as e:
+                log.warning("Link supervisor: DNS refresh for %s failed: %s",
+                            host, e)
+
+    async def _warm_connections(self):
+        """Open a pooled connection to every host that has none idle."""
+        for scheme, host, port in self.hosts:
+            try:
+                if await http_client.pool.warm(scheme, host, port,
+                                               settings.HTTP_TIMEOUT_MS):
+                    log.debug("Link supervisor: warmed %s://%s:%s",
+                              scheme, host, port)
+            except Exception as e:
+                log.warning("Link supervisor: warming %s failed: %s", host, e)
+
+    async def _warm_providers(self):
+        """Let providers with their own connection open it."""
+        for provider in self._providers:
+            await provider.warm()
+
+    async def run(self):
+        """Run the supervision loop."""
+        if self.level <= self.LEVEL_OFF:
+            log.info("Link supervisor disabled")
+            return
+
+        if self.level >= self.LEVEL_CONNECTIONS:
+            # Lowest latency, the radio stays awake between presses
+            self.network.set_power_save(False)
+
+        while self._running:
+            if await self._check_link():
+                await self._warm_providers()
+                if self.level >= self.LEVEL_DNS:
+                    self._refresh_dns()
+                if self.level >= self.LEVEL_CONNECTIONS:
+                    await self._warm_connections()
+
+            await uasyncio.sleep_ms(self.interval_ms)
+            # A tick after the connect that left it pending, so the scan
+            # does not hold up the press that brought the link up
+            self.network.refresh_cache()
+
+    def stop(self):
+        """Stop the supervision loop."""
+        self._running = False
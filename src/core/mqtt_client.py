@@ -0,0 +1,293 @@
+"""
+Non-blocking MQTT 3.1.1 client built on uasyncio streams.
+"""
+import uasyncio
+import utime
+from utils import logging as log
+from utils import trace
+
+CONNECT = 0x10
+CONNACK = 0x20
+PUBLISH = 0x30
+PUBACK = 0x40
+PINGREQ = 0xC0
+PINGRESP = 0xD0
+DISCONNECT = 0xE0
+
+
+class MQTTError(Exception):
+    """Raised when the broker refuses the connection."""
+
+    def __init__(self, return_code):
+        """
+        Initialize the error.
+
+        Args:
+            return_code (int): CONNACK return code, e.g. 4 for bad
+                credentials or 5 for not authorized
+        """
+        super().__init__(f"MQTT connection refused ({return_code})")
+        self.return_code = return_code
+        # Only 3 (server unavailable) may go away, the rest are settings
+        self.retryable = return_code == 3
+
+
+def _string(value):
+    if isinstance(value, str):
+        value = value.encode()
+    return bytes((len(value) >> 8, len(value) & 0xFF)) + value
+
+
+def _packet(kind, body):
+    """Prefix a packet body with its fixed header."""
+    header = bytearray((kind,))
+    length = len(body)
+    while True:
+        byte = length & 0x7F
+        length >>= 7
+        header.append(byte | 0x80 if length else byte)
+        if not length:
+            break
+    return bytes(header) + body
+
+
+class MQTTClient:
+    """
+    Keeps one connection to a broker open and publishes over it.
+
+    A keep-alive task pings the broker through quiet periods, so a
+    publish goes out on a warm socket without a TCP or MQTT handshake.
+    A dead connection is noticed by the reader or a missed ping, and the
+    next publish connects again. The last will is published by the
+    broker if the device drops off without disconnecting.
+    """
+
+    def __init__(self, client_id, host, port=1883, keepalive_s=60,
+                 username=None, password=None, will=None,
+                 clean_session=True, timeout_ms=5000, resolver=None):
+        """
+        Initialize the client.
+
+        Args:
+            client_id (str): Client identifier, fixed so the broker can
+                keep the session
+            host (str): Broker host name or address
+            port (int): Broker port
+            keepalive_s (int): Keep-alive interval agreed with the broker
+            username (str, optional): User name
+            password (str, optional): Password, sent only with a user name
+            will (tuple, optional): (topic, message, qos, retain) the
+                broker publishes if the connection is lost
+            clean_session (bool): Drop the broker's session on connect
+            timeout_ms (int): Timeout for connecting and for acknowledgements
+            resolver (DNSCache, optional): Cache used to resolve the host
+        """
+        self.client_id = client_id
+        self.host = host
+        self.port = port
+        self.keepalive_s = keepalive_s
+        self.username = username
+        self.password = password
+        self.will = will
+        self.clean_session = clean_session
+        self.timeout_ms = timeout_ms
+        self.resolver = resolver
+
+        self.connects = 0
+        self._reader = None
+        self._writer = None
+        self._tasks = []
+        self._lock = uasyncio.Lock()
+        self._next_id = 0
+        self._acks = {}  # Packet id -> Event set by the reader
+        self._pong = uasyncio.Event()
+        self._sent_at = 0
+
+    def is_connected(self):
+        return self._writer is not None
+
+    def _connect_packet(self):
+        flags = 0x02 if self.clean_session else 0
+        payload = _string(self.client_id)
+        if self.will:
+            topic, message, qos, retain = self.will
+            flags |= 0x04 | qos << 3 | (0x20 if retain else 0)
+            payload += _string(topic) + _string(message)
+        if self.username:
+            flags |= 0x80
+            payload += _string(self.username)
+            if self.password:
+                flags |= 0x40
+                payload += _string(self.password)
+        return _packet(CONNECT, b"\x00\x04MQTT\x04" + bytes((
+            flags, self.keepalive_s >> 8, self.keepalive_s & 0xFF)) + payload)
+
+    async def _read_packet(self, reader):
+        """Read one packet, returns (type byte, body)."""
+        kind = (await reader.readexactly(1))[0]
+        length = 0
+        shift = 0
+        while True:
+            byte = (await reader.readexactly(1))[0]
+            length |= (byte & 0x7F) << shift
+            shift += 7
+            if not byte & 0x80:
+                break
+        body = await reader.readexactly(length) if length else b""
+        return kind, body
+
+    async def _write(self, packet):
+        if self._writer is None:
+            raise OSError("MQTT not connected")
+        self._writer.write(packet)
+        await self._writer.drain()
+        self._sent_at = utime.ticks_ms()
+
+    async def connect(self):
+        """
+        Connect to the broker unless already connected.
+
+        Raises:
+            MQTTError: The broker refused the connection
+            OSError: The broker could not be reached
+        """
+        async with self._lock:
+            if self._writer is not None:
+                return
+
+            address = self.host
+            if self.resolver:
+                address = self.resolver.resolve(self.host, self.port)
+
+            span = trace.start('mqtt_connect')
+            try:
+                reader, writer = await uasyncio.wait_for_ms(
+                    uasyncio.open_connection(address, self.port),
+                    self.timeout_ms)
+                try:
+                    writer.write(self._connect_packet())
+                    await writer.drain()
+                    kind, body = await uasyncio.wait_for_ms(
+                        self._read_packet(reader), self.timeout_ms)
+                    if kind != CONNACK or len(body) < 2:
+                        raise OSError("MQTT expected CONNACK")
+                    if body[1]:
+                        raise MQTTError(body[1])
+                except BaseException:
+                    writer.close()
+                    raise
+            finally:
+                trace.end(span)
+
+            self._reader = reader
+            self._writer = writer
+            self._sent_at = utime.ticks_ms()
+            self.connects += 1
+            log.info("MQTT connected to %s:%s (session %s)", self.host,
+                     self.port, "resumed" if body[0] & 1 else "new")
+            self._tasks = [uasyncio.create_task(self._read_loop(reader)),
+                           uasyncio.create_task(self._keepalive())]
+
+    def _drop(self, reason):
+        """Forget a dead connection and wake every waiting publish."""
+        if self._writer is None:
+            return
+        if reason:
+            log.warning("MQTT connection lost: %s", reason)
+        writer = self._writer
+        self._reader = self._writer = None
+        try:
+            writer.close()
+        except Exception:
+            pass
+        for event in self._acks.values():
+            event.set()
+        current = uasyncio.current_task()
+        for task in self._tasks:
+            if task is not current:
+                task.cancel()
+        self._tasks = []
+
+    async def _read_loop(self, reader):
+        """Dispatch acknowledgements and ping responses."""
+        try:
+            while True:
+                kind, body = await self._read_packet(reader)
+                kind &= 0xF0
+                if kind == PUBACK:
+                    event = self._acks.pop(body[0] << 8 | body[1], None)
+                    if event is not None:
+                        event.set()
+                elif kind == PINGRESP:
+                    self._pong.set()
+                elif kind == PUBLISH and body:
+                    log.debug("MQTT: ignoring message without subscription")
+        except Exception as e:
+            if reader is self._reader:
+                self._drop(str(e) or "closed by broker")
+
+    async def _keepalive(self):
+        """Ping the broker when nothing else was sent for half the interval."""
+        interval_ms = self.keepalive_s * 500
+        try:
+            while self._writer is not None:
+                idle = utime.ticks_diff(utime.ticks_ms(), self._sent_at)
+                if idle < interval_ms:
+                    await uasyncio.sleep_ms(interval_ms - idle)
+                    continue
+                self._pong.clear()
+                await self._write(_packet(PINGREQ, b""))
+                await uasyncio.wait_for_ms(self._pong.wait(), self.timeout_ms)
+        except uasyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._drop(str(e) or "no ping response")
+
+    async def publish(self, topic, message, qos=0, retain=False):
+        """
+        Publish a message, connecting first if needed.
+
+        Args:
+            topic (str): Topic to publish to
+            message (str or bytes): Payload
+            qos (int): 0 to fire and forget, 1 to wait for the broker's
+                acknowledgement
+            retain (bool): Keep it as the topic's last message
+
+        Raises:
+            OSError: The connection failed or was lost before the
+                acknowledgement
+            uasyncio.TimeoutError: No acknowledgement in time
+        """
+        await self.connect()
+        if isinstance(message, str):
+            message = message.encode()
+
+        kind = PUBLISH | qos << 1 | (1 if retain else 0)
+        if not qos:
+            await self._write(_packet(kind, _string(topic) + message))
+            return
+
+        self._next_id = self._next_id % 0xFFFF + 1
+        packet_id = self._next_id
+        acked = uasyncio.Event()
+        self._acks[packet_id] = acked
+        try:
+            await self._write(_packet(kind, _string(topic) + bytes(
+                (packet_id >> 8, packet_id & 0xFF)) + message))
+            await uasyncio.wait_for_ms(acked.wait(), self.timeout_ms)
+        finally:
+            self._acks.pop(packet_id, None)
+        if self._writer is None:
+            raise OSError("MQTT connection lost before PUBACK")
+
+    async def disconnect(self):
+        """Disconnect cleanly, the broker discards the last will."""
+        if self._writer is None:
+            return
+        try:
+            await self._write(_packet(DISCONNECT, b""))
+        except Exception:
+            pass
+        self._drop(None)
+        log.info("MQTT disconnected")
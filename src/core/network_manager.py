@@ -2,9 +2,13 @@
 Network manager for WiFi connections.
 """
 import network
+import ubinascii
+import ujson
 import uasyncio
+import utime
 from config import settings
-from utils.logging import dprint as print
+from utils import logging as log
+from utils import metrics
 
 
 class NetworkManager:
@@ -15,12 +19,19 @@ class NetworkManager:
 
     _instance = None
     MAX_ATTEMPTS = 120  # 120 attempts * 0.5s = 60s total
+    FAST_POLL_MS = 50  # Status polling while reconnecting to the cached AP
+
+    # Connect duration histogram buckets
+    CONNECT_BUCKETS_MS = (250, 500, 1000, 2000, 5000, 10000, 30000, 60000)
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(NetworkManager, cls).__new__(cls)
             cls._instance.wlan = network.WLAN(network.STA_IF)
             cls._instance.is_initialized = False
+            cls._instance._connect_lock = uasyncio.Lock()
+            cls._instance.connects = 0  # Associations made, first one included
+            cls._instance.connect_failures = 0
         return cls._instance
 
     def __init__(self):
@@ -28,7 +39,21 @@ class NetworkManager:
             self.ssid = settings.WIFI_SSID
             self.password = settings.WIFI_PASS
             self.timeout = settings.WIFI_CONNECT_TIMEOUT
+            self.fast_reconnect = settings.WIFI_FAST_RECONNECT
+            self.fast_timeout_ms = settings.WIFI_FAST_CONNECT_TIMEOUT_MS
+            self.cache_file = settings.WIFI_CACHE_FILE
+            self.static_ip = settings.WIFI_STATIC_IP
+            self.cache_pending = False  # Full connect without a saved AP
+            self.last_path = None  # 'fast' or 'full', how the link came up
+            self.last_connect_ms = None
+            self.connect_time = metrics.Histogram(
+                'doorbell_wifi_connect_seconds',
+                'Time to bring the WiFi link up',
+                self.CONNECT_BUCKETS_MS, ('path',))
+            self._cache = self._load_cache() if self.fast_reconnect else None
             self.wlan.active(True)
+            if self.static_ip and self.static_ip != 'cached':
+                self.wlan.ifconfig(tuple(self.static_ip))
             self.is_initialized = True
 
     def _get_status_text(self, status):
@@ -45,9 +70,137 @@ class NetworkManager:
         }
         return f"{status} ({status_dict.get(status, 'UNKNOWN')})"
 
+    def _mac(self):
+        """Dirección MAC de la interfaz, como texto."""
+        return ":".join(["{:02x}".format(b) for b in self.wlan.config('mac')])
+
+    def _load_cache(self):
+        """Último AP y dirección buenos de esta red, None si no hay."""
+        try:
+            with open(self.cache_file) as f:
+                cache = ujson.load(f)
+        except (OSError, ValueError):
+            return None
+        return cache if cache.get('ssid') == self.ssid else None
+
+    def _save_cache(self, bssid, channel):
+        """Guarda el AP y la dirección actuales si cambiaron."""
+        cache = {
+            'ssid': self.ssid,
+            'bssid': ubinascii.hexlify(bssid).decode(),
+            'channel': channel,
+            'ifconfig': list(self.wlan.ifconfig())
+        }
+        if cache == self._cache:
+            return
+        try:
+            with open(self.cache_file, 'w') as f:
+                ujson.dump(cache, f)
+            self._cache = cache
+        except OSError as e:
+            log.warning("Could not save WiFi cache: %s", e)
+
+    def _use_dhcp(self):
+        """
+        Vuelve a DHCP tras probar la dirección guardada.
+        cyw43 no acepta ifconfig('dhcp'): se usa ipconfig(dhcp4=True) si
+        el firmware lo tiene, si no se reinicia la interfaz, que arranca
+        de nuevo con DHCP. Si nada funciona se deja de usar la dirección
+        guardada, para no quedarse con una IP vieja.
+        """
+        if hasattr(self.wlan, 'ipconfig'):
+            try:
+                self.wlan.ipconfig(dhcp4=True)
+                return
+            except Exception as e:
+                log.debug("ipconfig(dhcp4=True) failed: %s", e)
+
+        try:
+            pm = self.wlan.config('pm')
+            self.wlan.active(False)
+            self.wlan.active(True)
+            self.wlan.config(pm=pm)  # El reinicio pierde el modo de energía
+        except Exception as e:
+            log.warning("Could not restore DHCP, no longer reusing the "
+                        "cached address: %s", e)
+            self.static_ip = None
+
+    def _remember_ap(self):
+        """
+        Guarda el AP del enlace recién asociado para la próxima reconexión.
+        cyw43 no informa el BSSID del enlace: en ese caso la caché queda
+        pendiente y refresh_cache() la completa entre pulsaciones.
+        """
+        try:
+            bssid = self.wlan.config('bssid')
+            channel = self.wlan.config('channel')
+        except Exception:
+            bssid = None
+        if bssid:
+            self._save_cache(bssid, channel)
+            self.cache_pending = False
+        else:
+            self.cache_pending = True
+
+    def _scan_best(self):
+        """
+        Busca el AP con mejor señal de la red.
+        scan() bloquea el bucle uno o dos segundos, las pulsaciones
+        quedan en el buffer de la interrupción mientras tanto.
+
+        Returns:
+            tuple: (bssid, channel), o None si no aparece (SSID oculto)
+        """
+        best = None
+        try:
+            for ssid, bssid, channel, rssi, _, _ in self.wlan.scan():
+                if ssid.decode() == self.ssid and \
+                        (best is None or rssi > best[2]):
+                    best = (bssid, channel, rssi)
+        except Exception as e:
+            log.warning("WiFi scan failed: %s", e)
+            return None
+        return best[:2] if best else None
+
+    async def _fast_connect(self, cache):
+        """
+        Asociación dirigida al último AP bueno, sin escanear.
+
+        Returns:
+            bool: True si se conectó antes de fast_timeout_ms
+        """
+        log.info("Fast reconnect to %s (channel %s)",
+                 cache['bssid'], cache['channel'])
+        cached_ip = self.static_ip == 'cached'
+        if cached_ip:
+            self.wlan.ifconfig(tuple(cache['ifconfig']))
+        connected = False
+        try:
+            self.wlan.connect(self.ssid, self.password,
+                              bssid=ubinascii.unhexlify(cache['bssid']))
+
+            started = utime.ticks_ms()
+            while utime.ticks_diff(utime.ticks_ms(), started) < \
+                    self.fast_timeout_ms:
+                if self.wlan.isconnected():
+                    connected = True
+                    return True
+                if self.wlan.status() < 0:
+                    break  # AP gone or rejected us, scanning won't be slower
+                await uasyncio.sleep_ms(self.FAST_POLL_MS)
+
+            log.info("Fast reconnect failed (%s), scanning",
+                     self._get_status_text(self.wlan.status()))
+            self.wlan.disconnect()
+            return False
+        finally:
+            # The cached address is only for the fast path
+            if cached_ip and not connected:
+                self._use_dhcp()
+
     async def _hard_reset_wifi(self):
         """Realiza un reinicio completo de la interfaz WiFi."""
-        print("Realizando reinicio duro del WiFi...")
+        log.debug("Realizando reinicio duro del WiFi...")
 
         # Desactivar completamente
         self.wlan.disconnect()
@@ -59,26 +212,56 @@ class NetworkManager:
         await uasyncio.sleep(1)  # Esperar a que se inicialice
 
         # Intentar nueva conexión
-        print("Reconectando después del reinicio...")
+        log.debug("Reconectando después del reinicio...")
         self.wlan.connect(self.ssid, self.password)
         await uasyncio.sleep(1)  # Dar tiempo para iniciar la conexión
 
     async def connect(self):
         """
         Connect to WiFi network with multiple attempts.
+        Concurrent callers (link supervisor and notifier) share one attempt.
 
         Returns:
             bool: True if connection successful, False otherwise
         """
+        async with self._connect_lock:
+            if self.wlan.isconnected():
+                return await self._connect()
+            started = utime.ticks_ms()
+            connected = await self._connect()
+            if connected:
+                self.connects += 1
+                self.last_connect_ms = utime.ticks_diff(utime.ticks_ms(),
+                                                        started)
+                self.connect_time.observe(self.last_connect_ms,
+                                          self.last_path)
+                log.info("WiFi up in %s ms (%s)", self.last_connect_ms,
+                         self.last_path)
+            else:
+                self.connect_failures += 1
+            return connected
+
+    async def _connect(self):
+        """Connect to WiFi network, must hold the connect lock."""
         if self.wlan.isconnected():
             config = self.wlan.ifconfig()
-            print("\n=== Already Connected! ===")
-            print(f"IP Address: {config[0]}")
-            print("=======================\n")
+            log.info("\n=== Already Connected! ===")
+            log.info("IP Address: %s", config[0])
+            log.info("=======================\n")
             return True
 
         try:
-            print(f"Connecting to WiFi network: {self.ssid}")
+            if self._cache is not None:
+                if await self._fast_connect(self._cache):
+                    self.last_path = 'fast'
+                    self._save_cache(
+                        ubinascii.unhexlify(self._cache['bssid']),
+                        self._cache['channel'])
+                    log.info("IP Address: %s", self.wlan.ifconfig()[0])
+                    return True
+
+            self.last_path = 'full'
+            log.info("Connecting to WiFi network: %s", self.ssid)
             self.wlan.connect(self.ssid, self.password)
 
             # Wait for connection with retries
@@ -87,96 +270,167 @@ class NetworkManager:
             while not self.wlan.isconnected() and attempts < self.MAX_ATTEMPTS:
                 attempts += 1
                 current_status = self.wlan.status()
-                print(f"\n--- Connection attempt {attempts}/{self.MAX_ATTEMPTS} ---")
-                print(f"Active: {self.wlan.active()}")
-                print(f"Initial Status: {self._get_status_text(current_status)}")
-
-                print(self.ssid, self.password)
+                if log.enabled(log.DEBUG):
+                    log.debug("\n--- Connection attempt %s/%s ---",
+                              attempts, self.MAX_ATTEMPTS)
+                    log.debug("Active: %s", self.wlan.active())
+                    log.debug("Initial Status: %s",
+                              self._get_status_text(current_status))
 
                 # Hacer hard reset cada 15 intentos
                 if attempts % 15 == 0:
-                    print(f"Realizando hard reset periódico en intento {attempts}...")
+                    log.debug("Realizando hard reset periódico en intento "
+                              "%s...", attempts)
                     await self._hard_reset_wifi()
-                    print(f"Post-reset Status: {self._get_status_text(self.wlan.status())}")
-                    print(f"Post-reset Active: {self.wlan.active()}")
+                    if log.enabled(log.DEBUG):
+                        log.debug("Post-reset Status: %s",
+                                  self._get_status_text(self.wlan.status()))
+                        log.debug("Post-reset Active: %s", self.wlan.active())
                     continue
 
                 if current_status == network.STAT_CONNECTING:
-                    print(f"Still connecting... Status: {self._get_status_text(current_status)}")
+                    if log.enabled(log.DEBUG):
+                        log.debug("Still connecting... Status: %s",
+                                  self._get_status_text(current_status))
 
                 elif current_status == network.STAT_WRONG_PASSWORD:
-                    print(f"Wrong password! Status: {self._get_status_text(current_status)}")
+                    log.warning("Wrong password! Status: %s",
+                                self._get_status_text(current_status))
                     return False
 
                 elif current_status == network.STAT_NO_AP_FOUND:
-                    print(f"Network not found! Status: {self._get_status_text(current_status)}")
+                    log.warning("Network not found! Status: %s",
+                                self._get_status_text(current_status))
                     return False
 
                 elif current_status < 0:
-                    print(f"Network error! Status: {self._get_status_text(current_status)}")
+                    log.warning("Network error! Status: %s",
+                                self._get_status_text(current_status))
                     return False
 
                 elif current_status == network.STAT_CONNECT_FAIL:
-                    print(f"Connection failed! Status: {self._get_status_text(current_status)}")
-                    print("MAC Address:", ":".join(["{:02x}".format(b) for b in self.wlan.config('mac')]))
-                    try:
-                        print("RSSI:", self.wlan.status('rssi'))
-                        print("Channel:", self.wlan.config('channel'))
+                    log.warning("Connection failed! Status: %s",
+                                self._get_status_text(current_status))
+                    if log.enabled(log.DEBUG):
+                        log.debug("MAC Address: %s", self._mac())
+                        try:
+                            log.debug("RSSI: %s", self.wlan.status('rssi'))
+                            log.debug("Channel: %s",
+                                      self.wlan.config('channel'))
 
-                    except:
-                        pass
+                        except:
+                            pass
                     self.wlan.connect(self.ssid, self.password)
 
                 elif current_status == network.STAT_GOT_IP:
-                    print(f"Got IP! Status: {self._get_status_text(current_status)}")
+                    log.info("Got IP! Status: %s",
+                             self._get_status_text(current_status))
 
                 await uasyncio.sleep(0.5)
 
                 # Estado después del intento
-                final_status = self.wlan.status()
-                print(f"End of attempt status: {self._get_status_text(final_status)}")
-                print(f"Interface active: {self.wlan.active()}")
-                print("-----------------------------------")
+                if log.enabled(log.DEBUG):
+                    final_status = self.wlan.status()
+                    log.debug("End of attempt status: %s",
+                              self._get_status_text(final_status))
+                    log.debug("Interface active: %s", self.wlan.active())
+                    log.debug("-----------------------------------")
 
             if self.wlan.isconnected():
                 config = self.wlan.ifconfig()
-                print("\n=== WiFi Connected Successfully! ===")
-                print(f"IP Address: {config[0]}")
-                print(f"Subnet Mask: {config[1]}")
-                print(f"Gateway: {config[2]}")
-                print(f"DNS Server: {config[3]}")
-                print("\n=== Additional Info ===")
-                print("MAC Address:", ":".join(["{:02x}".format(b) for b in self.wlan.config('mac')]))
-                print("Channel:", self.wlan.config('channel'))
-                print("RSSI (Signal Strength):", self.wlan.status('rssi'), "dBm")
-                print("SSID:", self.wlan.config('ssid'))
-                print("============================\n")
+                log.info("\n=== WiFi Connected Successfully! ===")
+                log.info("IP Address: %s", config[0])
+                log.info("Subnet Mask: %s", config[1])
+                log.info("Gateway: %s", config[2])
+                log.info("DNS Server: %s", config[3])
+                log.info("\n=== Additional Info ===")
+                if log.enabled(log.DEBUG):
+                    log.debug("MAC Address: %s", self._mac())
+                    log.debug("Channel: %s", self.wlan.config('channel'))
+                    log.debug("RSSI (Signal Strength): %s dBm",
+                              self.wlan.status('rssi'))
+                log.info("SSID: %s", self.wlan.config('ssid'))
+                log.info("============================\n")
+                if self.fast_reconnect:
+                    self._remember_ap()
                 return True
             else:
-                print(f"\n=== Connection Failed! ===")
-                print(f"Final Status: {self._get_status_text(self.wlan.status())}")
-                print(f"Total Attempts: {attempts}/{self.MAX_ATTEMPTS}")
-                try:
-                    print("Last Known Channel:", self.wlan.config('channel'))
-                    print("MAC Address:", ":".join(["{:02x}".format(b) for b in self.wlan.config('mac')]))
-                except:
-                    pass
-                print("========================\n")
+                log.warning("\n=== Connection Failed! ===")
+                log.warning("Final Status: %s",
+                            self._get_status_text(self.wlan.status()))
+                log.warning("Total Attempts: %s/%s", attempts, self.MAX_ATTEMPTS)
+                if log.enabled(log.DEBUG):
+                    try:
+                        log.debug("Last Known Channel: %s",
+                                  self.wlan.config('channel'))
+                        log.debug("MAC Address: %s", self._mac())
+                    except:
+                        pass
+                log.warning("========================\n")
                 return False
 
         except Exception as e:
-            print(f"Connection error: {str(e)}")
+            log.warning("Connection error: %s", e)
             return False
 
+    def set_power_save(self, enabled):
+        """
+        Enable or disable WiFi power management.
+        Disabling it lowers press-to-notify latency at the cost of power.
+
+        Args:
+            enabled (bool): True for the default power saving mode
+        """
+        try:
+            if enabled:
+                self.wlan.config(pm=self.wlan.PM_POWERSAVE)
+            else:
+                self.wlan.config(pm=self.wlan.PM_NONE)
+        except Exception as e:
+            log.warning("Power management not supported: %s", e)
+
+    def refresh_cache(self):
+        """
+        Save the access point for fast reconnects if the last full connect
+        could not read it from the link.
+        Scans, so it blocks for a second or two. Called by the link
+        supervisor between presses, never before an association.
+
+        Returns:
+            bool: True if the cache was written
+        """
+        if not self.cache_pending or not self.wlan.isconnected():
+            return False
+        best = self._scan_best()
+        if best is None:
+            return False
+        self._save_cache(*best)
+        self.cache_pending = False
+        return True
+
     def disconnect(self):
         """Disconnect from WiFi network."""
         if self.wlan.isconnected():
             try:
                 self.wlan.disconnect()
                 self.wlan.active(False)
-                print("WiFi disconnected")
+                log.info("WiFi disconnected")
             except Exception as e:
-                print(f"Disconnection error: {str(e)}")
+                log.warning("Disconnection error: %s", e)
+
+    def rssi(self):
+        """
+        Signal strength of the current link.
+
+        Returns:
+            int: RSSI in dBm, None if not connected or not reported
+        """
+        if not self.wlan.isconnected():
+            return None
+        try:
+            return self.wlan.status('rssi')
+        except Exception:
+            return None
 
     def is_connected(self):
         """
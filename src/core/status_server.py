@@ -0,0 +1,264 @@
+"""
+Local HTTP status server with /health and Prometheus /metrics.
+"""
+import gc
+import ujson
+import uasyncio
+import utime
+from config import settings
+from core import http_client
+from utils import logging as log
+from utils import metrics
+
+
+class StatusServer:
+    """
+    Serves the device's counters on the LAN.
+
+    Scrapes run as ordinary tasks next to press detection and delivery,
+    so each one is kept short: one client at a time (others are closed at
+    once), a timeout on every read and a drain after every metric so the
+    press tasks get the loop back between them. Nothing here awaits the
+    notifier or the network manager, values are read as they are.
+    """
+
+    MAX_HEADER_LINES = 32
+
+    def __init__(self, notifier, press_queue, doorbell, supervisor):
+        """
+        Initialize the server.
+
+        Args:
+            notifier (Notifier): Source of delivery and heap metrics
+            press_queue (PressQueue): Queue depth and merged presses
+            doorbell (DoorbellInput): Press counts
+            supervisor (LinkSupervisor): WiFi reconnect count
+        """
+        self.notifier = notifier
+        self.network = notifier.network
+        self.press_queue = press_queue
+        self.host = settings.STATUS_SERVER_HOST
+        self.port = settings.STATUS_SERVER_PORT
+        self.timeout_ms = settings.STATUS_SERVER_TIMEOUT_MS
+        self.started = utime.ticks_ms()
+        self.requests = 0
+        self.rejected = 0  # Connections closed because a scrape was running
+        self._busy = False
+        self._server = None
+
+        network = self.network
+        pool = http_client.pool
+        heap = notifier.heap
+
+        self.metrics = [
+            metrics.Gauge('doorbell_uptime_seconds', 'Time since boot',
+                          self._uptime_s),
+            metrics.Gauge('doorbell_presses_total', 'Presses detected',
+                          lambda: doorbell.presses, 'counter'),
+            metrics.Gauge('doorbell_press_glitches_total',
+                          'Edges shorter than the debounce time',
+                          lambda: doorbell.glitches, 'counter'),
+            metrics.Gauge('doorbell_queue_depth',
+                          'Press events waiting for delivery',
+                          lambda: len(press_queue)),
+            metrics.Gauge('doorbell_presses_coalesced_total',
+                          'Presses merged into a waiting event',
+                          lambda: press_queue.coalesced, 'counter'),
+            metrics.Gauge('doorbell_presses_dropped_total',
+                          'Presses dropped by a full queue',
+                          lambda: press_queue.dropped, 'counter'),
+            notifier.deliveries,
+            notifier.attempts,
+            notifier.latency,
+            self._breaker_gauge(),
+        ]
+        self.metrics.extend(self._stats_gauges())
+        self.metrics += [
+            metrics.Gauge('doorbell_wifi_connected', 'WiFi link up',
+                          lambda: int(network.is_connected())),
+            metrics.Gauge('doorbell_wifi_rssi_dbm', 'WiFi signal strength',
+                          network.rssi),
+            metrics.Gauge('doorbell_wifi_connects_total',
+                          'WiFi associations made',
+                          lambda: network.connects, 'counter'),
+            metrics.Gauge('doorbell_wifi_connect_failures_total',
+                          'WiFi connection attempts given up',
+                          lambda: network.connect_failures, 'counter'),
+            network.connect_time,
+            metrics.Gauge('doorbell_wifi_reconnects_total',
+                          'Dropped links restored by the link supervisor',
+                          lambda: supervisor.reconnects, 'counter'),
+            metrics.Gauge('doorbell_http_pool_hits_total',
+                          'Sends that reused a pooled connection',
+                          lambda: pool.hits, 'counter'),
+            metrics.Gauge('doorbell_http_pool_misses_total',
+                          'Sends that opened a new connection',
+                          lambda: pool.misses, 'counter'),
+            metrics.Gauge('doorbell_heap_free_bytes', 'Free heap',
+                          self._mem_free),
+            metrics.Gauge('doorbell_heap_low_water_bytes',
+                          'Least free heap seen since boot',
+                          lambda: heap.low_water),
+            metrics.Gauge('doorbell_heap_shed_total',
+                          'Sends shed for lack of heap',
+                          lambda: heap.shed, 'counter'),
+        ]
+
+    def _breaker_gauge(self):
+        breakers = self.notifier.breakers
+        gauge = metrics.Gauge(
+            'doorbell_circuit_open', 'Provider circuit not closed',
+            lambda: {(name,): int(b.state != b.CLOSED)
+                     for name, b in breakers.items()})
+        gauge.labels = ('provider',)
+        return gauge
+
+    def _stats_gauges(self):
+        notifier = self.notifier
+        stats = notifier.provider_stats
+
+        def labeled(read):
+            # Provider label -> value, providers without a value left out
+            def values():
+                result = {}
+                for name, provider_stats in stats.items():
+                    value = read(name, provider_stats)
+                    if value is not None:
+                        result[(name,)] = value
+                return result
+            return values
+
+        def seconds(ms):
+            return None if ms is None else ms / 1000
+
+        def quantiles():
+            result = {}
+            for name, provider_stats in stats.items():
+                for quantile in (0.5, 0.95):
+                    ms = provider_stats.percentile(quantile)
+                    if ms is not None:
+                        result[(name, quantile)] = ms / 1000
+            return result
+
+        gauges = [
+            metrics.Gauge('doorbell_provider_send_avg_seconds',
+                          'Moving average of send times, failures count high',
+                          labeled(lambda _, s: seconds(s.ewma_ms))),
+            metrics.Gauge('doorbell_provider_send_seconds',
+                          'Send time quantiles of recent successful sends',
+                          quantiles),
+            metrics.Gauge('doorbell_provider_success_ratio',
+                          'Share of recent sends that delivered',
+                          labeled(lambda _, s: s.success_rate())),
+            metrics.Gauge('doorbell_provider_timeout_seconds',
+                          'Adaptive send timeout, absent while not adapted',
+                          labeled(lambda name, _: seconds(
+                              notifier.timeout_ms(name)))),
+        ]
+        for gauge in gauges:
+            gauge.labels = ('provider',)
+        gauges[1].labels = ('provider', 'quantile')
+        return gauges
+
+    def _uptime_s(self):
+        return utime.ticks_diff(utime.ticks_ms(), self.started) // 1000
+
+    def _mem_free(self):
+        return gc.mem_free() if hasattr(gc, 'mem_free') else None
+
+    def health(self):
+        """
+        Get a short summary of the device state.
+
+        Returns:
+            dict: 'status' ('ok', or 'degraded' while WiFi is down or a
+                circuit is open), uptime, WiFi state and RSSI, queue depth,
+                open circuits and free heap
+        """
+        open_circuits = [name for name, b in self.notifier.breakers.items()
+                         if b.state != b.CLOSED]
+        wifi = self.network.is_connected()
+        return {
+            'status': 'ok' if wifi and not open_circuits else 'degraded',
+            'uptime_s': self._uptime_s(),
+            'wifi': wifi,
+            'rssi': self.network.rssi(),
+            'queue': len(self.press_queue),
+            'open_circuits': open_circuits,
+            'heap_free': self._mem_free()
+        }
+
+    async def _read_request(self, reader):
+        """Read the request line, skipping the headers."""
+        line = await uasyncio.wait_for_ms(reader.readline(), self.timeout_ms)
+        for _ in range(self.MAX_HEADER_LINES):
+            header = await uasyncio.wait_for_ms(reader.readline(),
+                                                self.timeout_ms)
+            if not header or header == b'\r\n':
+                break
+        parts = line.split()
+        if len(parts) < 2:
+            return None, None
+        return parts[0].decode(), parts[1].decode()
+
+    async def _respond(self, writer, status, content_type, body=None):
+        writer.write(f"HTTP/1.0 {status}\r\n"
+                     f"Content-Type: {content_type}\r\n"
+                     "Connection: close\r\n\r\n".encode())
+        if body is not None:
+            writer.write(body.encode())
+        await writer.drain()
+
+    async def _write_metrics(self, writer):
+        await self._respond(writer, "200 OK",
+                            "text/plain; version=0.0.4")
+        for metric in self.metrics:
+            text = "".join(metric.lines())
+            if text:
+                writer.write(text.encode())
+                # Back to the loop between metrics, a press may be waiting
+                await writer.drain()
+
+    async def _handle(self, reader, writer):
+        """Serve one connection."""
+        if self._busy:
+            self.rejected += 1
+            writer.close()
+            await writer.wait_closed()
+            return
+
+        self._busy = True
+        try:
+            method, path = await self._read_request(reader)
+            self.requests += 1
+            if method != 'GET':
+                await self._respond(writer, "405 Method Not Allowed",
+                                    "text/plain", "GET only\n")
+            elif path == '/metrics':
+                await self._write_metrics(writer)
+            elif path == '/health':
+                await self._respond(writer, "200 OK", "application/json",
+                                    ujson.dumps(self.health()))
+            else:
+                await self._respond(writer, "404 Not Found", "text/plain",
+                                    "Try /health or /metrics\n")
+        except Exception as e:
+            log.debug("Status request failed: %s", e)
+        finally:
+            self._busy = False
+            try:
+                writer.close()
+                await writer.wait_closed()
+            except Exception:
+                pass
+
+    async def run(self):
+        """Listen until cancelled."""
+        self._server = await uasyncio.start_server(
+            self._handle, self.host, self.port, backlog=2)
+        log.info("Status server on port %s", self.port)
+        try:
+            while True:
+                await uasyncio.sleep(3600)
+        finally:
+            self._server.close()
@@ -2,22 +2,21 @@
 Main application entry point.
 """
 import uasyncio
+import utime
 from machine import Pin
 
 from config import settings
+from core.doorbell_input import DoorbellInput
 from core.heart_led import HeartLED
+from core.link_supervisor import LinkSupervisor
 
 from notifications.notifier import Notifier
-from notifications.providers.telegram import TelegramProvider
-from notifications.providers.node_red import NodeRedProvider
-from notifications.providers.simple_get import SimpleGetProvider
-from notifications.providers.twilio_whatsapp import TwilioWhatsAppProvider
-from notifications.providers.twilio_sms import TwilioSMSProvider
-from notifications.providers.slack_webhook import SlackWebhookProvider
-from notifications.providers.discord_webhook import DiscordWebhookProvider
-from notifications.providers.pushover import PushoverProvider
+from notifications.outbox import Outbox
+from notifications.press_queue import PressQueue
+from notifications.registry import load_providers
 
-from utils.logging import dprint as print
+from utils import logging as log
+from utils import trace
 
 
 # Initialize hardware
@@ -26,77 +25,111 @@ doorbell_pin = Pin(settings.DOORBELL_PIN, Pin.IN, Pin.PULL_UP)
 
 # Initialize components
 heart = HeartLED(led_pin)
+doorbell = DoorbellInput(doorbell_pin)
 
 if not settings.LED_ENABLED:
     heart.stop()
 
-# Initialize enabled providers
-providers = []
+# Initialize enabled providers, only their modules are imported
+providers = load_providers()
 
-if settings.PROVIDER_TELEGRAM_ENABLED:
-    providers.append(TelegramProvider())
+# Initialize notifier
+outbox = None
+if settings.OUTBOX_ENABLED:
+    outbox = Outbox(settings.OUTBOX_DIR, settings.OUTBOX_SEGMENT_RECORDS,
+                    settings.OUTBOX_MAX_ENTRIES)
 
-if settings.PROVIDER_NODE_RED_ENABLED:
-    providers.append(NodeRedProvider())
+notifier = Notifier(providers, heart, outbox)
+press_queue = PressQueue(settings.PRESS_QUEUE_SIZE,
+                         settings.PRESS_COALESCE_WINDOW_MS,
+                         settings.PRESS_QUEUE_FULL_POLICY)
+supervisor = LinkSupervisor(providers)
 
-if settings.PROVIDER_SIMPLE_GET_ENABLED:
-    providers.append(SimpleGetProvider())
+status_server = None
+if settings.STATUS_SERVER_ENABLED:
+    from core.status_server import StatusServer
+    status_server = StatusServer(notifier, press_queue, doorbell, supervisor)
 
-if settings.PROVIDER_TWILIO_WHATSAPP_ENABLED:
-    providers.append(TwilioWhatsAppProvider())
+# Traced presses not delivered yet: (pressed_at, span, queued_at_us)
+press_spans = []
+MAX_PRESS_SPANS = 16
 
-if settings.PROVIDER_TWILIO_SMS_ENABLED:
-    providers.append(TwilioSMSProvider())
 
-if settings.PROVIDER_SLACK_ENABLED:
-    providers.append(SlackWebhookProvider())
+async def send_startup_notification():
+    """Send initial notification when system starts up."""
+    log.info("Enviando notificación inicial de arranque...")
+    await notifier.notify("¡Sistema de timbre iniciado! 🔔")
 
-if settings.PROVIDER_DISCORD_ENABLED:
-    providers.append(DiscordWebhookProvider())
 
-if settings.PROVIDER_PUSHOVER_ENABLED:
-    providers.append(PushoverProvider())
+def trace_press(pressed_at):
+    """Open the span of a press, back-dated to its edge."""
+    now = utime.ticks_us()
+    edge = utime.ticks_add(
+        now, -1000 * utime.ticks_diff(utime.ticks_ms(), pressed_at))
 
-# Initialize notifier
-notifier = Notifier(providers, heart)
+    span = trace.start('press', 0, edge)
+    trace.end(trace.start('debounce', span, edge))
 
+    if len(press_spans) >= MAX_PRESS_SPANS:
+        trace.end(press_spans.pop(0)[1])
+    press_spans.append((pressed_at, span, now))
 
-async def send_startup_notification():
-    """Send initial notification when system starts up."""
-    print("Enviando notificación inicial de arranque...")
-    await notifier.notify("¡Sistema de timbre iniciado! 🔔")
+
+def press_span(pressed_at):
+    """
+    Take the span of the press a queued event started with.
+    Older presses were merged into an event or dropped, their spans end.
+    """
+    while press_spans:
+        at, span, queued_at = press_spans.pop(0)
+        if at == pressed_at:
+            trace.end(trace.start('queue', span, queued_at))
+            return span
+        trace.end(span)
+    return 0
 
 
 async def monitor_doorbell():
-    """Monitor doorbell state and trigger notifications."""
-    last_state = doorbell_pin.value()
-    debounce_time = 5
-    consecutive_reads = 0
-    required_reads = 1  # Number of consecutive readings needed to confirm press
+    """Monitor doorbell state and queue press events."""
+    while True:
+        pressed_at = await doorbell.next_press()
+        log.info("¡Sonó el timbre!")
+        if trace.enabled():
+            trace_press(pressed_at)
+        notifier.on_press(pressed_at)
+        press_queue.put(pressed_at)
+
 
+async def deliver_presses():
+    """Send a notification for each queued press event."""
     while True:
-        current_state = doorbell_pin.value()
+        pressed_at, count = await press_queue.get()
 
-        # Detect falling edge (button press)
-        if current_state == 0 and last_state == 1:
-            consecutive_reads += 1
-            if consecutive_reads >= required_reads:
-                print("¡Sonó el timbre!")
-                await notifier.notify("¡Sonó el timbre!")
-                consecutive_reads = 0
-                # Debounce delay
-                await uasyncio.sleep_ms(debounce_time)
-        else:
-            consecutive_reads = 0
+        message = settings.DOORBELL_MESSAGE
+        if count > 1:
+            message = settings.DOORBELL_COUNT_MESSAGE.format(
+                message=message, count=count)
 
-        last_state = current_state
-        # Reduced sleep time for faster sampling
-        await uasyncio.sleep_ms(0)
+        span = press_span(pressed_at)
+        previous = trace.enter(span)
+        try:
+            await notifier.notify(message, pressed_at)
+        finally:
+            trace.leave(previous)
+            trace.end(span)
+            trace.save()
+
+
+async def drain_outbox():
+    """Retry stored notifications whenever the network is up."""
+    while True:
+        await uasyncio.sleep(settings.OUTBOX_DRAIN_INTERVAL_S)
+        await notifier.drain_outbox()
 
 
 async def main():
     """Main application coroutine."""
-    print("Inicializando sistema...")
+    log.info("Inicializando sistema...")
 
     # Enviar notificación inicial
     await send_startup_notification()
@@ -104,24 +137,32 @@ async def main():
     # Crear y ejecutar tareas normales
     tasks = [
         uasyncio.create_task(heart.run()),
-        uasyncio.create_task(monitor_doorbell())
+        uasyncio.create_task(supervisor.run()),
+        uasyncio.create_task(monitor_doorbell()),
+        uasyncio.create_task(deliver_presses())
     ]
 
+    if outbox is not None:
+        tasks.append(uasyncio.create_task(drain_outbox()))
+
+    if status_server is not None:
+        tasks.append(uasyncio.create_task(status_server.run()))
+
     await uasyncio.gather(*tasks)
 
 
 if __name__ == "__main__":
     while True:  # Avoid halt
         try:
-            print("Starting doorbell monitor...")
+            log.info("Starting doorbell monitor...")
             uasyncio.run(main())
 
         except KeyboardInterrupt:
-            print("Application stopped")
+            log.info("Application stopped")
             break
 
         except Exception as e:
-            print(f"Fatal error: {str(e)}")
+            log.error("Fatal error: %s", e)
 
         finally:
             # Clean up
@@ -1,19 +1,145 @@
 """
 Base notification provider interface.
 """
+from core import http_client
+from utils import logging as log
 
 
 class BaseProvider:
     """Base class for all notification providers."""
 
-    async def send(self, message):
+    # Status a successful request answers with, checked by send_batch
+    SUCCESS_STATUS = 200
+
+    # 0 is the highest. When free heap runs below HEAP_BUDGET_BYTES,
+    # sends of providers at or above HEAP_SHED_PRIORITY are shed and
+    # retried later.
+    PRIORITY = 1
+
+    @property
+    def name(self):
+        """Provider name used in logs, circuit breakers and the outbox."""
+        return self.__class__.__name__
+
+    def get_recipients(self):
+        """
+        Get the recipients this provider delivers to.
+
+        Providers without a recipient list deliver once per message and
+        return a single ``None`` entry.
+
+        Returns:
+            list: Recipient identifiers passed to ``send_to``
+        """
+        return [None]
+
+    def get_hosts(self):
         """
-        Send a notification message.
+        Get the endpoints this provider connects to.
+        Used to keep DNS answers and connections warm between presses.
+
+        Returns:
+            list: (scheme, host, port) tuples
+        """
+        return []
+
+    def on_press(self, pressed_at):
+        """
+        React to a press the moment it is detected, before it is queued.
+        Runs in the press detection task, so it must return at once
+        without awaiting. Providers that notify only through send_to
+        have nothing to do.
+
+        Args:
+            pressed_at (int): utime.ticks_ms() of the press
+        """
+
+    async def warm(self):
+        """
+        Get a connection the provider keeps itself ready for the next
+        press. Called by the link supervisor while WiFi is up, providers
+        sending through the shared HTTP pool have nothing to do.
+        """
+
+    async def send_to(self, message, recipient):
+        """
+        Send a notification message to a single recipient.
 
         Args:
             message (str): The message to send
+            recipient: One of the values returned by ``get_recipients``
 
         Raises:
             NotImplementedError: Must be implemented by subclasses
         """
         raise NotImplementedError()
+
+    async def send(self, message):
+        """
+        Send a notification message to every recipient.
+
+        Args:
+            message (str): The message to send
+        """
+        for recipient in self.get_recipients():
+            await self.send_to(message, recipient)
+
+    def get_template(self, recipient):
+        """
+        Get the compiled request for a recipient, if the provider has one.
+
+        Args:
+            recipient: One of the values returned by ``get_recipients``
+
+        Returns:
+            RequestTemplate: The request, or None to send with ``send_to``
+        """
+        templates = getattr(self, 'templates', None)
+        if templates is None:
+            return None
+        return templates.get(recipient)
+
+    async def send_batch(self, message, recipients):
+        """
+        Send a notification message to several recipients at once.
+
+        Requests compiled as templates are pipelined over one kept-alive
+        connection per host. Providers whose API accepts many recipients
+        in one request override this to merge them.
+
+        Args:
+            message (str): The message to send
+            recipients (list): Values returned by ``get_recipients``
+
+        Returns:
+            list: None for each delivered recipient, otherwise the
+                exception it failed with, in recipient order
+        """
+        name = self.name
+        templates = [self.get_template(r) for r in recipients]
+
+        if None in templates:
+            results = []
+            for recipient in recipients:
+                try:
+                    await self.send_to(message, recipient)
+                    results.append(None)
+                except Exception as e:
+                    results.append(e)
+            return results
+
+        log.debug("%s: pipelining %s requests", name, len(templates))
+        responses = await http_client.pipeline(templates, message)
+
+        results = []
+        for index, response in enumerate(responses):
+            if isinstance(response, Exception):
+                log.warning("%s[%s] error: %s", name, index, response)
+                results.append(response)
+            elif response.status_code != self.SUCCESS_STATUS:
+                log.warning("%s[%s] failed: %s",
+                            name, index, await response.text())
+                results.append(response.error())
+            else:
+                results.append(None)
+        return results
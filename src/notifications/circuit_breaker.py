@@ -0,0 +1,107 @@
+"""
+Circuit breaker guarding each notification provider.
+"""
+import utime
+from utils import logging as log
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending while a provider's circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Closed/open/half-open circuit breaker for one provider.
+
+    After ``failure_threshold`` consecutive failed attempts the circuit
+    opens and sends are skipped immediately. Once ``reset_timeout_ms``
+    has passed the next send is let through as a probe: success closes
+    the circuit again, failure re-opens it for another timeout.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, failure_threshold=3, reset_timeout_ms=60000):
+        """
+        Initialize the breaker.
+
+        Args:
+            name (str): Provider name used in logs
+            failure_threshold (int): Consecutive failures that open it
+            reset_timeout_ms (int): Time open before a probe is allowed
+        """
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout_ms = reset_timeout_ms
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_count = 0
+        self._opened_at = 0
+        self._probing = False
+
+    def _set_state(self, state):
+        if state != self.state:
+            log.info("Circuit %s: %s -> %s", self.name, self.state, state)
+            self.state = state
+
+    def allow(self):
+        """
+        Check if a send may go ahead, claiming the probe when half-open.
+
+        Returns:
+            bool: True if the provider should be called
+        """
+        if self.state == self.CLOSED:
+            return True
+
+        if self.state == self.OPEN:
+            elapsed = utime.ticks_diff(utime.ticks_ms(), self._opened_at)
+            if elapsed < self.reset_timeout_ms:
+                return False
+            self._set_state(self.HALF_OPEN)
+            self._probing = False
+
+        # Half-open: a single probe at a time
+        if self._probing:
+            return False
+        self._probing = True
+        return True
+
+    def release(self):
+        """
+        Give back a send allowed by allow() that never ran, e.g. shed
+        for lack of heap. A half-open circuit may then probe again.
+        """
+        self._probing = False
+
+    def record_success(self):
+        """Close the circuit after a successful send."""
+        self.failures = 0
+        self._probing = False
+        self._set_state(self.CLOSED)
+
+    def record_failure(self):
+        """Count a failed send, opening the circuit when over threshold."""
+        self.failures += 1
+        self._probing = False
+
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.opened_count += 1
+            self._opened_at = utime.ticks_ms()
+            self._set_state(self.OPEN)
+
+    def status(self):
+        """
+        Get the breaker state for status reporting.
+
+        Returns:
+            dict: state, consecutive failures and times opened
+        """
+        return {
+            'state': self.state,
+            'failures': self.failures,
+            'opened_count': self.opened_count
+        }
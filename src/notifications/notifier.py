@@ -2,8 +2,18 @@
 Notification orchestrator module.
 """
 import uasyncio
+import utime
+from config import settings
+from core import http_client
+from core.heap_monitor import HeapBudgetError, HeapMonitor
 from core.network_manager import NetworkManager
-from utils.logging import dprint as print
+from notifications.circuit_breaker import CircuitBreaker, CircuitOpenError
+from notifications.provider_stats import StatsStore
+from notifications.retry import RetryPolicy
+from utils.semaphore import Semaphore
+from utils import logging as log
+from utils import metrics
+from utils import trace
 
 
 class Notifier:
@@ -12,116 +22,729 @@ class Notifier:
     Manages network connection and LED status indication.
     """
 
-    MAX_RETRIES = 5
-    RETRY_DELAY_MS = 1000  # 1 segundo entre intentos
+    # Press-to-delivery histogram buckets
+    LATENCY_BUCKETS_MS = (250, 500, 1000, 2000, 5000, 10000, 30000)
 
-    def __init__(self, providers, heart_led=None):
+    def __init__(self, providers, heart_led=None, outbox=None):
         """
         Initialize the notifier.
 
         Args:
             providers (list): List of notification providers
             heart_led (HeartLED, optional): LED indicator instance
+            outbox (Outbox, optional): Flash outbox for notifications
+                that failed every retry
         """
         self.providers = providers
         self.network = NetworkManager()
         self.heart_led = heart_led
+        self.outbox = outbox
+        self.concurrent = settings.NOTIFY_CONCURRENT
+        self.max_concurrency = max(1, settings.NOTIFY_MAX_CONCURRENCY)
+        self.batch_recipients = settings.NOTIFY_BATCH_RECIPIENTS
+        self.tiers = settings.PROVIDER_TIERS
+        self.default_tier = settings.PROVIDER_DEFAULT_TIER
+        self.tier_overlap_ms = settings.NOTIFY_TIER_OVERLAP_MS
+        self.learn_order = settings.NOTIFY_LEARN_ORDER
+        self.retry_policy = RetryPolicy(
+            settings.RETRY_MAX_ATTEMPTS,
+            settings.RETRY_BASE_DELAY_MS,
+            settings.RETRY_MAX_DELAY_MS,
+            settings.RETRY_JITTER
+        )
+        self.heap = HeapMonitor(
+            settings.HEAP_BUDGET_BYTES,
+            settings.HEAP_COLLECT_BELOW_BYTES,
+            settings.HEAP_SHED_PRIORITY,
+            settings.HEAP_SAMPLE_INTERVAL_MS,
+            http_client.pool
+        )
+        self.provider_stats = StatsStore(
+            [provider.name for provider in providers],
+            settings.STATS_WINDOW,
+            settings.NOTIFY_LEARN_FAILURE_MS,
+            settings.STATS_FILE,
+            settings.STATS_SAVE_INTERVAL_S * 1000
+        )
+        self.breakers = {}
+        for provider in providers:
+            provider_name = provider.name
+            self.breakers[provider_name] = CircuitBreaker(
+                provider_name,
+                settings.CIRCUIT_FAILURE_THRESHOLD,
+                settings.CIRCUIT_RESET_TIMEOUT_S * 1000
+            )
 
-    async def _try_send_provider(self, provider, message, attempt=1):
+        self.deliveries = metrics.Counter(
+            'doorbell_deliveries_total',
+            'Delivery jobs finished, after every retry',
+            ('provider', 'result'))
+        self.attempts = metrics.Counter(
+            'doorbell_send_attempts_total',
+            'Provider send calls, a batch counts once',
+            ('provider', 'result'))
+        self.latency = metrics.Histogram(
+            'doorbell_delivery_seconds',
+            'Time from press to successful delivery',
+            self.LATENCY_BUCKETS_MS, ('provider',))
+
+    def _tier(self, provider):
+        return self.tiers.get(provider.name, self.default_tier)
+
+    def timeout_ms(self, provider_name, attempt=1):
+        """
+        Get the adaptive send timeout of a provider.
+
+        Once the provider has STATS_MIN_SAMPLES successful sends, a send
+        is cut after STATS_TIMEOUT_FACTOR times its p95 send time, at
+        least STATS_TIMEOUT_MIN_MS. It doubles on every retry, so a
+        provider that got slower still gets through and is learned.
+
+        Args:
+            provider_name (str): Provider about to send
+            attempt (int): Attempt number
+
+        Returns:
+            int: Timeout in ms, None to leave it to the provider's own
+                (HTTP_TIMEOUT_MS for the HTTP providers)
+        """
+        stats = self.provider_stats[provider_name]
+        if (not settings.STATS_TIMEOUT_FACTOR or
+                stats.successes() < settings.STATS_MIN_SAMPLES):
+            return None
+        timeout = int(max(
+            stats.percentile(0.95) * settings.STATS_TIMEOUT_FACTOR,
+            settings.STATS_TIMEOUT_MIN_MS)) << (attempt - 1)
+        if timeout >= settings.HTTP_TIMEOUT_MS:
+            return None
+        return timeout
+
+    def _max_attempts(self, provider_name):
+        """
+        Attempts allowed for a provider, fewer while it mostly fails.
+        A provider below STATS_RETRY_MIN_SUCCESS gets one retry, and what
+        it does not deliver goes to the outbox instead of holding a slot.
+        """
+        policy = self.retry_policy
+        stats = self.provider_stats[provider_name]
+        if stats.count < settings.STATS_MIN_SAMPLES:
+            return policy.max_attempts
+        if stats.success_rate() >= settings.STATS_RETRY_MIN_SUCCESS:
+            return policy.max_attempts
+        log.debug("%s: %s of %s recent sends ok, one retry at most",
+                  provider_name, stats.successes(), stats.count)
+        return min(2, policy.max_attempts)
+
+    async def _timed_send(self, provider_name, sending, attempt):
+        """Run a provider send under its adaptive timeout, if any."""
+        timeout_ms = self.timeout_ms(provider_name, attempt)
+        if timeout_ms is None:
+            return await sending
+        try:
+            return await uasyncio.wait_for_ms(trace.carry(sending),
+                                              timeout_ms)
+        except uasyncio.TimeoutError:
+            log.warning("%s: no answer within its adaptive timeout (%s ms)",
+                        provider_name, timeout_ms)
+            raise
+
+    def ordered_providers(self):
+        """
+        Get the providers in send order.
+
+        Lower tiers come first. Within a tier the provider with the lowest
+        learned send time goes first, so the first delivery comes from the
+        fastest channel that has been working. A provider that has not
+        sent yet goes before the others of its tier, to learn its time.
+
+        Returns:
+            list: The providers, ordered
+        """
+        order = []
+        for index, provider in enumerate(self.providers):
+            learned = 0
+            if self.learn_order:
+                learned = self.provider_stats[provider.name].ewma_ms or 0
+            order.append((self._tier(provider), learned, index))
+        # The index keeps the configured order for ties, sort is not stable
+        order.sort()
+        if self.learn_order and self.concurrent:
+            order = self._slowest_after_fastest(order)
+        return [self.providers[index] for _, _, index in order]
+
+    def _slowest_after_fastest(self, order):
+        """
+        Reorder each tier as its fastest provider, then the rest slowest
+        first. The fastest still takes the first slot, and the slow ones
+        start early enough not to finish long after everything else.
         """
-        Try to send message through a provider with retries.
+        result = []
+        for entry in order:
+            if not result or result[-1][0] != entry[0]:
+                result.append((entry[0], [entry]))
+            else:
+                result[-1][1].append(entry)
+        reordered = []
+        for _, entries in result:
+            reordered.append(entries[0])
+            rest = entries[1:]
+            rest.sort(key=lambda e: (-e[1], e[2]))
+            reordered.extend(rest)
+        return reordered
+
+    def _build_jobs(self):
+        """
+        Expand providers into one delivery job per recipient.
+
+        Returns:
+            list: Tuples of (provider, recipient, label), in send order
+        """
+        jobs = []
+
+        for provider in self.ordered_providers():
+            provider_name = provider.name
+            recipients = provider.get_recipients()
+
+            for index, recipient in enumerate(recipients):
+                # Recipients may be webhook URLs with secrets, log the index
+                if len(recipients) == 1:
+                    label = provider_name
+                else:
+                    label = f"{provider_name}[{index}]"
+                jobs.append((provider, recipient, label))
+
+        return jobs
+
+    async def _try_send_provider(self, job, message, attempt=1):
+        """
+        Try to send message to one provider recipient.
 
         Args:
-            provider: The provider instance
+            job (tuple): The (provider, recipient, label) delivery job
             message (str): Message to send
             attempt (int): Current attempt number
 
         Returns:
-            bool: True if successful, False otherwise
+            Exception: None if successful, otherwise the error raised
         """
-        provider_name = None
+        provider, recipient, label = job
+        breaker = self.breakers[provider.name]
 
         try:
-            provider_name = provider.__class__.__name__
-            print(
-                f"Sending via {provider_name} (Attempt {attempt}/"
-                f"{self.MAX_RETRIES})")
-            print(
-                f"Message: {message}")  # Debug: mostrar el mensaje antes de
-            # enviarlo
+            log.debug("Sending via %s (Attempt %s/%s)",
+                      label, attempt, self.retry_policy.max_attempts)
+            # Debug: mostrar el mensaje antes de enviarlo
+            log.debug("Message: %s", message)
 
             # Validar que el mensaje no esté vacío
             if not message or not isinstance(message, str):
-                print(
-                    f"Error: Invalid message format in provider {provider_name}")
-                return False
+                log.warning("Error: Invalid message format in provider %s",
+                            label)
+                return ValueError("Invalid message format")
+
+            if not breaker.allow():
+                log.info("Skipping %s: circuit %s", label, breaker.state)
+                self.attempts.inc(provider.name, 'skipped')
+                return CircuitOpenError(breaker.name)
+
+            self.heap.admit(provider.PRIORITY, label)
 
-            await provider.send(message)
-            print(f"Successfully sent via {provider_name}")
-            return True
+            phase = label if attempt == 1 else f"{label} #{attempt}"
+            self.heap.begin(phase)
+            span = trace.start(phase)
+            previous = trace.enter(span)
+            sent_at = utime.ticks_ms()
+            try:
+                await self._timed_send(provider.name,
+                                       provider.send_to(message, recipient),
+                                       attempt)
+            except Exception:
+                self.provider_stats.record(provider.name, utime.ticks_diff(
+                    utime.ticks_ms(), sent_at), False)
+                raise
+            finally:
+                trace.leave(previous)
+                trace.end(span)
+                self.heap.end(phase)
+            self.provider_stats.record(
+                provider.name, utime.ticks_diff(utime.ticks_ms(), sent_at),
+                True)
+            breaker.record_success()
+            self.attempts.inc(provider.name, 'ok')
+            log.info("Successfully sent via %s", label)
+            return None
+
+        except HeapBudgetError as e:
+            # Not the provider's fault, leave its circuit alone
+            breaker.release()
+            self.attempts.inc(provider.name, 'shed')
+            return e
 
         except Exception as e:
-            print(f"Error in {provider_name} (Attempt {attempt}): {str(e)}")
-            return False
+            breaker.record_failure()
+            self.attempts.inc(provider.name, 'error')
+            log.warning("Error in %s (Attempt %s): %s", label, attempt, e)
+            return e
+
+        except BaseException:
+            # Cancelled, no outcome to record
+            breaker.release()
+            raise
+
+    async def _try_send_batch(self, jobs, message, attempt=1):
+        """
+        Try to send message to several recipients of one provider at once.
+
+        Args:
+            jobs (list): (provider, recipient, label) jobs of one provider
+            message (str): Message to send
+            attempt (int): Current attempt number
+
+        Returns:
+            list: None or the error raised, for each job in order
+        """
+        provider = jobs[0][0]
+        breaker = self.breakers[provider.name]
+
+        log.debug("Sending via %s to %s recipients (Attempt %s/%s)",
+                  breaker.name, len(jobs), attempt,
+                  self.retry_policy.max_attempts)
+
+        if not message or not isinstance(message, str):
+            log.warning("Error: Invalid message format in provider %s",
+                        breaker.name)
+            return [ValueError("Invalid message format")] * len(jobs)
+
+        if not breaker.allow():
+            log.info("Skipping %s: circuit %s", breaker.name, breaker.state)
+            self.attempts.inc(breaker.name, 'skipped')
+            return [CircuitOpenError(breaker.name)] * len(jobs)
+
+        try:
+            self.heap.admit(provider.PRIORITY, breaker.name)
+        except HeapBudgetError as e:
+            breaker.release()
+            self.attempts.inc(breaker.name, 'shed')
+            return [e] * len(jobs)
+
+        phase = breaker.name if attempt == 1 else f"{breaker.name} #{attempt}"
+        self.heap.begin(phase)
+        span = trace.start(phase)
+        previous = trace.enter(span)
+        sent_at = utime.ticks_ms()
+        try:
+            errors = await self._timed_send(breaker.name, provider.send_batch(
+                message, [recipient for _, recipient, _ in jobs]), attempt)
+        except Exception as e:
+            errors = [e] * len(jobs)
+        except BaseException:
+            breaker.release()
+            raise
+        finally:
+            trace.leave(previous)
+            trace.end(span)
+            self.heap.end(phase)
+        self.provider_stats.record(
+            breaker.name, utime.ticks_diff(utime.ticks_ms(), sent_at),
+            None in errors)
+
+        # The provider is healthy if any recipient got the message
+        if None in errors:
+            breaker.record_success()
+            self.attempts.inc(breaker.name, 'ok')
+        else:
+            breaker.record_failure()
+            self.attempts.inc(breaker.name, 'error')
+
+        for (_, _, label), error in zip(jobs, errors):
+            if error is None:
+                log.info("Successfully sent via %s", label)
+            else:
+                log.warning("Error in %s (Attempt %s): %s",
+                            label, attempt, error)
+        return errors
+
+    def _record_result(self, stats, job, success, started, error=None):
+        """
+        Record when a delivery job finished relative to the press.
+
+        Args:
+            stats (dict): Delivery statistics being collected
+            job (tuple): The (provider, recipient, label) delivery job
+            success (bool): Whether the job delivered its message
+            started (int): utime.ticks_ms() reference of the press
+            error (Exception, optional): Last error of a failed job
+        """
+        provider, _, label = job
+        elapsed = utime.ticks_diff(utime.ticks_ms(), started)
+        stats['completions'][label] = (elapsed, success)
+
+        if success:
+            self.deliveries.inc(provider.name, 'ok')
+            self.latency.observe(elapsed, provider.name)
+            if stats['first_delivery_ms'] is None:
+                stats['first_delivery_ms'] = elapsed
+        else:
+            self.deliveries.inc(provider.name, 'failed')
+            stats['failed'].append(label)
+            stats['undelivered'].append((job, error))
+
+    async def _send_serial(self, jobs, message, stats, started):
+        """
+        Send jobs one after another, in order.
+        Each job, or provider batch, retries on its own backoff timeline
+        before the next one starts.
+        """
+        semaphore = Semaphore(1)
+
+        if self.batch_recipients:
+            for group in self._group_jobs(jobs):
+                if len(group) > 1:
+                    await self._run_batch(group, message, stats, started,
+                                          semaphore)
+                else:
+                    await self._run_job(group[0], message, stats, started,
+                                        semaphore)
+        else:
+            for job in jobs:
+                await self._run_job(job, message, stats, started, semaphore)
+
+    async def _run_job(self, job, message, stats, started, semaphore):
+        """Deliver a single job with its own backoff timeline."""
+        policy = self.retry_policy
+        max_attempts = self._max_attempts(job[0].name)
 
-    async def notify(self, message):
+        for attempt in range(1, max_attempts + 1):
+            async with semaphore:
+                error = await self._try_send_provider(job, message, attempt)
+
+            if error is None:
+                self._record_result(stats, job, True, started)
+                return
+
+            if isinstance(error, CircuitOpenError):
+                log.info("%s: skipped, circuit open", job[2])
+                break
+
+            if not policy.is_retryable(error):
+                log.warning("%s: permanent failure, not retrying", job[2])
+                break
+
+            if attempt < max_attempts:
+                # Sleep outside the semaphore so other jobs can use the slot
+                await policy.wait(attempt, error)
+
+        self._record_result(stats, job, False, started, error)
+
+    async def _run_batch(self, jobs, message, stats, started, semaphore):
+        """
+        Deliver the jobs of one provider as a batch.
+        Every attempt sends to the recipients still pending in one batched
+        or pipelined call, then waits out the longest backoff among them.
+        """
+        policy = self.retry_policy
+        max_attempts = self._max_attempts(jobs[0][0].name)
+        pending = jobs
+
+        for attempt in range(1, max_attempts + 1):
+            async with semaphore:
+                errors = await self._try_send_batch(pending, message, attempt)
+
+            retry = []
+            retry_error = None
+            for job, error in zip(pending, errors):
+                if error is None:
+                    self._record_result(stats, job, True, started)
+                elif (attempt < max_attempts and
+                      policy.is_retryable(error)):
+                    retry.append(job)
+                    if (retry_error is None or
+                            policy.next_delay_ms(attempt, error) >
+                            policy.next_delay_ms(attempt, retry_error)):
+                        retry_error = error
+                else:
+                    if isinstance(error, CircuitOpenError):
+                        log.info("%s: skipped, circuit open", job[2])
+                    elif not policy.is_retryable(error):
+                        log.warning("%s: permanent failure, not retrying",
+                                    job[2])
+                    self._record_result(stats, job, False, started, error)
+
+            pending = retry
+            if not pending:
+                return
+
+            await policy.wait(attempt, retry_error)
+
+    def _group_jobs(self, jobs):
+        """Group jobs by provider, keeping the provider order."""
+        groups = []
+        for job in jobs:
+            if groups and groups[-1][0][0] is job[0]:
+                groups[-1].append(job)
+            else:
+                groups.append([job])
+        return groups
+
+    def _split_tiers(self, jobs):
+        """Split ordered jobs into one list per tier."""
+        tiers = []
+        last = None
+        for job in jobs:
+            tier = self._tier(job[0])
+            if not tiers or tier != last:
+                tiers.append([])
+                last = tier
+            tiers[-1].append(job)
+        return tiers
+
+    async def _tracked(self, sending, remaining, done):
+        """Run a send, setting done when the last one of its tier ends."""
+        try:
+            await sending
+        finally:
+            remaining[0] -= 1
+            if not remaining[0]:
+                done.set()
+
+    async def _wait_tier(self, done):
+        """Wait for a tier to finish, at most tier_overlap_ms."""
+        if self.tier_overlap_ms is None:
+            await done.wait()
+        elif self.tier_overlap_ms > 0:
+            try:
+                await uasyncio.wait_for_ms(done.wait(), self.tier_overlap_ms)
+            except uasyncio.TimeoutError:
+                log.debug("Tier still sending after %s ms, starting the next",
+                          self.tier_overlap_ms)
+
+    async def _send_concurrent(self, jobs, message, stats, started):
+        """
+        Send every job as its own task, bounded by max_concurrency.
+        Tiers start in order, each once the previous one has finished or
+        has been sending for tier_overlap_ms.
+        """
+        semaphore = Semaphore(self.max_concurrency)
+        tasks = []
+        tiers = self._split_tiers(jobs)
+
+        for index, tier_jobs in enumerate(tiers):
+            if self.batch_recipients:
+                sendings = []
+                for group in self._group_jobs(tier_jobs):
+                    if len(group) > 1:
+                        sendings.append(self._run_batch(
+                            group, message, stats, started, semaphore))
+                    else:
+                        sendings.append(self._run_job(
+                            group[0], message, stats, started, semaphore))
+            else:
+                sendings = [self._run_job(job, message, stats, started,
+                                          semaphore) for job in tier_jobs]
+
+            remaining = [len(sendings)]
+            done = uasyncio.Event()
+            for sending in sendings:
+                tasks.append(uasyncio.create_task(trace.carry(
+                    self._tracked(sending, remaining, done))))
+
+            if index + 1 < len(tiers):
+                await self._wait_tier(done)
+
+        await uasyncio.gather(*tasks)
+
+    def _report(self, stats):
+        """Print the delivery timings, headline first."""
+        log.info("\n=== Delivery Report ===")
+
+        if stats['first_delivery_ms'] is not None:
+            log.info("First delivery: %s ms after press",
+                     stats['first_delivery_ms'])
+        else:
+            log.info("First delivery: none")
+
+        for label, (elapsed, success) in stats['completions'].items():
+            result = "ok" if success else "failed"
+            log.info("  %s: %s ms (%s)", label, elapsed, result)
+
+        if stats['failed']:
+            log.warning("Failed providers after all retries:")
+            for label in stats['failed']:
+                log.warning("  - %s", label)
+
+        for name, breaker in self.breakers.items():
+            if breaker.state != breaker.CLOSED:
+                log.info("Circuit %s: %s (%s consecutive failures)",
+                         name, breaker.state, breaker.failures)
+
+        log.info("Provider stats, in send order:")
+        for provider in self.ordered_providers():
+            summary = self.provider_stats[provider.name].summary()
+            if not summary['sends']:
+                continue
+            log.info("  %s: avg %s ms, p50 %s ms, p95 %s ms, %s%% ok, "
+                     "timeout %s", provider.name, summary['ewma_ms'],
+                     summary['p50_ms'], summary['p95_ms'],
+                     int(summary['success_rate'] * 100),
+                     self.timeout_ms(provider.name) or "default")
+
+        http_client.pool.log_stats()
+        self.heap.log_stats()
+        log.info("=======================\n")
+
+    def _store_undelivered(self, stats, message):
+        """Keep failed jobs in the outbox unless they can never succeed."""
+        if self.outbox is None:
+            return
+
+        for job, error in stats['undelivered']:
+            if error is not None and not (
+                    isinstance(error, CircuitOpenError) or
+                    self.retry_policy.is_retryable(error)):
+                continue
+
+            provider, recipient, label = job
+            recipients = provider.get_recipients()
+            index = None if recipient is None else recipients.index(recipient)
+            try:
+                self.outbox.add(provider.name, index, message)
+            except ValueError as e:
+                log.warning("%s not stored in outbox: %s", label, e)
+                continue
+            log.debug("Stored %s in outbox for later delivery", label)
+
+    async def drain_outbox(self):
+        """
+        Try once to deliver every notification waiting in the outbox.
+        Entries that fail again stay stored, permanent failures are dropped.
+
+        Returns:
+            int: Number of entries delivered
+        """
+        if self.outbox is None or not len(self.outbox):
+            return 0
+
+        if not self.network.is_connected():
+            return 0
+
+        providers = {p.name: p for p in self.providers}
+        delivered = 0
+
+        for seq, _, provider_name, index, message in self.outbox.pending():
+            provider = providers.get(provider_name)
+            recipients = provider.get_recipients() if provider else []
+
+            if index is None and provider:
+                recipient = None
+            elif index is not None and index < len(recipients):
+                recipient = recipients[index]
+            else:
+                log.warning("Outbox entry %s: %s no longer configured",
+                            seq, provider_name)
+                self.outbox.ack(seq)
+                continue
+
+            job = (provider, recipient, f"{provider_name} (outbox)")
+            error = await self._try_send_provider(
+                job, settings.OUTBOX_RESEND_MESSAGE.format(message=message))
+
+            if error is None:
+                delivered += 1
+                self.outbox.ack(seq)
+            elif not (isinstance(error, CircuitOpenError) or
+                      self.retry_policy.is_retryable(error)):
+                self.outbox.ack(seq)
+
+        if delivered:
+            log.info("Outbox: delivered %s, %s left",
+                     delivered, len(self.outbox))
+        return delivered
+
+    def status(self):
+        """
+        Get the circuit breaker state of every provider.
+
+        Returns:
+            dict: Provider name -> breaker status dict
+        """
+        return {name: b.status() for name, b in self.breakers.items()}
+
+    def on_press(self, pressed_at):
+        """
+        Let providers react to a press as soon as it is detected.
+
+        Args:
+            pressed_at (int): utime.ticks_ms() of the press
+        """
+        for provider in self.providers:
+            try:
+                provider.on_press(pressed_at)
+            except Exception as e:
+                log.warning("%s: press hook failed: %s", provider.name, e)
+
+    async def notify(self, message, pressed_at=None):
         """
         Send notifications through all enabled providers with retries.
 
         Args:
             message (str): Message to send
+            pressed_at (int, optional): utime.ticks_ms() of the button
+                press, used as the reference for delivery latencies
+
+        Returns:
+            dict: Delivery statistics with 'first_delivery_ms',
+                'completions' (label -> (elapsed_ms, success)), 'failed'
+                labels, 'undelivered' (job, last error) pairs and 'heap'
+                (see HeapMonitor.stats)
         """
+        started = pressed_at if pressed_at is not None else utime.ticks_ms()
+        stats = {
+            'first_delivery_ms': None,
+            'completions': {},
+            'failed': [],
+            'undelivered': [],
+            'heap': {}
+        }
         network_connected = False
+        self.heap.start()
 
         try:
             if self.heart_led:
                 self.heart_led.set_state(self.heart_led.STATE_CONNECTING)
 
+            jobs = self._build_jobs()
+
             # Connect to network if needed
             if not self.network.is_connected():
+                self.heap.begin('connect')
+                span = trace.start('wifi')
                 connected = await self.network.connect()
+                trace.end(span)
+                self.heap.end('connect')
                 if not connected:
-                    print("Failed to establish network connection")
-                    return
+                    log.warning("Failed to establish network connection")
+                    for job in jobs:
+                        self._record_result(stats, job, False, started)
+                    self._store_undelivered(stats, message)
+                    return stats
                 network_connected = True
 
             if self.heart_led:
                 self.heart_led.set_state(self.heart_led.STATE_SENDING)
 
-            # First attempt for all providers
-            failed_providers = []
-            first_round_failed = []
-
-            for provider in self.providers:
-                if not await self._try_send_provider(provider, message):
-                    first_round_failed.append(provider)
-
-            # Retry failed providers with delay
-            for retry in range(2, self.MAX_RETRIES + 1):  # Start from attempt 2
-                if not first_round_failed:
-                    break
-
-                # Wait before retry
-                await uasyncio.sleep_ms(self.RETRY_DELAY_MS)
-
-                still_failed = []
-                for provider in first_round_failed:
-                    if not await self._try_send_provider(provider, message, retry):
-                        still_failed.append(provider)
-
-                # Update failed list for next round
-                first_round_failed = still_failed
-
-            # Add any providers that never succeeded to final failed list
-            failed_providers.extend([p.__class__.__name__ for p in first_round_failed])
+            if self.concurrent and len(jobs) > 1:
+                await self._send_concurrent(jobs, message, stats, started)
+            else:
+                await self._send_serial(jobs, message, stats, started)
 
-            # Report failed providers
-            if failed_providers:
-                print("Failed providers after all retries:")
-                for provider in failed_providers:
-                    print(f"  - {provider}")
+            self._store_undelivered(stats, message)
+            self._report(stats)
+            return stats
 
         finally:
+            self.heap.stop()
+            stats['heap'] = self.heap.stats()
+            self.provider_stats.save()
             if self.heart_led:
                 self.heart_led.set_state(self.heart_led.STATE_NORMAL)
             if network_connected:
@@ -0,0 +1,217 @@
+"""
+Persistent outbox on flash for notifications that could not be delivered.
+"""
+import ubinascii
+import uos
+import ustruct
+import utime
+from utils import logging as log
+from utils.text import encode_truncated
+
+
+class Outbox:
+    """
+    Append-only log of undelivered notifications with fixed-size records.
+
+    Every record is RECORD_SIZE bytes ending in a CRC32, so a record torn
+    by a power cut is detected and skipped. Delivered entries are not
+    rewritten in place: an ACK record is appended instead. When a segment
+    file is full, the still pending entries are copied into a fresh
+    segment and the old one is deleted, spreading writes across flash.
+    Only the pending entries are kept in RAM, capped at ``max_entries``.
+    """
+
+    TYPE_ENTRY = 1
+    TYPE_ACK = 2
+
+    NO_RECIPIENT = 0xFF
+
+    # type, seq, timestamp, recipient index, provider, message length,
+    # message, crc32
+    RECORD_FORMAT = '<BIIB24sB89sI'
+    RECORD_SIZE = 128
+    MAX_PROVIDER_BYTES = 24  # Fits every provider class name
+    MAX_MESSAGE_BYTES = 89
+    CRC_OFFSET = RECORD_SIZE - 4
+
+    def __init__(self, directory, segment_records=64, max_entries=16):
+        """
+        Open the outbox, recovering pending entries from flash.
+
+        Args:
+            directory (str): Directory holding the segment files
+            segment_records (int): Records per segment before rotating
+            max_entries (int): Pending entries kept, oldest dropped first
+        """
+        self.directory = directory
+        self.max_entries = max(1, max_entries)
+        # A rotation copies every pending entry, leave room for new ones
+        self.segment_records = max(segment_records, self.max_entries * 2)
+        self._record = bytearray(self.RECORD_SIZE)
+        self._pending = {}  # seq -> (timestamp, provider, recipient, message)
+        self._segment = 0
+        self._segment_count = 0
+        self._next_seq = 1
+
+        try:
+            uos.mkdir(directory)
+        except OSError:
+            pass  # Already exists
+
+        self._load()
+
+    def _segment_path(self, index):
+        return f"{self.directory}/{index:08d}.log"
+
+    def _segments(self):
+        indexes = []
+        for name in uos.listdir(self.directory):
+            if name.endswith(".log"):
+                try:
+                    indexes.append(int(name[:-4]))
+                except ValueError:
+                    pass
+        indexes.sort()
+        return indexes
+
+    def _load(self):
+        """Replay every segment to rebuild the pending entries."""
+        segments = self._segments()
+
+        for index in segments:
+            count = 0
+            with open(self._segment_path(index), "rb") as f:
+                while True:
+                    read = f.readinto(self._record)
+                    if read == self.RECORD_SIZE:
+                        count += 1
+                        self._apply(self._record)
+                        continue
+                    if read:
+                        # Partial record from a power cut, appending after
+                        # it would misalign the file, so rotate first
+                        count = self.segment_records
+                    break
+            self._segment = index
+            self._segment_count = count
+
+        if self._pending:
+            log.info("Outbox: %s undelivered notifications on flash",
+                     len(self._pending))
+
+    def _apply(self, record):
+        """Apply one record read from flash to the pending entries."""
+        crc = ustruct.unpack_from('<I', record, self.CRC_OFFSET)[0]
+        if ubinascii.crc32(memoryview(record)[:self.CRC_OFFSET]) != crc:
+            return  # Torn or corrupted record
+
+        (kind, seq, timestamp, recipient, provider,
+         length, message, _) = ustruct.unpack(self.RECORD_FORMAT, record)
+
+        if seq >= self._next_seq:
+            self._next_seq = seq + 1
+
+        if kind == self.TYPE_ENTRY:
+            provider = provider.rstrip(b"\0").decode()
+            if recipient == self.NO_RECIPIENT:
+                recipient = None
+            self._pending[seq] = (timestamp, provider, recipient,
+                                  message[:length].decode())
+        elif kind == self.TYPE_ACK:
+            self._pending.pop(seq, None)
+
+    def _encode(self, kind, seq, timestamp=0, provider="", recipient=None,
+                data=b""):
+        """Pack a record into the reusable record buffer."""
+        if recipient is None:
+            recipient = self.NO_RECIPIENT
+
+        ustruct.pack_into(self.RECORD_FORMAT, self._record, 0, kind, seq,
+                          timestamp, recipient, provider.encode(),
+                          len(data), data, 0)
+        crc = ubinascii.crc32(memoryview(self._record)[:self.CRC_OFFSET])
+        ustruct.pack_into('<I', self._record, self.CRC_OFFSET, crc)
+
+    def _write(self):
+        """Append the record buffer to the current segment."""
+        with open(self._segment_path(self._segment), "ab") as f:
+            f.write(self._record)
+        self._segment_count += 1
+
+    def _rotate(self):
+        """Move pending entries to a new segment and delete the old ones."""
+        old_segments = self._segments()
+        self._segment += 1
+        self._segment_count = 0
+
+        for seq, (timestamp, provider, recipient, message) in self._pending.items():
+            self._encode(self.TYPE_ENTRY, seq, timestamp, provider,
+                         recipient, message.encode())
+            self._write()
+
+        for index in old_segments:
+            if index != self._segment:
+                uos.remove(self._segment_path(index))
+
+    def _append(self, *record):
+        if self._segment_count >= self.segment_records:
+            self._rotate()
+        self._encode(*record)
+        self._write()
+
+    def add(self, provider, recipient, message):
+        """
+        Store an undelivered notification.
+
+        Args:
+            provider (str): Provider class name, at most
+                MAX_PROVIDER_BYTES long
+            recipient (int): Recipient index in the provider, or None
+            message (str): Message text, truncated to MAX_MESSAGE_BYTES
+
+        Returns:
+            int: Sequence number of the entry
+
+        Raises:
+            ValueError: The provider name does not fit in a record
+        """
+        if len(provider.encode()) > self.MAX_PROVIDER_BYTES:
+            # A cut name would not match its provider after a reboot
+            raise ValueError(f"Provider name too long for outbox: {provider}")
+
+        if len(self._pending) >= self.max_entries:
+            oldest = min(self._pending)
+            log.warning("Outbox full, dropping entry %s", oldest)
+            self.ack(oldest)
+
+        seq = self._next_seq
+        self._next_seq += 1
+        timestamp = int(utime.time())
+        data = encode_truncated(message, self.MAX_MESSAGE_BYTES)
+
+        self._append(self.TYPE_ENTRY, seq, timestamp, provider, recipient, data)
+        self._pending[seq] = (timestamp, provider, recipient, data.decode())
+        return seq
+
+    def ack(self, seq):
+        """
+        Mark an entry as delivered or abandoned.
+
+        Args:
+            seq (int): Sequence number returned by add()
+        """
+        if self._pending.pop(seq, None) is None:
+            return
+        self._append(self.TYPE_ACK, seq)
+
+    def pending(self):
+        """
+        Get the undelivered entries, oldest first.
+
+        Returns:
+            list: Tuples of (seq, timestamp, provider, recipient, message)
+        """
+        return [(seq,) + self._pending[seq] for seq in sorted(self._pending)]
+
+    def __len__(self):
+        return len(self._pending)
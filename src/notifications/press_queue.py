@@ -0,0 +1,94 @@
+"""
+Bounded press event queue between doorbell detection and delivery.
+"""
+import uasyncio
+import utime
+from utils import logging as log
+
+
+class PressQueue:
+    """
+    Queue of doorbell press events with coalescing and back-pressure.
+
+    A press arriving within the coalescing window of the event still
+    waiting at the back of the queue is merged into it, so a visitor
+    hammering the button produces one message with a ring count instead
+    of a backlog of separate notifications.
+    """
+
+    POLICY_MERGE = 'merge'              # Count the press into the newest event
+    POLICY_DROP_OLDEST = 'drop_oldest'  # Discard the oldest waiting event
+    POLICY_DROP_NEWEST = 'drop_newest'  # Discard the incoming press
+
+    def __init__(self, max_size=4, coalesce_window_ms=10000,
+                 full_policy=POLICY_MERGE):
+        """
+        Initialize the queue.
+
+        Args:
+            max_size (int): Maximum number of waiting events
+            coalesce_window_ms (int): Presses within this long of a waiting
+                event's first press are merged into it, 0 disables merging
+            full_policy (str): What to do with a press when the queue is full
+        """
+        self.max_size = max(1, max_size)
+        self.coalesce_window_ms = coalesce_window_ms
+        self.full_policy = full_policy
+        self._events = []  # [first_pressed_at, last_pressed_at, count]
+        self._available = uasyncio.Event()
+
+        self.coalesced = 0
+        self.dropped = 0
+
+    def __len__(self):
+        return len(self._events)
+
+    def put(self, pressed_at):
+        """
+        Add a press without waiting, safe to call from the detection task.
+
+        Args:
+            pressed_at (int): utime.ticks_ms() of the press
+        """
+        if self._events:
+            newest = self._events[-1]
+            age = utime.ticks_diff(pressed_at, newest[0])
+            if self.coalesce_window_ms and age < self.coalesce_window_ms:
+                newest[1] = pressed_at
+                newest[2] += 1
+                self.coalesced += 1
+                return
+
+        if len(self._events) >= self.max_size:
+            if self.full_policy == self.POLICY_DROP_NEWEST:
+                self.dropped += 1
+                log.warning("Press queue full, press dropped")
+                return
+
+            if self.full_policy == self.POLICY_DROP_OLDEST:
+                self.dropped += self._events.pop(0)[2]
+                log.warning("Press queue full, oldest event dropped")
+
+            else:
+                newest = self._events[-1]
+                newest[1] = pressed_at
+                newest[2] += 1
+                self.coalesced += 1
+                return
+
+        self._events.append([pressed_at, pressed_at, 1])
+        self._available.set()
+
+    async def get(self):
+        """
+        Wait for the oldest press event.
+
+        Returns:
+            tuple: (first_pressed_at, ring_count)
+        """
+        while not self._events:
+            self._available.clear()
+            await self._available.wait()
+
+        first, _, count = self._events.pop(0)
+        return first, count
@@ -0,0 +1,219 @@
+"""
+Rolling send statistics for each notification provider.
+"""
+import ujson
+import utime
+from array import array
+from utils import logging as log
+
+
+class ProviderStats:
+    """
+    Outcome and duration of a provider's most recent sends.
+
+    The last ``window`` sends are kept in arrays allocated once, so the
+    statistics never grow. ``ewma_ms`` averages every send, a
+    failure counting as at least ``failure_ms`` so a failing provider
+    sinks in the send order, and the percentiles cover the successful
+    sends in the window.
+    """
+
+    # Weight of the newest send in the moving average
+    EWMA_WEIGHT = 0.25
+
+    def __init__(self, name, window=16, failure_ms=10000):
+        """
+        Initialize the statistics.
+
+        Args:
+            name (str): Provider name used in logs
+            window (int): Recent sends kept
+            failure_ms (int): Least time a failed send counts as in the
+                moving average
+        """
+        self.name = name
+        self.window = max(1, window)
+        self.failure_ms = failure_ms
+        self.ewma_ms = None  # None until the first send
+        self.count = 0  # Sends in the window
+        self._ms = array('I', (0 for _ in range(self.window)))
+        self._ok = bytearray(self.window)
+        self._next = 0
+
+    def record(self, elapsed_ms, success):
+        """
+        Record one send.
+
+        Args:
+            elapsed_ms (int): Time the send took
+            success (bool): Whether it delivered
+        """
+        self._ms[self._next] = max(0, elapsed_ms)
+        self._ok[self._next] = 1 if success else 0
+        self._next = (self._next + 1) % self.window
+        self.count = min(self.count + 1, self.window)
+
+        sample = elapsed_ms if success else max(elapsed_ms, self.failure_ms)
+        if self.ewma_ms is None:
+            self.ewma_ms = sample
+        else:
+            self.ewma_ms = int(self.ewma_ms +
+                               (sample - self.ewma_ms) * self.EWMA_WEIGHT)
+
+    def successes(self):
+        return sum(self._ok[i] for i in range(self.count))
+
+    def success_rate(self):
+        """
+        Get the share of successful sends in the window.
+
+        Returns:
+            float: 0 to 1, None before the first send
+        """
+        if not self.count:
+            return None
+        return self.successes() / self.count
+
+    def percentile(self, fraction):
+        """
+        Nearest-rank percentile of the successful send times.
+
+        Args:
+            fraction (float): 0.5 for p50, 0.95 for p95
+
+        Returns:
+            int: Send time in ms, None without a successful send
+        """
+        ordered = sorted(self._ms[i] for i in range(self.count)
+                         if self._ok[i])
+        if not ordered:
+            return None
+        index = int(fraction * len(ordered) + 0.999999) - 1
+        return ordered[max(0, min(index, len(ordered) - 1))]
+
+    def summary(self):
+        """
+        Get the figures shown in logs and on the status server.
+
+        Returns:
+            dict: 'ewma_ms', 'p50_ms', 'p95_ms', 'success_rate' and 'sends'
+        """
+        return {
+            'ewma_ms': self.ewma_ms,
+            'p50_ms': self.percentile(0.5),
+            'p95_ms': self.percentile(0.95),
+            'success_rate': self.success_rate(),
+            'sends': self.count
+        }
+
+    def dump(self):
+        """Get the statistics as a JSON-ready dict."""
+        return {'ms': list(self._ms), 'ok': list(self._ok),
+                'next': self._next, 'count': self.count,
+                'ewma': self.ewma_ms}
+
+    def load(self, data):
+        """
+        Restore statistics saved by dump().
+
+        Args:
+            data (dict): Saved statistics, ignored if from another window size
+        """
+        if len(data['ms']) != self.window or len(data['ok']) != self.window:
+            log.debug("Stats for %s: window changed, starting over",
+                      self.name)
+            return
+        for i in range(self.window):
+            self._ms[i] = data['ms'][i]
+            self._ok[i] = 1 if data['ok'][i] else 0
+        self._next = data['next'] % self.window
+        self.count = min(data['count'], self.window)
+        self.ewma_ms = data['ewma']
+
+
+class StatsStore:
+    """
+    ProviderStats of every provider, with an optional flash snapshot.
+
+    Statistics live in RAM. When a path is set they are loaded from it at
+    startup and written back at most every ``save_interval_ms``, so a
+    reboot does not forget which providers are slow or failing.
+    """
+
+    def __init__(self, names, window=16, failure_ms=10000, path=None,
+                 save_interval_ms=900000):
+        """
+        Initialize the store.
+
+        Args:
+            names (list): Provider names
+            window (int): Recent sends kept per provider
+            failure_ms (int): See ProviderStats
+            path (str, optional): Snapshot file, None keeps RAM only
+            save_interval_ms (int): Least time between snapshots
+        """
+        self.providers = {name: ProviderStats(name, window, failure_ms)
+                          for name in names}
+        self.path = path
+        self.save_interval_ms = save_interval_ms
+        self._dirty = False
+        self._saved_at = utime.ticks_ms()
+        if path:
+            self._load()
+
+    def __getitem__(self, name):
+        return self.providers[name]
+
+    def items(self):
+        return self.providers.items()
+
+    def record(self, name, elapsed_ms, success):
+        self.providers[name].record(elapsed_ms, success)
+        self._dirty = True
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                saved = ujson.load(f)
+        except OSError:
+            return  # No snapshot yet
+        except ValueError as e:
+            log.warning("Stats snapshot unreadable, starting over: %s", e)
+            return
+
+        for name, data in saved.items():
+            stats = self.providers.get(name)
+            if stats is None:
+                continue
+            try:
+                stats.load(data)
+            except (KeyError, TypeError) as e:
+                log.debug("Stats for %s not restored: %s", name, e)
+        log.debug("Provider stats restored from %s", self.path)
+
+    def save(self, force=False):
+        """
+        Write the snapshot if anything changed and the interval has passed.
+
+        Args:
+            force (bool): Ignore the interval
+
+        Returns:
+            bool: True if written
+        """
+        if not self.path or not self._dirty:
+            return False
+        elapsed = utime.ticks_diff(utime.ticks_ms(), self._saved_at)
+        if not force and elapsed < self.save_interval_ms:
+            return False
+
+        try:
+            with open(self.path, 'w') as f:
+                ujson.dump({name: stats.dump()
+                            for name, stats in self.providers.items()}, f)
+        except OSError as e:
+            log.warning("Could not save provider stats: %s", e)
+            return False
+        self._dirty = False
+        self._saved_at = utime.ticks_ms()
+        return True
@@ -1,16 +1,18 @@
 """
 Discord webhook notification provider implementation.
 """
-import urequests
 import ujson
 from ..base_provider import BaseProvider
+from core import http_client
 from config import settings
-from utils.logging import dprint as print
+from utils import logging as log
 
 
 class DiscordWebhookProvider(BaseProvider):
     """Provider for sending notifications via Discord webhooks."""
 
+    SUCCESS_STATUS = 204
+
     def __init__(self):
         """Initialize the Discord webhook provider."""
         if not settings.PROVIDER_DISCORD_ENABLED:
@@ -18,36 +20,48 @@ class DiscordWebhookProvider(BaseProvider):
 
         self.webhook_urls = settings.DISCORD_WEBHOOK_URLS
 
-    async def send(self, message):
-        """Send a message to all configured Discord webhooks."""
+        # One compiled request per webhook, only the text changes per send
+        self.templates = {}
+        for webhook_url in self.webhook_urls:
+            self.templates[webhook_url] = http_client.RequestTemplate(
+                "POST", webhook_url,
+                {'Content-Type': 'application/json'},
+                '{"content": ' + http_client.RequestTemplate.MESSAGE + '}',
+                encode=ujson.dumps
+            )
+
+    def get_recipients(self):
+        """Get the configured Discord webhook URLs."""
+        return self.webhook_urls
+
+    def get_hosts(self):
+        """Get the Discord webhook endpoints."""
+        return [http_client.parse_url(url)[:3] for url in self.webhook_urls]
+
+    async def send_to(self, message, webhook_url):
+        """Send a message to a single Discord webhook."""
         if not settings.PROVIDER_DISCORD_ENABLED:
             return
 
-        for webhook_url in self.webhook_urls:
-            response = None
-
-            try:
-                data = {
-                    "content": message
-                }
+        response = None
 
-                print(f"Sending to Discord webhook")
-                response = urequests.post(
-                    webhook_url,
-                    headers={'Content-Type': 'application/json'},
-                    data=ujson.dumps(data)
-                )
+        try:
+            log.debug("Sending to Discord webhook")
+            response = await http_client.send(self.templates[webhook_url],
+                                              message)
 
-                if response.status_code == 204:
-                    print("Discord message sent")
+            if response.status_code == 204:
+                log.info("Discord message sent")
 
-                else:
-                    print(f"Failed to send to Discord: {response.text}")
+            else:
+                log.warning("Failed to send to Discord: %s",
+                            await response.text())
+                raise response.error()
 
-            except Exception as e:
-                print(f"Discord error: {str(e)}")
-                raise
+        except Exception as e:
+            log.warning("Discord error: %s", e)
+            raise
 
-            finally:
-                if response:
-                    response.close()
+        finally:
+            if response:
+                await response.close()
@@ -0,0 +1,79 @@
+"""
+MQTT notification provider implementation.
+"""
+from ..base_provider import BaseProvider
+from core import http_client
+from core.mqtt_client import MQTTClient
+from config import settings
+from utils import logging as log
+
+
+class MQTTProvider(BaseProvider):
+    """
+    Provider publishing presses to a local MQTT broker.
+    The connection stays open between presses, so a press costs one
+    small PUBLISH instead of a TCP setup and an HTTP exchange.
+    """
+
+    PRIORITY = 2  # Automation hook, first to shed
+
+    def __init__(self):
+        """Initialize the MQTT provider."""
+        if not settings.PROVIDER_MQTT_ENABLED:
+            return
+
+        self.config = settings.MQTT_CONFIG
+        status_topic = self.config['status_topic']
+        will = None
+        if status_topic:
+            will = (status_topic, self.config['offline_message'], 1, True)
+
+        self.client = MQTTClient(
+            self.config['client_id'],
+            self.config['host'],
+            int(self.config['port']),
+            self.config['keepalive_s'],
+            self.config['username'],
+            self.config['password'],
+            will,
+            self.config['clean_session'],
+            self.config['timeout_ms'],
+            http_client.dns
+        )
+        self._announced = 0  # Client connect count 'online' was sent for
+
+    async def _connect(self):
+        """Connect if needed, announcing the device as online."""
+        await self.client.connect()
+        status_topic = self.config['status_topic']
+        if status_topic and self._announced != self.client.connects:
+            self._announced = self.client.connects
+            await self.client.publish(status_topic,
+                                      self.config['online_message'], 1, True)
+
+    async def warm(self):
+        """Open the broker connection ahead of the next press."""
+        if not settings.PROVIDER_MQTT_ENABLED:
+            return
+
+        try:
+            await self._connect()
+        except Exception as e:
+            log.warning("MQTT: connecting to %s failed: %s",
+                        self.config['host'], e)
+
+    async def send_to(self, message, recipient=None):
+        """Publish a message to the doorbell topic."""
+        if not settings.PROVIDER_MQTT_ENABLED:
+            return
+
+        try:
+            await self._connect()
+            await self.client.publish(self.config['topic'], message,
+                                      self.config['qos'],
+                                      self.config['retain'])
+            log.info("MQTT message published to %s", self.config['topic'])
+
+        except Exception as e:
+            log.warning("MQTT error: %s", e)
+            raise
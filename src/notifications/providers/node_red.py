@@ -1,49 +1,59 @@
 """
 Node-RED notification provider implementation.
 """
-import urequests
 from ..base_provider import BaseProvider
+from core import http_client
 from config import settings
-from utils.logging import dprint as print
+from utils import logging as log
 
 
 class NodeRedProvider(BaseProvider):
     """Provider for sending notifications via Node-RED."""
 
+    PRIORITY = 2  # Automation hook, first to shed
+
     def __init__(self):
         """Initialize the Node-RED provider."""
         if not settings.PROVIDER_NODE_RED_ENABLED:
             return
 
         self.config = settings.NODE_RED_CONFIG
-
-    async def send(self, message):
+        self.url = (f"{self.config['protocol']}://{self.config['host']}:"
+                    f"{self.config['port']}/{self.config['path']}"
+                    f"?payload={self.config['payload']}"
+                    f"&title={self.config['title']}"
+                    f"&tema={self.config['subject']}")
+        # The request is fully static, compile it once
+        self.template = http_client.RequestTemplate("GET", self.url)
+
+    def get_hosts(self):
+        """Get the Node-RED endpoint."""
+        return [(self.config['protocol'], self.config['host'],
+                 int(self.config['port']))]
+
+    async def send_to(self, message, recipient=None):
         """Send a message to Node-RED endpoint."""
         if not settings.PROVIDER_NODE_RED_ENABLED:
             return
 
         response = None
         try:
-            url = (f"{self.config['protocol']}://{self.config['host']}:"
-                  f"{self.config['port']}/{self.config['path']}"
-                  f"?payload={self.config['payload']}"
-                  f"&title={self.config['title']}"
-                  f"&tema={self.config['subject']}")
-
-            print(f"Sending to Node-RED: {url}")
+            log.debug("Sending to Node-RED: %s", self.url)
 
-            response = urequests.get(url)
+            response = await http_client.send(self.template)
 
             if response.status_code == 200:
-                print("Node-RED request successful")
+                log.info("Node-RED request successful")
 
             else:
-                print(f"Node-RED request failed: {response.text}")
+                log.warning("Node-RED request failed: %s",
+                            await response.text())
+                raise response.error()
 
         except Exception as e:
-            print(f"Node-RED error: {str(e)}")
+            log.warning("Node-RED error: %s", e)
             raise
 
         finally:
             if response:
-                response.close()
+                await response.close()
@@ -1,16 +1,20 @@
 """
 Pushover notification provider implementation.
 """
-import urequests
 import ujson
 from ..base_provider import BaseProvider
+from core import http_client
 from config import settings
-from utils.logging import dprint as print
+from utils import logging as log
 
 
 class PushoverProvider(BaseProvider):
     """Provider for sending notifications via Pushover."""
 
+    PRIORITY = 0  # Pushes to a phone
+
+    MAX_BATCH_USERS = 50  # Limit of users per message in the Pushover API
+
     def __init__(self):
         """Initialize the Pushover provider."""
         if not settings.PROVIDER_PUSHOVER_ENABLED:
@@ -18,38 +22,112 @@ class PushoverProvider(BaseProvider):
 
         self.config = settings.PUSHOVER_CONFIG
 
-    async def send(self, message):
-        """Send a notification to all configured Pushover users."""
+        # One compiled request per user, only the message changes per send
+        self.templates = {}
+        for user_key in self.config['user_keys']:
+            self.templates[user_key] = self._compile(user_key)
+
+        # Merged requests, keyed by their comma-separated user list
+        self.batch_templates = {}
+        user_keys = self.config['user_keys']
+        if len(user_keys) > 1:
+            for start in range(0, len(user_keys), self.MAX_BATCH_USERS):
+                users = ",".join(user_keys[start:start + self.MAX_BATCH_USERS])
+                self.batch_templates[users] = self._compile(users)
+
+    def _compile(self, user):
+        """Compile the request for a user key or comma-separated keys."""
+        return http_client.RequestTemplate(
+            "POST", "https://api.pushover.net/1/messages.json",
+            {'Content-Type': 'application/json'},
+            '{"token": ' + ujson.dumps(self.config['token']) +
+            ', "user": ' + ujson.dumps(user) +
+            ', "message": ' + http_client.RequestTemplate.MESSAGE + '}',
+            encode=ujson.dumps
+        )
+
+    def get_recipients(self):
+        """Get the configured Pushover user keys."""
+        return self.config['user_keys']
+
+    def get_hosts(self):
+        """Get the Pushover API endpoint."""
+        return [("https", "api.pushover.net", 443)]
+
+    async def send_to(self, message, user_key):
+        """Send a notification to a single Pushover user."""
         if not settings.PROVIDER_PUSHOVER_ENABLED:
             return
 
-        for user_key in self.config['user_keys']:
+        response = None
+        try:
+            log.debug("Sending Pushover notification")
+            response = await http_client.send(self.templates[user_key],
+                                              message)
+
+            if response.status_code == 200:
+                log.info("Pushover notification sent")
+
+            else:
+                log.warning("Failed to send to Pushover: %s",
+                            await response.text())
+                raise response.error()
+
+        except Exception as e:
+            log.warning("Pushover error: %s", e)
+            raise
+
+        finally:
+            if response:
+                await response.close()
+
+    async def send_batch(self, message, user_keys):
+        """
+        Send to several users with one request per MAX_BATCH_USERS keys.
+
+        Pushover accepts a comma-separated user list. When a merged request
+        is rejected as a whole (e.g. one invalid key), its users are sent
+        one by one so each gets its own result.
+        """
+        if len(user_keys) < 2:
+            return await super().send_batch(message, user_keys)
+
+        results = []
+        for start in range(0, len(user_keys), self.MAX_BATCH_USERS):
+            chunk = user_keys[start:start + self.MAX_BATCH_USERS]
+            users = ",".join(chunk)
+
+            template = self.batch_templates.get(users)
+            if template is None:
+                template = self._compile(users)
+                self.batch_templates[users] = template
+
+            log.debug("Sending Pushover notification to %s users", len(chunk))
             response = None
             try:
-                url = "https://api.pushover.net/1/messages.json"
-                data = {
-                    "token": self.config['token'],
-                    "user": user_key,
-                    "message": message
-                }
-
-                print(f"Sending Pushover notification")
-                response = urequests.post(
-                    url,
-                    headers={'Content-Type': 'application/json'},
-                    data=ujson.dumps(data)
-                )
-
+                response = await http_client.send(template, message)
                 if response.status_code == 200:
-                    print("Pushover notification sent")
+                    results.extend([None] * len(chunk))
+                    continue
 
-                else:
-                    print(f"Failed to send to Pushover: {response.text}")
+                log.warning("Failed to send to Pushover: %s",
+                            await response.text())
+                error = response.error()
 
             except Exception as e:
-                print(f"Pushover error: {str(e)}")
-                raise
+                log.warning("Pushover error: %s", e)
+                error = e
 
             finally:
                 if response:
-                    response.close()
+                    await response.close()
+
+            if (isinstance(error, http_client.HTTPError) and
+                    400 <= error.status_code < 500 and
+                    error.status_code != 429):
+                # Find out which users the rejection applies to
+                results.extend(await super().send_batch(message, chunk))
+            else:
+                results.extend([error] * len(chunk))
+
+        return results
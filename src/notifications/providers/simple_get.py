@@ -1,44 +1,53 @@
 """
 Simple GET request notification provider implementation.
 """
-import urequests
 from ..base_provider import BaseProvider
+from core import http_client
 from config import settings
-from utils.logging import dprint as print
+from utils import logging as log
 
 
 class SimpleGetProvider(BaseProvider):
     """Provider for sending notifications via simple GET requests."""
 
+    PRIORITY = 2  # Automation hook, first to shed
+
     def __init__(self):
         """Initialize the Simple GET provider."""
         if not settings.PROVIDER_SIMPLE_GET_ENABLED:
             return
 
         self.config = settings.SIMPLE_GET_CONFIG
+        self.url = f"http://{self.config['host']}:{self.config['port']}"
+        # The request is fully static, compile it once
+        self.template = http_client.RequestTemplate("GET", self.url)
+
+    def get_hosts(self):
+        """Get the GET endpoint."""
+        return [("http", self.config['host'], int(self.config['port']))]
 
-    async def send(self, message):
+    async def send_to(self, message, recipient=None):
         """Send a GET request to configured endpoint."""
         if not settings.PROVIDER_SIMPLE_GET_ENABLED:
             return
 
         response = None
         try:
-            url = f"http://{self.config['host']}:{self.config['port']}"
-            print(f"Sending GET request to {url}")
+            log.debug("Sending GET request to %s", self.url)
 
-            response = urequests.get(url)
+            response = await http_client.send(self.template)
 
             if response.status_code == 200:
-                print("GET request successful")
+                log.info("GET request successful")
 
             else:
-                print(f"GET request failed: {response.text}")
+                log.warning("GET request failed: %s", await response.text())
+                raise response.error()
 
         except Exception as e:
-            print(f"GET request error: {str(e)}")
+            log.warning("GET request error: %s", e)
             raise
 
         finally:
             if response:
-                response.close()
+                await response.close()
@@ -1,11 +1,11 @@
 """
 Slack webhook notification provider implementation.
 """
-import urequests
 import ujson
 from ..base_provider import BaseProvider
+from core import http_client
 from config import settings
-from utils.logging import dprint as print
+from utils import logging as log
 
 
 class SlackWebhookProvider(BaseProvider):
@@ -18,35 +18,47 @@ class SlackWebhookProvider(BaseProvider):
 
         self.webhook_urls = settings.SLACK_WEBHOOK_URLS
 
-    async def send(self, message):
-        """Send a message to all configured Slack webhooks."""
+        # One compiled request per webhook, only the text changes per send
+        self.templates = {}
+        for webhook_url in self.webhook_urls:
+            self.templates[webhook_url] = http_client.RequestTemplate(
+                "POST", webhook_url,
+                {'Content-Type': 'application/json'},
+                '{"text": ' + http_client.RequestTemplate.MESSAGE + '}',
+                encode=ujson.dumps
+            )
+
+    def get_recipients(self):
+        """Get the configured Slack webhook URLs."""
+        return self.webhook_urls
+
+    def get_hosts(self):
+        """Get the Slack webhook endpoints."""
+        return [http_client.parse_url(url)[:3] for url in self.webhook_urls]
+
+    async def send_to(self, message, webhook_url):
+        """Send a message to a single Slack webhook."""
         if not settings.PROVIDER_SLACK_ENABLED:
             return
 
-        for webhook_url in self.webhook_urls:
-            response = None
-            try:
-                data = {
-                    "text": message
-                }
-
-                print(f"Sending to Slack webhook")
-                response = urequests.post(
-                    webhook_url,
-                    headers={'Content-Type': 'application/json'},
-                    data=ujson.dumps(data)
-                )
-
-                if response.status_code == 200:
-                    print("Slack message sent")
-
-                else:
-                    print(f"Failed to send to Slack: {response.text}")
-
-            except Exception as e:
-                print(f"Slack error: {str(e)}")
-                raise
-
-            finally:
-                if response:
-                    response.close()
+        response = None
+        try:
+            log.debug("Sending to Slack webhook")
+            response = await http_client.send(self.templates[webhook_url],
+                                              message)
+
+            if response.status_code == 200:
+                log.info("Slack message sent")
+
+            else:
+                log.warning("Failed to send to Slack: %s",
+                            await response.text())
+                raise response.error()
+
+        except Exception as e:
+            log.warning("Slack error: %s", e)
+            raise
+
+        finally:
+            if response:
+                await response.close()
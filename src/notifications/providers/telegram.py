@@ -1,15 +1,18 @@
 """
 Telegram notification provider implementation.
 """
-import urequests
 from ..base_provider import BaseProvider
+from core import http_client
 from config import settings
-from utils.logging import dprint as print
+from utils import logging as log
+from utils.urlencode import quote
 
 
 class TelegramProvider(BaseProvider):
     """Provider for sending notifications via Telegram."""
 
+    PRIORITY = 0  # Pushes to a phone
+
     def __init__(self):
         """Initialize the Telegram provider."""
         if not settings.PROVIDER_TELEGRAM_ENABLED:
@@ -18,58 +21,52 @@ class TelegramProvider(BaseProvider):
         self.bot_token = settings.TELEGRAM_BOT_TOKEN
         self.base_url = f"https://api.telegram.org/bot{self.bot_token}"
 
-    def _url_encode(self, text):
-        """
-        Codifica manualmente un texto para URL.
-        """
-        # Caracteres seguros que no necesitan codificación
-        safe = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-._~"
-        result = ""
-
-        for char in str(text):
-            if char in safe:
-                result += char
-            else:
-                # Convertir el carácter a bytes y luego a hexadecimal
-                for byte in char.encode('utf-8'):
-                    result += f"%{byte:02X}"
-
-        return result
-
-    async def send(self, message):
-        """Send a message to all configured Telegram chats."""
+        # One compiled request per chat, only the text changes per send
+        self.templates = {}
+        for chat_id in settings.TELEGRAM_CHAT_IDS:
+            self.templates[chat_id] = http_client.RequestTemplate(
+                "GET",
+                f"{self.base_url}/sendMessage?chat_id={quote(chat_id)}"
+                f"&text={http_client.RequestTemplate.MESSAGE}",
+                encode=quote
+            )
+
+    def get_recipients(self):
+        """Get the configured Telegram chat IDs."""
+        return settings.TELEGRAM_CHAT_IDS
+
+    def get_hosts(self):
+        """Get the Telegram Bot API endpoint."""
+        return [("https", "api.telegram.org", 443)]
+
+    async def send_to(self, message, chat_id):
+        """Send a message to a single Telegram chat."""
         if not settings.PROVIDER_TELEGRAM_ENABLED:
             return
 
-        print(f"Preparing to send message: '{message}'")
+        log.debug("Preparing to send message: '%s'", message)
 
         response = None
         try:
-            for chat_id in settings.TELEGRAM_CHAT_IDS:
-                try:
-                    # Codificar el mensaje
-                    encoded_message = self._url_encode(message)
-                    url = f"{self.base_url}/sendMessage?chat_id={chat_id}&text={encoded_message}"
+            log.debug("Sending Telegram message to %s", chat_id)
 
-                    print(f"Sending Telegram message to {chat_id}")
-                    print(f"URL: {url}")
+            response = await http_client.send(self.templates[chat_id], message)
 
-                    response = urequests.get(url)
+            if log.enabled(log.DEBUG):
+                log.debug("Response status: %s", response.status_code)
+                log.debug("Response text: %s", await response.text())
 
-                    print(f"Response status: {response.status_code}")
-                    print(f"Response text: {response.text}")
-
-                    if response.status_code == 200:
-                        print(f"Message sent successfully to {chat_id}")
-                    else:
-                        print(f"Failed to send to {chat_id}: {response.text}")
-
-                except Exception as e:
-                    print(f"Error sending to {chat_id}: {str(e)}")
-                finally:
-                    if response:
-                        response.close()
+            if response.status_code == 200:
+                log.info("Message sent successfully to %s", chat_id)
+            else:
+                log.warning("Failed to send to %s: %s",
+                            chat_id, await response.text())
+                raise response.error()
 
         except Exception as e:
-            print(f"Telegram error: {str(e)}")
+            log.warning("Error sending to %s: %s", chat_id, e)
             raise
+
+        finally:
+            if response:
+                await response.close()
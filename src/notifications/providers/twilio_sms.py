@@ -1,16 +1,21 @@
 """
 Twilio SMS notification provider implementation.
 """
-import urequests
 import ubinascii
 from ..base_provider import BaseProvider
+from core import http_client
 from config import settings
-from utils.logging import dprint as print
+from utils import logging as log
+from utils.urlencode import form_encode, quote_plus
 
 
 class TwilioSMSProvider(BaseProvider):
     """Provider for sending notifications via Twilio SMS."""
 
+    PRIORITY = 0  # Reaches a phone
+
+    SUCCESS_STATUS = 201
+
     def __init__(self):
         """Initialize the Twilio SMS provider."""
         if not settings.PROVIDER_TWILIO_SMS_ENABLED:
@@ -21,39 +26,56 @@ class TwilioSMSProvider(BaseProvider):
             f"{self.config['account_sid']}:{self.config['auth_token']}"
         ).decode().strip()
 
-    async def send(self, message):
-        """Send an SMS to all configured numbers."""
-        if not settings.PROVIDER_TWILIO_SMS_ENABLED:
-            return
+        url = (f"https://api.twilio.com/2010-04-01/Accounts/"
+               f"{self.config['account_sid']}/Messages.json")
+        headers = {
+            'Authorization': f'Basic {self.auth}',
+            'Content-Type': 'application/x-www-form-urlencoded'
+        }
 
+        # One compiled request per recipient, only Body changes per send
+        self.templates = {}
         for to_number in self.config['to_numbers']:
-            response = None
-            try:
-                url = (f"https://api.twilio.com/2010-04-01/Accounts/"
-                      f"{self.config['account_sid']}/Messages.json")
+            fields = form_encode((
+                ("From", self.config['from_number']),
+                ("To", to_number)
+            )).decode()
+            self.templates[to_number] = http_client.RequestTemplate(
+                "POST", url, headers,
+                f"{fields}&Body={http_client.RequestTemplate.MESSAGE}",
+                encode=quote_plus
+            )
 
-                headers = {
-                    'Authorization': f'Basic {self.auth}',
-                    'Content-Type': 'application/x-www-form-urlencoded'
-                }
+    def get_recipients(self):
+        """Get the configured SMS recipient numbers."""
+        return self.config['to_numbers']
 
-                data = (f"From={self.config['from_number']}&"
-                       f"To={to_number}&"
-                       f"Body={message}")
+    def get_hosts(self):
+        """Get the Twilio API endpoint."""
+        return [("https", "api.twilio.com", 443)]
+
+    async def send_to(self, message, to_number):
+        """Send an SMS to a single number."""
+        if not settings.PROVIDER_TWILIO_SMS_ENABLED:
+            return
 
-                print(f"Sending SMS to {to_number}")
-                response = urequests.post(url, headers=headers, data=data)
+        response = None
+        try:
+            log.debug("Sending SMS to %s", to_number)
+            response = await http_client.send(self.templates[to_number],
+                                              message)
 
-                if response.status_code == 201:
-                    print(f"SMS sent to {to_number}")
+            if response.status_code == 201:
+                log.info("SMS sent to %s", to_number)
 
-                else:
-                    print(f"Failed to send SMS: {response.text}")
+            else:
+                log.warning("Failed to send SMS: %s", await response.text())
+                raise response.error()
 
-            except Exception as e:
-                print(f"SMS error: {str(e)}")
-                raise
+        except Exception as e:
+            log.warning("SMS error: %s", e)
+            raise
 
-            finally:
-                if response:
-                    response.close()
+        finally:
+            if response:
+                await response.close()
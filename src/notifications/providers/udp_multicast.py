@@ -0,0 +1,145 @@
+"""
+UDP multicast/broadcast notification provider implementation.
+"""
+import uasyncio
+import uhashlib
+import urandom
+import usocket
+import ustruct
+from ..base_provider import BaseProvider
+from config import settings
+from utils import logging as log
+from utils.text import encode_truncated
+
+MAGIC = b"DB"
+VERSION = 1
+
+KIND_PRESS = 1  # Sent the moment a press is detected, no text
+KIND_MESSAGE = 2  # Sent with the notification text, like other providers
+
+FLAG_SIGNED = 0x01
+
+# magic, version, kind, flags, boot id, sequence number
+HEADER = "<2sBBBII"
+TAG_SIZE = 16  # Truncated HMAC-SHA256
+
+
+class UDPMulticastProvider(BaseProvider):
+    """
+    Provider sending a datagram to listeners on the LAN, e.g. a chime.
+
+    A press datagram goes out from the press detection task itself,
+    before the notifier connects anywhere, and the notification text
+    follows with the other providers. Each datagram is sent a few times
+    under one sequence number, listeners drop the copies. With a key
+    set, datagrams carry a truncated HMAC-SHA256 of their contents.
+    """
+
+    PRIORITY = 0  # A datagram needs next to no heap, never shed
+
+    def __init__(self):
+        """Initialize the UDP provider."""
+        if not settings.PROVIDER_UDP_ENABLED:
+            return
+
+        self.config = settings.UDP_CONFIG
+        self.copies = 1 + self.config['retransmits']
+        self.interval_ms = self.config['retransmit_interval_ms']
+        self.boot_id = urandom.getrandbits(32)  # Sequence numbers restart
+        self.seq = 0
+        self.sent = 0
+        self.send_errors = 0
+        self._socket = None
+        self._address = None
+
+        key = self.config['hmac_key']
+        self._pads = None
+        if key:
+            if isinstance(key, str):
+                key = key.encode()
+            if len(key) > 64:
+                key = uhashlib.sha256(key).digest()
+            key += b"\x00" * (64 - len(key))
+            self._pads = (bytes(b ^ 0x36 for b in key),
+                          bytes(b ^ 0x5C for b in key))
+
+    def _open(self):
+        """Create the socket on first use, once WiFi is up."""
+        if self._socket is not None:
+            return self._socket
+
+        address = self.config['address']
+        port = self.config['port']
+        self._address = usocket.getaddrinfo(
+            address, port, 0, usocket.SOCK_DGRAM)[0][-1]
+
+        sock = usocket.socket(usocket.AF_INET, usocket.SOCK_DGRAM)
+        sock.setblocking(False)
+        try:
+            first = int(address.split('.')[0])
+            if 224 <= first <= 239:
+                sock.setsockopt(usocket.IPPROTO_IP, usocket.IP_MULTICAST_TTL,
+                                self.config['ttl'])
+            elif address.endswith('.255'):
+                sock.setsockopt(usocket.SOL_SOCKET, usocket.SO_BROADCAST, 1)
+        except (AttributeError, OSError) as e:
+            log.debug("UDP socket option not supported: %s", e)
+        self._socket = sock
+        return sock
+
+    def _sign(self, data):
+        inner = uhashlib.sha256(self._pads[0])
+        inner.update(data)
+        outer = uhashlib.sha256(self._pads[1])
+        outer.update(inner.digest())
+        return outer.digest()[:TAG_SIZE]
+
+    def _datagram(self, kind, text=b""):
+        """Build the next datagram, with a new sequence number."""
+        self.seq = (self.seq + 1) & 0xFFFFFFFF
+        flags = FLAG_SIGNED if self._pads else 0
+        data = ustruct.pack(HEADER, MAGIC, VERSION, kind, flags,
+                            self.boot_id, self.seq) + text
+        if self._pads:
+            data += self._sign(data)
+        return data
+
+    def _send_copy(self, data):
+        try:
+            self._open().sendto(data, self._address)
+            self.sent += 1
+            return True
+        except OSError as e:
+            self.send_errors += 1
+            log.debug("UDP send failed: %s", e)
+            return False
+
+    async def _retransmit(self, data, copies):
+        for _ in range(copies):
+            await uasyncio.sleep_ms(self.interval_ms)
+            self._send_copy(data)
+
+    def _emit(self, data):
+        """Send a datagram now and its copies from a background task."""
+        sent = self._send_copy(data)
+        if self.copies > 1:
+            uasyncio.create_task(self._retransmit(data, self.copies - 1))
+        return sent
+
+    def on_press(self, pressed_at):
+        """Announce a press to the listeners right away."""
+        if not settings.PROVIDER_UDP_ENABLED:
+            return
+        # Without WiFi this fails quietly, the message datagram follows
+        self._emit(self._datagram(KIND_PRESS))
+
+    async def send_to(self, message, recipient=None):
+        """Send the notification text to the listeners."""
+        if not settings.PROVIDER_UDP_ENABLED:
+            return
+
+        text = encode_truncated(message, self.config['max_text_bytes'])
+        if not self._emit(self._datagram(KIND_MESSAGE, text)):
+            raise OSError("UDP send failed")
+        log.info("UDP datagram %s sent to %s", self.seq,
+                 self.config['address'])
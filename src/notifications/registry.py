@@ -0,0 +1,101 @@
+"""
+Registry of notification providers, imported only when enabled.
+"""
+from config import settings
+from utils import logging as log
+
+# Enable setting, module path and class of every provider, in send order
+# within a tier (see PROVIDER_TIERS) until send times are learned
+PROVIDERS = (
+    ('PROVIDER_TELEGRAM_ENABLED',
+     'notifications.providers.telegram', 'TelegramProvider'),
+    ('PROVIDER_NODE_RED_ENABLED',
+     'notifications.providers.node_red', 'NodeRedProvider'),
+    ('PROVIDER_SIMPLE_GET_ENABLED',
+     'notifications.providers.simple_get', 'SimpleGetProvider'),
+    ('PROVIDER_MQTT_ENABLED',
+     'notifications.providers.mqtt', 'MQTTProvider'),
+    ('PROVIDER_UDP_ENABLED',
+     'notifications.providers.udp_multicast', 'UDPMulticastProvider'),
+    ('PROVIDER_TWILIO_WHATSAPP_ENABLED',
+     'notifications.providers.twilio_whatsapp', 'TwilioWhatsAppProvider'),
+    ('PROVIDER_TWILIO_SMS_ENABLED',
+     'notifications.providers.twilio_sms', 'TwilioSMSProvider'),
+    ('PROVIDER_SLACK_ENABLED',
+     'notifications.providers.slack_webhook', 'SlackWebhookProvider'),
+    ('PROVIDER_DISCORD_ENABLED',
+     'notifications.providers.discord_webhook', 'DiscordWebhookProvider'),
+    ('PROVIDER_PUSHOVER_ENABLED',
+     'notifications.providers.pushover', 'PushoverProvider'),
+)
+
+
+def _create(module_path, class_name):
+    """Import a provider module and instantiate its provider class."""
+    module = __import__(module_path, None, None, (class_name,))
+    return getattr(module, class_name)()
+
+
+class LazyProvider:
+    """
+    Stands in for a provider until it is first used.
+    The module is imported and the provider built on the first attribute
+    access, e.g. when the notifier asks for its recipients on a press.
+    """
+
+    def __init__(self, module_path, class_name):
+        """
+        Initialize the placeholder.
+
+        Args:
+            module_path (str): Dotted path of the provider module
+            class_name (str): Provider class in that module
+        """
+        self.name = class_name
+        self._module_path = module_path
+        self._provider = None
+
+    def _load(self):
+        if self._provider is None:
+            log.debug("Loading provider %s", self.name)
+            self._provider = _create(self._module_path, self.name)
+        return self._provider
+
+    def on_press(self, pressed_at):
+        # Loaded by the startup notification, before any press
+        if self._provider is not None:
+            self._provider.on_press(pressed_at)
+
+    async def warm(self):
+        # Warming is no reason to load the provider before its first use
+        if self._provider is not None:
+            await self._provider.warm()
+
+    def __getattr__(self, attr):
+        # Only called for attributes the placeholder itself does not have
+        return getattr(self._load(), attr)
+
+
+def load_providers(lazy=None):
+    """
+    Build the enabled providers, importing only their modules.
+
+    Args:
+        lazy (bool, optional): Defer each import to the provider's first
+            use, defaults to settings.PROVIDER_LAZY_IMPORT
+
+    Returns:
+        list: Provider instances, or LazyProvider placeholders
+    """
+    if lazy is None:
+        lazy = settings.PROVIDER_LAZY_IMPORT
+
+    providers = []
+    for setting, module_path, class_name in PROVIDERS:
+        if not getattr(settings, setting, False):
+            continue
+        if lazy:
+            providers.append(LazyProvider(module_path, class_name))
+        else:
+            providers.append(_create(module_path, class_name))
+    return providers
@@ -0,0 +1,92 @@
+"""
+Retry policy with exponential backoff, jitter and error classification.
+"""
+import uasyncio
+import urandom
+from core.http_client import HTTPError
+from notifications.circuit_breaker import CircuitOpenError
+
+
+class RetryPolicy:
+    """
+    Decides if and when a failed delivery is attempted again.
+    Each provider recipient follows its own backoff timeline, so one slow
+    or flapping endpoint does not hold back the retries of the others.
+    """
+
+    # Statuses worth retrying, every other 4xx is a permanent failure
+    RETRYABLE_STATUSES = (408, 425, 429)
+
+    def __init__(self, max_attempts=5, base_delay_ms=500, max_delay_ms=8000,
+                 jitter=0.5):
+        """
+        Initialize the policy.
+
+        Args:
+            max_attempts (int): Attempts per recipient, including the first
+            base_delay_ms (int): Delay before the first retry
+            max_delay_ms (int): Cap on any single delay, a longer
+                Retry-After gives up for this press instead of waiting
+            jitter (float): Fraction of each delay that is randomized,
+                0 for fixed delays, 1 for full jitter
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay_ms = base_delay_ms
+        self.max_delay_ms = max_delay_ms
+        self.jitter = jitter
+
+    def is_retryable(self, error):
+        """
+        Check if an error may go away on a later attempt.
+
+        Timeouts, connection errors, 5xx and throttling are retryable;
+        other 4xx responses (bad credentials, bad request), bad
+        configuration and errors with a false ``retryable`` attribute
+        are not.
+
+        Args:
+            error (Exception): The error raised by the provider
+
+        Returns:
+            bool: True if the send should be attempted again
+        """
+        if isinstance(error, HTTPError):
+            status = error.status_code
+            if status >= 500 or status in self.RETRYABLE_STATUSES:
+                return (error.retry_after_ms is None or
+                        error.retry_after_ms <= self.max_delay_ms)
+            return False
+
+        if isinstance(error, (CircuitOpenError, ValueError, TypeError,
+                              KeyError)):
+            return False
+
+        # Other errors may classify themselves, e.g. a refused MQTT login
+        return getattr(error, 'retryable', True)
+
+    def next_delay_ms(self, attempt, error=None):
+        """
+        Get the delay before the attempt after ``attempt``.
+
+        Args:
+            attempt (int): The attempt that just failed, starting at 1
+            error (Exception, optional): Its error, to honor Retry-After
+
+        Returns:
+            int: Milliseconds to wait before trying again
+        """
+        delay = min(self.max_delay_ms,
+                    self.base_delay_ms << min(attempt - 1, 16))
+
+        if self.jitter:
+            spread = int(delay * self.jitter)
+            delay = delay - spread + (urandom.getrandbits(16) * spread >> 16)
+
+        if isinstance(error, HTTPError) and error.retry_after_ms:
+            delay = max(delay, error.retry_after_ms)
+
+        return delay
+
+    async def wait(self, attempt, error=None):
+        """Sleep for next_delay_ms(attempt, error)."""
+        await uasyncio.sleep_ms(self.next_delay_ms(attempt, error))
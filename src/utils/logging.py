@@ -1,17 +1,118 @@
 """
 Logging utility module.
+
+Messages take %-style arguments that are only formatted when the level
+is enabled and some sink is on, so a disabled debug() costs one
+comparison. Arguments are still evaluated by the caller: guard expensive
+ones (like awaiting a response body) with enabled(DEBUG).
+
+tools/build.py --strip-debug removes every debug() call, and every
+`if log.enabled(log.DEBUG):` block, from the built firmware.
 """
+import utime
+from micropython import const
+
 from config import settings
 
+DEBUG = const(10)
+INFO = const(20)
+WARNING = const(30)
+ERROR = const(40)
+
+_NAMES = {DEBUG: 'D', INFO: 'I', WARNING: 'W', ERROR: 'E'}
+
+# Above every level, nothing gets formatted
+_OFF = const(100)
+
+_threshold = _OFF
+_serial = False
+_ring = None
+_ring_pos = 0
+
+
+def configure(level=None, serial=None, ring_size=None):
+    """
+    Set the level and sinks, defaults come from settings.
+
+    Args:
+        level (int): Lowest level logged, one of DEBUG, INFO, WARNING, ERROR
+        serial (bool): Print log lines to the serial console
+        ring_size (int): Last lines kept in RAM for recent(), 0 to disable
+    """
+    global _threshold, _serial, _ring, _ring_pos
+    if level is None:
+        level = settings.LOG_LEVEL
+    if serial is None:
+        serial = settings.SERIAL_LOGS
+    if ring_size is None:
+        ring_size = settings.LOG_RING_SIZE
 
-def dprint(*args, **kwargs):
+    _serial = serial
+    _ring = [None] * ring_size if ring_size > 0 else None
+    _ring_pos = 0
+    _threshold = level if serial or _ring is not None else _OFF
+
+
+def enabled(level):
     """
-    Debug print function.
-    Only prints if SERIAL_LOGS is enabled in settings.
+    Check if a message at this level would be logged.
 
     Args:
-        *args: Variable length argument list to print
-        **kwargs: Arbitrary keyword arguments for print function
+        level (int): DEBUG, INFO, WARNING or ERROR
+
+    Returns:
+        bool: True if it reaches a sink
+    """
+    return level >= _threshold
+
+
+def _emit(level, msg, args):
+    """Format a message and write it to the enabled sinks."""
+    global _ring_pos
+    if args:
+        msg = msg % args
+    if _serial:
+        print(msg)
+    if _ring is not None:
+        _ring[_ring_pos] = f"{utime.ticks_ms()} {_NAMES[level]} {msg}"
+        _ring_pos = (_ring_pos + 1) % len(_ring)
+
+
+def debug(msg, *args):
+    """Log a message at DEBUG level."""
+    if DEBUG >= _threshold:
+        _emit(DEBUG, msg, args)
+
+
+def info(msg, *args):
+    """Log a message at INFO level."""
+    if INFO >= _threshold:
+        _emit(INFO, msg, args)
+
+
+def warning(msg, *args):
+    """Log a message at WARNING level."""
+    if WARNING >= _threshold:
+        _emit(WARNING, msg, args)
+
+
+def error(msg, *args):
+    """Log a message at ERROR level."""
+    if ERROR >= _threshold:
+        _emit(ERROR, msg, args)
+
+
+def recent():
     """
-    if settings.SERIAL_LOGS:
-        print(*args, **kwargs)
+    Get the lines kept by the ring buffer sink.
+
+    Returns:
+        list: "<ticks_ms> <level> <message>" strings, oldest first
+    """
+    if _ring is None:
+        return []
+    lines = _ring[_ring_pos:] + _ring[:_ring_pos]
+    return [line for line in lines if line is not None]
+
+
+configure()
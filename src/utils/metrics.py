@@ -0,0 +1,127 @@
+"""
+Counters, gauges and histograms rendered in the Prometheus text format.
+"""
+from array import array
+
+
+def _labels(names, values, extra=""):
+    pairs = []
+    for name, value in zip(names, values):
+        pairs.append(f'{name}="{value}"')
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """Count that only goes up, one per combination of label values."""
+
+    def __init__(self, name, help, labels=()):
+        """
+        Initialize the counter.
+
+        Args:
+            name (str): Metric name, ending in _total
+            help (str): One-line description
+            labels (tuple): Label names, values are given to inc()
+        """
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.values = {}
+
+    def inc(self, *values):
+        """Add one to the count of these label values."""
+        self.values[values] = self.values.get(values, 0) + 1
+
+    def lines(self):
+        yield f"# HELP {self.name} {self.help}\n"
+        yield f"# TYPE {self.name} counter\n"
+        for values, count in self.values.items():
+            yield f"{self.name}{_labels(self.labels, values)} {count}\n"
+
+
+class Gauge:
+    """Value read from the application when scraped."""
+
+    def __init__(self, name, help, read, kind="gauge"):
+        """
+        Initialize the gauge.
+
+        Args:
+            name (str): Metric name
+            help (str): One-line description
+            read (callable): Returns the value, or a dict of label value
+                tuple -> value with ``labels`` set, None to skip it
+            kind (str): 'gauge', or 'counter' for counts kept elsewhere
+        """
+        self.name = name
+        self.help = help
+        self.read = read
+        self.kind = kind
+        self.labels = ()
+
+    def lines(self):
+        value = self.read()
+        if value is None:
+            return
+        yield f"# HELP {self.name} {self.help}\n"
+        yield f"# TYPE {self.name} {self.kind}\n"
+        if isinstance(value, dict):
+            for values, sample in value.items():
+                yield f"{self.name}{_labels(self.labels, values)} {sample}\n"
+        else:
+            yield f"{self.name} {value}\n"
+
+
+class Histogram:
+    """
+    Distribution of millisecond durations in fixed buckets.
+    Exported in seconds, as Prometheus expects.
+    """
+
+    def __init__(self, name, help, buckets_ms, labels=()):
+        """
+        Initialize the histogram.
+
+        Args:
+            name (str): Metric name, ending in _seconds
+            help (str): One-line description
+            buckets_ms (tuple): Ascending upper bounds in milliseconds
+            labels (tuple): Label names, values are given to observe()
+        """
+        self.name = name
+        self.help = help
+        self.buckets_ms = buckets_ms
+        self.labels = labels
+        self._series = {}  # label values -> [bucket counts, sum_ms, count]
+
+    def observe(self, value_ms, *values):
+        """Record one duration for these label values."""
+        series = self._series.get(values)
+        if series is None:
+            series = [array('L', [0] * len(self.buckets_ms)), 0, 0]
+            self._series[values] = series
+
+        counts = series[0]
+        for index, bound in enumerate(self.buckets_ms):
+            if value_ms <= bound:
+                counts[index] += 1
+                break
+        series[1] += value_ms
+        series[2] += 1
+
+    def lines(self):
+        yield f"# HELP {self.name} {self.help}\n"
+        yield f"# TYPE {self.name} histogram\n"
+        for values, (counts, total_ms, count) in self._series.items():
+            cumulative = 0
+            for bound, bucket in zip(self.buckets_ms, counts):
+                cumulative += bucket
+                le = _labels(self.labels, values, f'le="{bound / 1000}"')
+                yield f"{self.name}_bucket{le} {cumulative}\n"
+            le = _labels(self.labels, values, 'le="+Inf"')
+            yield f"{self.name}_bucket{le} {count}\n"
+            labels = _labels(self.labels, values)
+            yield f"{self.name}_sum{labels} {total_ms / 1000}\n"
+            yield f"{self.name}_count{labels} {count}\n"
@@ -0,0 +1,50 @@
+"""
+Counting semaphore for uasyncio.
+"""
+import uasyncio
+
+
+class Semaphore:
+    """
+    Minimal counting semaphore.
+    The MicroPython uasyncio core only ships Lock and Event, so this
+    limits how many tasks may hold a shared resource at the same time.
+    """
+
+    def __init__(self, value=1):
+        """
+        Initialize the semaphore.
+
+        Args:
+            value (int): Number of tasks allowed to hold it at once
+        """
+        self._value = value
+        self._event = uasyncio.Event()
+
+    async def acquire(self):
+        """Wait until a slot is free and take it."""
+        while self._value <= 0:
+            self._event.clear()
+            await self._event.wait()
+        self._value -= 1
+
+    def release(self):
+        """Give back a slot and wake any waiting tasks."""
+        self._value += 1
+        self._event.set()
+
+    def locked(self):
+        """
+        Check if every slot is taken.
+
+        Returns:
+            bool: True if acquire() would wait, False otherwise
+        """
+        return self._value <= 0
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.release()
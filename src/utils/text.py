@@ -0,0 +1,25 @@
+"""
+Byte-limited text encoding.
+"""
+
+
+def encode_truncated(text, max_bytes):
+    """
+    Encode text as UTF-8, cut to fit without splitting a character.
+
+    Args:
+        text (str): Text to encode
+        max_bytes (int): Most bytes returned
+
+    Returns:
+        bytes: The encoded text, at most max_bytes long
+    """
+    data = text.encode()
+    if len(data) <= max_bytes:
+        return data
+
+    cut = max_bytes
+    # Step back over UTF-8 continuation bytes to a character start
+    while cut > 0 and (data[cut] & 0xC0) == 0x80:
+        cut -= 1
+    return data[:cut]
@@ -0,0 +1,335 @@
+"""
+Span tracer for the press-to-delivery path.
+
+Spans live in preallocated arrays used as a ring buffer, so tracing a
+press allocates nothing but the interned span names. Each span records
+its parent and root, and start and duration from utime.ticks_us().
+
+A task's current span is the default parent of the spans it starts.
+Tasks do not inherit it: wrap a coroutine with carry() before handing
+it to create_task() or wait_for_ms() to keep its spans in the tree.
+
+With TRACE_BUFFER_SPANS = 0 every function returns at once.
+"""
+import ujson
+import uos
+import ustruct
+import uasyncio
+import utime
+from array import array
+from config import settings
+
+MAGIC = b"DBTR"
+VERSION = 1
+
+# seq, parent, root, name id, start offset from the root, duration
+RECORD = "<IIIBII"
+OPEN = 0xFFFFFFFF  # Duration of a span not ended yet, in exports
+
+_size = 0
+_next = 1  # Sequence number of the next span, 0 means no span
+_seq = _parent = _root = _start = _dur = None
+_name = None
+_names = []
+_name_ids = {}
+_context = {}  # Task -> its current span
+_saved = 0  # Last span appended to TRACE_FILE
+
+
+def configure(size=None):
+    """
+    Allocate the span buffer, dropping recorded spans.
+
+    Args:
+        size (int): Spans kept, oldest overwritten first, 0 disables.
+            Defaults to settings.TRACE_BUFFER_SPANS
+    """
+    global _size, _next, _saved, _seq, _parent, _root, _start, _dur, _name
+    if size is None:
+        size = settings.TRACE_BUFFER_SPANS
+
+    _size = size
+    _next = 1
+    _saved = 0
+    _context.clear()
+    if size:
+        _seq = array('L', [0] * size)
+        _parent = array('L', [0] * size)
+        _root = array('L', [0] * size)
+        _start = array('L', [0] * size)
+        _dur = array('L', [0] * size)  # Duration + 1, 0 while open
+        _name = bytearray(size)
+    else:
+        _seq = _parent = _root = _start = _dur = _name = None
+
+
+def enabled():
+    return _size > 0
+
+
+def _name_id(name):
+    index = _name_ids.get(name)
+    if index is None:
+        if len(_names) >= 255:
+            return 255  # Exported as '?'
+        index = len(_names)
+        _names.append(name)
+        _name_ids[name] = index
+    return index
+
+
+def _task():
+    try:
+        return uasyncio.current_task()
+    except RuntimeError:
+        return None  # No task running, e.g. at import
+
+
+def _slot(seq):
+    """Buffer slot of a span, None if it was overwritten."""
+    slot = seq % _size
+    return slot if _seq[slot] == seq else None
+
+
+def current():
+    """
+    Get the current span of the running task.
+
+    Returns:
+        int: Span sequence number, 0 if none
+    """
+    if not _size:
+        return 0
+    return _context.get(_task(), 0)
+
+
+def start(name, parent=None, at_us=None):
+    """
+    Open a span.
+
+    Args:
+        name (str): Span name, e.g. 'dns' or a provider label
+        parent (int, optional): Parent span, defaults to current(); 0
+            starts a new tree
+        at_us (int, optional): utime.ticks_us() it began at, for spans
+            opened after the fact
+
+    Returns:
+        int: Span sequence number for end(), 0 when tracing is off
+    """
+    global _next
+    if not _size:
+        return 0
+
+    if parent is None:
+        parent = _context.get(_task(), 0)
+    seq = _next
+    _next += 1
+
+    slot = seq % _size
+    _seq[slot] = seq
+    _parent[slot] = parent
+    _name[slot] = _name_id(name)
+    _start[slot] = utime.ticks_us() if at_us is None else at_us
+    _dur[slot] = 0
+
+    root = seq
+    if parent:
+        parent_slot = _slot(parent)
+        if parent_slot is not None:
+            root = _root[parent_slot]
+    _root[slot] = root
+    return seq
+
+
+def end(seq):
+    """
+    Close a span.
+
+    Args:
+        seq (int): Value returned by start()
+    """
+    if not seq or not _size:
+        return
+    slot = _slot(seq)
+    if slot is not None and not _dur[slot]:
+        _dur[slot] = utime.ticks_diff(utime.ticks_us(), _start[slot]) + 1
+
+
+def enter(seq):
+    """
+    Make a span the current one of the running task.
+
+    Args:
+        seq (int): Span to make current
+
+    Returns:
+        int: The previous current span, to pass to leave()
+    """
+    if not _size:
+        return 0
+    task = _task()
+    previous = _context.get(task, 0)
+    _context[task] = seq
+    return previous
+
+
+def leave(previous):
+    """
+    Restore the current span saved by enter().
+
+    Args:
+        previous (int): Value returned by enter()
+    """
+    if not _size:
+        return
+    task = _task()
+    if previous:
+        _context[task] = previous
+    else:
+        _context.pop(task, None)
+
+
+async def _adopt(coro, parent):
+    previous = enter(parent)
+    try:
+        return await coro
+    finally:
+        leave(previous)
+
+
+def carry(coro):
+    """
+    Wrap a coroutine so the task that runs it continues the current span.
+
+    Args:
+        coro: Coroutine about to be run as a new task
+
+    Returns:
+        The coroutine to schedule instead
+    """
+    parent = current()
+    if not parent:
+        return coro
+    return _adopt(coro, parent)
+
+
+def spans(since=0):
+    """
+    Iterate over the recorded spans, oldest first.
+
+    Args:
+        since (int): Skip spans up to this sequence number
+
+    Yields:
+        tuple: (seq, parent, root, name, offset_us, duration_us), offset
+            from the root's start, duration None while open
+    """
+    if not _size:
+        return
+    first = max(since + 1, _next - _size, 1)
+    for seq in range(first, _next):
+        slot = seq % _size
+        root_slot = _slot(_root[slot])
+        offset = 0
+        if root_slot is not None:
+            offset = utime.ticks_diff(_start[slot], _start[root_slot])
+        dur = _dur[slot] - 1 if _dur[slot] else None
+        name = _names[_name[slot]] if _name[slot] < len(_names) else '?'
+        yield seq, _parent[slot], _root[slot], name, offset, dur
+
+
+def write_jsonl(stream, since=0):
+    """
+    Write the spans as one JSON object per line.
+
+    Args:
+        stream: Writable text stream
+        since (int): Skip spans up to this sequence number
+
+    Returns:
+        int: Last sequence number written, pass it as since next time
+    """
+    last = since
+    for seq, parent, root, name, offset, dur in spans(since):
+        stream.write(ujson.dumps({
+            'seq': seq, 'parent': parent, 'root': root, 'name': name,
+            'start_us': offset, 'dur_us': dur
+        }) + '\n')
+        last = seq
+    return last
+
+
+def write_binary(stream, since=0, closed=False):
+    """
+    Write the spans as a compact binary dump.
+
+    The dump is MAGIC, VERSION, a name table (count, then length-prefixed
+    UTF-8 names) and a record count followed by RECORD structs. Dumps
+    can be appended to one file and read back one after another.
+
+    Args:
+        stream: Writable binary stream
+        since (int): Skip spans up to this sequence number
+        closed (bool): Stop at the first span still open, so a later
+            call writes it once it has ended
+
+    Returns:
+        int: Last sequence number written, pass it as since next time
+    """
+    records = []
+    last = since
+    for seq, parent, root, name, offset, dur in spans(since):
+        if closed and dur is None:
+            break
+        records.append(ustruct.pack(
+            RECORD, seq, parent, root, _name_ids.get(name, 255),
+            max(offset, 0), OPEN if dur is None else dur))
+        last = seq
+    if not records:
+        return last
+
+    stream.write(MAGIC + bytes((VERSION, len(_names))))
+    for name in _names:
+        encoded = name.encode()
+        stream.write(bytes((len(encoded),)) + encoded)
+    stream.write(ustruct.pack("<H", len(records)))
+    for record in records:
+        stream.write(record)
+    return last
+
+
+def save(path=None, max_bytes=None):
+    """
+    Append the spans ended since the last save to a file, as binary.
+    The file is renamed to <path>.1 once it grows past max_bytes, so
+    flash holds at most two files.
+
+    Args:
+        path (str, optional): Defaults to settings.TRACE_FILE, nothing
+            is saved if that is None
+        max_bytes (int, optional): Defaults to settings.TRACE_FILE_MAX_BYTES
+    """
+    global _saved
+    if path is None:
+        path = settings.TRACE_FILE
+    if max_bytes is None:
+        max_bytes = settings.TRACE_FILE_MAX_BYTES
+    if not _size or not path:
+        return
+
+    try:
+        if uos.stat(path)[6] >= max_bytes:
+            try:
+                uos.remove(path + '.1')
+            except OSError:
+                pass
+            uos.rename(path, path + '.1')
+    except OSError:
+        pass  # No file yet
+
+    with open(path, 'ab') as f:
+        _saved = write_binary(f, _saved, True)
+
+
+configure()
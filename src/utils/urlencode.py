@@ -0,0 +1,125 @@
+"""
+URL and form encoding with a precomputed table and a reusable buffer.
+"""
+
+_HEX = b"0123456789ABCDEF"
+_UNRESERVED = (b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+               b"0123456789-._~")
+
+
+def _build_table(space):
+    """
+    Build a 256-entry table mapping each byte to itself if it can be sent
+    as is, or to 0 if it must be percent-encoded.
+    """
+    table = bytearray(256)
+    for byte in _UNRESERVED:
+        table[byte] = byte
+    table[32] = space
+    return table
+
+
+# Query strings encode spaces as %20, form bodies as '+'
+QUERY_TABLE = _build_table(0)
+FORM_TABLE = _build_table(ord("+"))
+
+# Scratch space shared by the encoders below. They fill and copy
+# it without awaiting, so concurrent sends can not interleave in it.
+_scratch = bytearray(256)
+
+
+def _to_bytes(value):
+    if isinstance(value, (bytes, bytearray)):
+        return value
+    return str(value).encode()
+
+
+def _reserve(size):
+    """Get the scratch buffer, growing it once if it is too small."""
+    global _scratch
+    if len(_scratch) < size:
+        _scratch = bytearray((size + 63) & ~63)
+    return _scratch
+
+
+def encode_into(buf, pos, data, table=QUERY_TABLE):
+    """
+    Percent-encode bytes into a preallocated buffer.
+
+    Args:
+        buf (bytearray): Destination, with room for 3 bytes per input byte
+        pos (int): Offset in buf to start writing at
+        data (bytes): UTF-8 bytes to encode
+        table (bytearray): QUERY_TABLE or FORM_TABLE
+
+    Returns:
+        int: Offset just past the written bytes
+    """
+    for byte in data:
+        out = table[byte]
+        if out:
+            buf[pos] = out
+            pos += 1
+        else:
+            buf[pos] = 37  # '%'
+            buf[pos + 1] = _HEX[byte >> 4]
+            buf[pos + 2] = _HEX[byte & 15]
+            pos += 3
+    return pos
+
+
+def quote(value):
+    """
+    Encode a value for use in a URL query string.
+
+    Args:
+        value: str, bytes or any value convertible with str()
+
+    Returns:
+        str: The percent-encoded value
+    """
+    data = _to_bytes(value)
+    buf = _reserve(3 * len(data))
+    end = encode_into(buf, 0, data, QUERY_TABLE)
+    return str(memoryview(buf)[:end], "ascii")
+
+
+def quote_plus(value):
+    """
+    Encode a value for use in a form body, spaces become '+'.
+
+    Args:
+        value: str, bytes or any value convertible with str()
+
+    Returns:
+        str: The encoded value
+    """
+    data = _to_bytes(value)
+    buf = _reserve(3 * len(data))
+    end = encode_into(buf, 0, data, FORM_TABLE)
+    return str(memoryview(buf)[:end], "ascii")
+
+
+def form_encode(fields):
+    """
+    Encode fields as an application/x-www-form-urlencoded body.
+
+    Args:
+        fields (iterable): (name, value) pairs, in order
+
+    Returns:
+        bytes: The encoded body
+    """
+    pairs = [(_to_bytes(name), _to_bytes(value)) for name, value in fields]
+    buf = _reserve(sum(3 * (len(n) + len(v)) + 2 for n, v in pairs))
+
+    end = 0
+    for name, value in pairs:
+        if end:
+            buf[end] = 38  # '&'
+            end += 1
+        end = encode_into(buf, end, name, FORM_TABLE)
+        buf[end] = 61  # '='
+        end = encode_into(buf, end + 1, value, FORM_TABLE)
+
+    return bytes(memoryview(buf)[:end])
@@ -0,0 +1,105 @@
+"""
+Boot benchmark: time and heap to import and set up src/main.py.
+
+Only Telegram is enabled, and three loading strategies are compared:
+    eager_all  every provider module imported up front (the old main.py)
+    registry   only enabled providers imported, at boot
+    lazy       enabled providers imported on their first send
+
+Usage (from the repository root):
+    python3 tools/bench/bench_boot.py          # runs each mode in a fresh process
+    micropython tools/bench/bench_boot.py MODE # one mode, run once per mode
+"""
+import gc
+import sys
+
+import benchenv  # noqa: F401, must come before the firmware imports
+import ujson
+import utime
+
+# Built into the firmware on a device, so kept out of the measurement
+import machine  # noqa: F401
+import network  # noqa: F401
+import uasyncio  # noqa: F401
+import ubinascii  # noqa: F401
+import uos  # noqa: F401
+import urandom  # noqa: F401
+import usocket  # noqa: F401
+import ustruct  # noqa: F401
+
+MODES = ('eager_all', 'registry', 'lazy')
+
+
+def _heap_used():
+    gc.collect()
+    try:
+        return gc.mem_alloc()
+    except AttributeError:
+        import tracemalloc
+        return tracemalloc.get_traced_memory()[0]
+
+
+def measure(mode):
+    """
+    Import main.py the way a device boots, in this process.
+
+    Returns:
+        dict: Boot-to-ready time, heap in use and provider modules loaded
+    """
+    try:
+        import tracemalloc
+        tracemalloc.start()
+    except ImportError:
+        pass
+
+    before = _heap_used()
+    started = utime.ticks_us()
+
+    from config import settings
+    settings.SERIAL_LOGS = False
+    settings.OUTBOX_ENABLED = False
+    settings.PROVIDER_LAZY_IMPORT = mode == 'lazy'
+
+    if mode == 'eager_all':
+        from notifications.registry import PROVIDERS
+        for _, module_path, class_name in PROVIDERS:
+            __import__(module_path, None, None, (class_name,))
+
+    import main  # noqa: F401, builds every component at import
+
+    ready_us = utime.ticks_diff(utime.ticks_us(), started)
+    heap = _heap_used() - before
+
+    loaded = [name for name in sys.modules
+              if name.startswith('notifications.providers.')]
+    return {
+        'mode': mode,
+        'boot_to_ready_ms': ready_us / 1000,
+        'heap_bytes': heap,
+        'provider_modules': len(loaded),
+    }
+
+
+def run_all():
+    """Run every mode in its own interpreter so imports start cold."""
+    import subprocess
+
+    results = []
+    for mode in MODES:
+        output = subprocess.run([sys.executable, __file__, mode], check=True,
+                                capture_output=True, text=True).stdout
+        results.append(ujson.loads(output.strip().splitlines()[-1]))
+
+    print('{:>10} {:>16} {:>10} {:>17}'.format(
+        'mode', 'boot-to-ready ms', 'heap KB', 'provider modules'))
+    for result in results:
+        print('{:>10} {:>16.1f} {:>10.1f} {:>17}'.format(
+            result['mode'], result['boot_to_ready_ms'],
+            result['heap_bytes'] / 1024, result['provider_modules']))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        print(ujson.dumps(measure(sys.argv[1])))
+    else:
+        run_all()
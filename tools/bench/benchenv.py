@@ -0,0 +1,16 @@
+"""
+Puts the firmware sources and the stand-in modules on sys.path.
+Imported first by every benchmark script.
+"""
+import sys
+
+BENCH_DIR = __file__.rsplit('/', 1)[0] if '/' in __file__ else '.'
+SRC_DIR = BENCH_DIR + '/../../src'
+
+# Real MicroPython already has the u-modules, CPython gets stand-ins
+_paths = [BENCH_DIR + '/stubs', SRC_DIR, SRC_DIR + '/config']
+if sys.implementation.name != 'micropython':
+    _paths.insert(0, BENCH_DIR + '/stubs/cpython')
+for _path in reversed(_paths):
+    if _path not in sys.path:
+        sys.path.insert(1, _path)
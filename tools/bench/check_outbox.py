@@ -0,0 +1,92 @@
+"""
+Round-trip check of the flash outbox: write, reload, drain.
+
+Stores an entry for every provider in the registry, reopens the outbox
+from its files as a reboot would, then drains it through the notifier
+into stand-in providers. Every entry must reach its provider and
+recipient under the same name.
+
+Usage (from the repository root):
+    python3 tools/bench/check_outbox.py
+    micropython tools/bench/check_outbox.py
+"""
+import sys
+
+import benchenv  # noqa: F401, must come before the firmware imports
+import uasyncio
+import uos
+
+OUTBOX_DIR = '/tmp/doorbell-check-outbox'
+
+
+class StandInProvider:
+    """Records what it is sent, under a registry provider's name."""
+
+    PRIORITY = 0
+
+    def __init__(self, name):
+        self.name = name
+        self.received = []
+
+    def get_recipients(self):
+        return ['first', 'second']
+
+    def on_press(self, pressed_at):
+        pass
+
+    async def send_to(self, message, recipient=None):
+        self.received.append((recipient, message))
+
+
+def _clear():
+    try:
+        for name in uos.listdir(OUTBOX_DIR):
+            uos.remove(OUTBOX_DIR + '/' + name)
+    except OSError:
+        pass
+
+
+async def check():
+    from config import settings
+    settings.SERIAL_LOGS = False
+    settings.LED_ENABLED = False
+    settings.STATS_FILE = None
+    from notifications.notifier import Notifier
+    from notifications.outbox import Outbox
+    from notifications.registry import PROVIDERS
+
+    names = [class_name for _, _, class_name in PROVIDERS]
+    _clear()
+    outbox = Outbox(OUTBOX_DIR)
+    for seq, name in enumerate(names, 1):
+        outbox.add(name, 1, 'ring ' + name)
+
+    # A reboot: nothing but the files carries over
+    outbox = Outbox(OUTBOX_DIR, max_entries=len(names))
+    providers = [StandInProvider(name) for name in names]
+    notifier = Notifier(providers, outbox=outbox)
+    notifier.network.is_connected = lambda: True
+    delivered = await notifier.drain_outbox()
+
+    failures = []
+    for provider in providers:
+        expected = [('second', settings.OUTBOX_RESEND_MESSAGE.format(
+            message='ring ' + provider.name))]
+        if provider.received != expected:
+            failures.append(f'{provider.name}: got {provider.received}')
+    if len(outbox):
+        failures.append(f'{len(outbox)} entries left in the outbox')
+    return delivered, len(names), failures
+
+
+def main():
+    delivered, total, failures = uasyncio.run(check())
+    print(f'{delivered}/{total} delivered after reload')
+    for failure in failures:
+        print('  FAIL', failure)
+    _clear()
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""
+In-process MQTT 3.1.1 broker stand-in for the benchmarks.
+
+Accepts any client, acknowledges QoS 1 publishes and answers pings. It
+keeps every published message and the retained ones, and publishes a
+client's last will when its connection drops without a DISCONNECT.
+There are no subscriptions, the bench reads ``messages`` directly.
+"""
+import uasyncio
+import utime
+
+
+def _string(body, pos):
+    length = body[pos] << 8 | body[pos + 1]
+    return body[pos + 2:pos + 2 + length], pos + 2 + length
+
+
+class FakeBroker:
+    """Broker accepting connections on host:port."""
+
+    def __init__(self, host='127.0.0.1', port=18883):
+        self.host = host
+        self.port = port
+        self._server = None
+        self._writers = []
+        self.reset()
+
+    def reset(self, puback_ms=0):
+        """
+        Clear the recorded traffic between scenarios.
+
+        Args:
+            puback_ms (int): Delay before acknowledging a publish
+        """
+        self.puback_ms = puback_ms
+        self.messages = []  # (topic, payload, qos, retain, ticks_ms)
+        self.retained = {}
+        self.connections = 0
+        self.pings = 0
+
+    async def start(self):
+        self._server = await uasyncio.start_server(self._serve, self.host,
+                                                   self.port)
+
+    async def stop(self):
+        for writer in self._writers:
+            writer.close()
+        await uasyncio.sleep_ms(10)
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    def drop_clients(self):
+        """Close every client connection, as a broker restart would."""
+        for writer in self._writers:
+            writer.close()
+
+    def _publish(self, topic, payload, qos, retain):
+        self.messages.append((topic.decode(), payload, qos, retain,
+                              utime.ticks_ms()))
+        if retain:
+            self.retained[topic.decode()] = payload
+
+    async def _read_packet(self, reader):
+        kind = (await reader.readexactly(1))[0]
+        length = shift = 0
+        while True:
+            byte = (await reader.readexactly(1))[0]
+            length |= (byte & 0x7F) << shift
+            shift += 7
+            if not byte & 0x80:
+                break
+        body = await reader.readexactly(length) if length else b''
+        return kind, body
+
+    async def _serve(self, reader, writer):
+        self.connections += 1
+        self._writers.append(writer)
+        will = None
+        clean_exit = False
+
+        try:
+            kind, body = await self._read_packet(reader)
+            if kind != 0x10:
+                return
+            flags = body[7]
+            _, pos = _string(body, 10)  # Client id
+            if flags & 0x04:
+                topic, pos = _string(body, pos)
+                message, pos = _string(body, pos)
+                will = (topic, message, flags >> 3 & 3, bool(flags & 0x20))
+            writer.write(b'\x20\x02\x00\x00')
+            await writer.drain()
+
+            while True:
+                kind, body = await self._read_packet(reader)
+                packet = kind & 0xF0
+                if packet == 0x30:
+                    qos = kind >> 1 & 3
+                    topic, pos = _string(body, 0)
+                    packet_id = body[pos:pos + 2] if qos else None
+                    payload = body[pos + 2:] if qos else body[pos:]
+                    self._publish(topic, payload, qos, bool(kind & 1))
+                    if qos:
+                        if self.puback_ms:
+                            await uasyncio.sleep_ms(self.puback_ms)
+                        writer.write(b'\x40\x02' + packet_id)
+                        await writer.drain()
+                elif packet == 0xC0:
+                    self.pings += 1
+                    writer.write(b'\xd0\x00')
+                    await writer.drain()
+                elif packet == 0xE0:
+                    clean_exit = True
+                    return
+        except Exception:
+            pass
+        finally:
+            if will and not clean_exit:
+                self._publish(*will)
+            if writer in self._writers:
+                self._writers.remove(writer)
+            writer.close()
@@ -0,0 +1,176 @@
+"""
+Fake HTTP endpoint server for the benchmarks.
+
+Every provider request is routed here; the Host header tells which
+service it was meant for, so each service can be given its own latency,
+error rate and throttling.
+"""
+import random
+import uasyncio
+
+# Status a healthy endpoint answers with
+SUCCESS_STATUS = {
+    'discord.com': 204,
+    'api.twilio.com': 201,
+}
+
+REASONS = {
+    200: 'OK',
+    201: 'Created',
+    204: 'No Content',
+    429: 'Too Many Requests',
+    500: 'Internal Server Error',
+    503: 'Service Unavailable',
+}
+
+
+class Behavior:
+    """
+    How a simulated service answers.
+
+    Args:
+        latency_ms (int): Time before the response is written
+        jitter_ms (int): Random extra latency, uniform in [0, jitter_ms]
+        error_rate (float): Fraction of requests answered with error_status
+        error_status (int): Status used for injected errors
+        throttle_every (int): Every Nth request gets a 429, 0 disables
+        retry_after_s (int): Retry-After sent with 429 responses
+        close (bool): Close the connection after every response
+    """
+
+    def __init__(self, latency_ms=40, jitter_ms=20, error_rate=0.0,
+                 error_status=503, throttle_every=0, retry_after_s=1,
+                 close=False):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.throttle_every = throttle_every
+        self.retry_after_s = retry_after_s
+        self.close = close
+
+
+class FakeServer:
+    """Keep-alive HTTP/1.1 server answering with scripted behaviors."""
+
+    def __init__(self, host='127.0.0.1', port=18080):
+        self.host = host
+        self.port = port
+        self.default = Behavior()
+        self.behaviors = {}  # Host header -> Behavior
+        self._server = None
+        self._writers = []
+        self.reset()
+
+    def reset(self, seed=1):
+        """Clear counters and per-host behaviors between scenarios."""
+        random.seed(seed)  # Same injected errors on every run
+        self.behaviors = {}
+        self.default = Behavior()
+        self.requests = {}  # Host header -> count
+        self.connections = 0
+        self.errors = 0
+        self.throttled = 0
+
+    def configure(self, behaviors):
+        """
+        Set the behaviors for a scenario.
+
+        Args:
+            behaviors (dict): Host -> Behavior, '*' for the default
+        """
+        for host, behavior in behaviors.items():
+            if host == '*':
+                self.default = behavior
+            else:
+                self.behaviors[host] = behavior
+
+    async def start(self):
+        self._server = await uasyncio.start_server(self._serve, self.host,
+                                                   self.port)
+
+    async def stop(self):
+        for writer in self._writers:
+            writer.close()
+        await uasyncio.sleep_ms(10)  # Let the handlers see EOF and exit
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _read_body(self, reader, headers):
+        length = headers.get('content-length')
+        if length is not None:
+            if int(length):
+                await reader.readexactly(int(length))
+            return
+
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            while True:
+                size = int((await reader.readline()).split(b';')[0], 16)
+                await reader.readexactly(size + 2)
+                if not size:
+                    return
+
+    def _pick_status(self, host, behavior):
+        count = self.requests.get(host, 0) + 1
+        self.requests[host] = count
+
+        if behavior.throttle_every and count % behavior.throttle_every == 0:
+            self.throttled += 1
+            return 429
+        if behavior.error_rate and random.random() < behavior.error_rate:
+            self.errors += 1
+            return behavior.error_status
+        return SUCCESS_STATUS.get(host, 200)
+
+    async def _serve(self, reader, writer):
+        self.connections += 1
+        self._writers.append(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+
+                headers = {}
+                while True:
+                    header = await reader.readline()
+                    if not header or header == b'\r\n':
+                        break
+                    name, _, value = header.decode().partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                await self._read_body(reader, headers)
+
+                host = headers.get('host', '').split(':')[0]
+                behavior = self.behaviors.get(host, self.default)
+                delay = behavior.latency_ms
+                if behavior.jitter_ms:
+                    delay += int(random.random() * behavior.jitter_ms)
+                await uasyncio.sleep_ms(delay)
+
+                status = self._pick_status(host, behavior)
+                body = b'' if status == 204 else b'{"ok":true}'
+                close = (behavior.close or
+                         headers.get('connection', '').lower() == 'close')
+
+                head = 'HTTP/1.1 {} {}\r\nContent-Length: {}\r\n'.format(
+                    status, REASONS.get(status, 'Status'), len(body))
+                if status == 429:
+                    head += 'Retry-After: {}\r\n'.format(behavior.retry_after_s)
+                if close:
+                    head += 'Connection: close\r\n'
+                writer.write(head.encode() + b'\r\n' + body)
+                await writer.drain()
+
+                if close:
+                    break
+        except Exception:
+            pass  # Client went away mid-request
+        finally:
+            self._writers.remove(writer)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except Exception:
+                pass
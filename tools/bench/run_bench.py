@@ -0,0 +1,639 @@
+"""
+Host-side end-to-end benchmark for the doorbell firmware.
+
+Runs the real application modules from src/ against a simulated doorbell
+pin, a simulated WLAN and a local fake HTTP server standing in for every
+notification service, then reports press-to-first and press-to-all
+delivery latency percentiles, missed presses and peak heap per scenario.
+
+Usage (from the repository root):
+    python3 tools/bench/run_bench.py [scenario ...] [--json] [--trace=FILE]
+    micropython tools/bench/run_bench.py [scenario ...] [--json]
+
+With no scenario names every scenario runs. --json prints one JSON object
+per scenario instead of the table. --trace appends every press's spans
+to FILE, for tools/trace_stats.py.
+"""
+import gc
+import sys
+
+import benchenv  # noqa: F401, must come before the firmware imports
+import ujson
+import uos
+import uasyncio
+import utime
+import network
+import usocket
+import ustruct
+from fake_broker import FakeBroker
+from fake_server import Behavior, FakeServer
+
+# Top-level names of the application modules, reloaded per scenario
+APP_MODULES = ('main', 'config', 'core', 'notifications', 'utils',
+               'credentials', 'settings')
+
+OUTBOX_DIR = '/tmp/doorbell-bench-outbox'
+WIFI_CACHE_FILE = '/tmp/doorbell-bench-wifi.json'
+STATS_FILE = '/tmp/doorbell-bench-stats.json'
+
+# Settings applied to every scenario before the application is imported
+BASE_SETTINGS = {
+    'SERIAL_LOGS': False,
+    'LED_ENABLED': False,
+    'KEEP_WARM_LEVEL': 1,  # DNS refresh would hit the real resolver
+    'OUTBOX_DIR': OUTBOX_DIR,
+    'WIFI_CACHE_FILE': WIFI_CACHE_FILE,
+    'STATS_FILE': STATS_FILE,
+    'PROVIDER_TELEGRAM_ENABLED': True,
+    'PROVIDER_PUSHOVER_ENABLED': True,
+    'PROVIDER_DISCORD_ENABLED': True,
+    'PROVIDER_NODE_RED_ENABLED': True,
+}
+
+SCENARIOS = [
+    {
+        'name': 'healthy',
+        'presses': 8,
+        'interval_ms': 1500,
+    },
+    {
+        'name': 'wide_pool',
+        'presses': 8,
+        'interval_ms': 1500,
+        'settings': {'HTTP_POOL_MAX_CONNECTIONS': 8},
+    },
+    {
+        'name': 'slow_service',
+        'presses': 6,
+        'interval_ms': 1500,
+        'behaviors': {'api.telegram.org': Behavior(latency_ms=900)},
+    },
+    {
+        'name': 'slow_first',
+        'presses': 6,
+        'interval_ms': 4000,
+        'behaviors': {'api.telegram.org': Behavior(latency_ms=900)},
+        'settings': {'NOTIFY_CONCURRENT': False, 'PROVIDER_TIERS': {},
+                     'NOTIFY_LEARN_ORDER': False},
+    },
+    {
+        'name': 'slow_first_learned',
+        'presses': 6,
+        'interval_ms': 4000,
+        'behaviors': {'api.telegram.org': Behavior(latency_ms=900)},
+        'settings': {'NOTIFY_CONCURRENT': False, 'PROVIDER_TIERS': {}},
+    },
+    {
+        'name': 'flaky_5xx',
+        'presses': 6,
+        'interval_ms': 1500,
+        'behaviors': {'*': Behavior(error_rate=0.3)},
+    },
+    {
+        'name': 'throttled',
+        'presses': 6,
+        'interval_ms': 1500,
+        'behaviors': {'api.pushover.net': Behavior(throttle_every=2,
+                                                   retry_after_s=1)},
+    },
+    {
+        'name': 'burst',
+        'presses': 20,
+        'interval_ms': 120,
+        'hold_ms': 60,
+        'bounces': 3,
+        'settings': {'PRESS_COALESCE_WINDOW_MS': 0},
+    },
+    {
+        'name': 'low_heap',
+        'presses': 6,
+        'interval_ms': 1500,
+        'heap_bytes': 80000,
+        'settings': {'HTTP_POOL_MAX_CONNECTIONS': 4},
+    },
+    {
+        'name': 'wifi_blip',
+        'presses': 6,
+        'interval_ms': 3000,
+        'drop_link': True,
+        'association_ms': 2500,
+        'directed_association_ms': 600,
+        'scan_ms': 1500,
+    },
+    {
+        'name': 'wifi_blip_scan',
+        'presses': 6,
+        'interval_ms': 3000,
+        'drop_link': True,
+        'association_ms': 2500,
+        'directed_association_ms': 600,
+        'scan_ms': 1500,
+        'settings': {'WIFI_FAST_RECONNECT': False},
+    },
+    {
+        'name': 'wifi_blip_no_bssid',
+        'presses': 6,
+        'interval_ms': 3000,
+        'drop_link': True,
+        'association_ms': 2500,
+        'directed_association_ms': 600,
+        'scan_ms': 1500,
+        'reports_bssid': False,
+        'settings': {'KEEP_WARM_INTERVAL_S': 1},
+    },
+    {
+        'name': 'mqtt',
+        'presses': 8,
+        'interval_ms': 1500,
+        'settings': {'PROVIDER_MQTT_ENABLED': True},
+    },
+    {
+        'name': 'udp',
+        'presses': 8,
+        'interval_ms': 1500,
+        'settings': {'PROVIDER_UDP_ENABLED': True},
+    },
+    {
+        'name': 'scraped',
+        'presses': 8,
+        'interval_ms': 1500,
+        'scrape_interval_ms': 50,
+        'settings': {'STATUS_SERVER_ENABLED': True,
+                     'STATUS_SERVER_HOST': '127.0.0.1',
+                     'STATUS_SERVER_PORT': 18081},
+    },
+    {
+        'name': 'cold_wifi',
+        'presses': 3,
+        'interval_ms': 2000,
+        'cold': True,
+        'association_ms': 1200,
+        'behaviors': {'*': Behavior(close=True)},
+    },
+]
+
+# Local broker for the MQTT provider, in every scenario that enables it
+MQTT_CONFIG = {
+    'host': '127.0.0.1', 'port': 18883, 'username': None, 'password': None,
+    'client_id': 'doorbell-bench', 'topic': 'doorbell/ring', 'qos': 1,
+    'retain': False, 'status_topic': 'doorbell/status',
+    'online_message': 'online', 'offline_message': 'offline',
+    'keepalive_s': 60, 'clean_session': True, 'timeout_ms': 5000,
+}
+BASE_SETTINGS['MQTT_CONFIG'] = MQTT_CONFIG
+
+# Unicast to the bench's own listener, a host without multicast routes works
+UDP_CONFIG = {
+    'address': '127.0.0.1', 'port': 18884, 'ttl': 1, 'retransmits': 2,
+    'retransmit_interval_ms': 20, 'max_text_bytes': 200,
+    'hmac_key': 'bench-key',
+}
+BASE_SETTINGS['UDP_CONFIG'] = UDP_CONFIG
+
+# Time allowed for deliveries to finish after the last press
+SETTLE_TIMEOUT_MS = 30000
+
+# Heap held by each open TLS socket in the simulated heap
+TLS_SOCKET_BYTES = 40000
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list, None if empty."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = int(fraction * len(ordered) + 0.5) - 1
+    return ordered[min(max(index, 0), len(ordered) - 1)]
+
+
+class HeapMeter:
+    """
+    Peak heap use during a scenario.
+    Uses tracemalloc on CPython and samples gc.mem_alloc() on MicroPython.
+    Both include the fake server, so compare runs rather than reading the
+    numbers as device figures.
+    """
+
+    SAMPLE_INTERVAL_MS = 5
+
+    def __init__(self):
+        try:
+            import tracemalloc
+            self._tracemalloc = tracemalloc
+        except ImportError:
+            self._tracemalloc = None
+        self._task = None
+        self._base = 0
+        self.peak = 0
+
+    async def _sample(self):
+        while True:
+            used = gc.mem_alloc()
+            if used > self.peak:
+                self.peak = used
+            await uasyncio.sleep_ms(self.SAMPLE_INTERVAL_MS)
+
+    def start(self):
+        gc.collect()
+        if self._tracemalloc:
+            self._tracemalloc.start()
+            self._base = self._tracemalloc.get_traced_memory()[0]
+        else:
+            self._base = gc.mem_alloc()
+            self.peak = self._base
+            self._task = uasyncio.create_task(self._sample())
+
+    def stop(self):
+        """
+        Stop measuring.
+
+        Returns:
+            int: Peak bytes allocated above the level at start()
+        """
+        if self._tracemalloc:
+            self.peak = self._tracemalloc.get_traced_memory()[1]
+            self._tracemalloc.stop()
+        elif self._task:
+            self._task.cancel()
+        return self.peak - self._base
+
+
+def _unload_app():
+    """Forget the application modules so the next import starts fresh."""
+    for name in list(sys.modules):
+        if name.split('.')[0] in APP_MODULES:
+            del sys.modules[name]
+
+
+def _clear_outbox():
+    try:
+        for name in uos.listdir(OUTBOX_DIR):
+            uos.remove(OUTBOX_DIR + '/' + name)
+    except OSError:
+        pass
+
+
+def _route_connections(server, tls_handshake_ms):
+    """
+    Send every pooled connection to the fake server over plain TCP.
+    The Host header still names the real service, so the server can
+    apply that service's behavior. TLS is replaced by a fixed delay.
+    """
+    from core.connection_pool import ConnectionPool
+    from utils import trace
+
+    async def _open(scheme):
+        reader, writer = await uasyncio.open_connection(server.host,
+                                                        server.port)
+        if scheme == 'https' and tls_handshake_ms:
+            await uasyncio.sleep_ms(tls_handshake_ms)
+        return reader, writer
+
+    async def _connect(pool, scheme, host, port, timeout_ms):
+        span = trace.start('tls_connect' if scheme == 'https' else 'connect')
+        try:
+            return await uasyncio.wait_for_ms(_open(scheme), timeout_ms)
+        finally:
+            trace.end(span)
+
+    ConnectionPool._connect = _connect
+
+
+def _simulate_heap(heap_bytes):
+    """
+    Give CPython the gc.mem_free()/gc.mem_alloc() of a device heap.
+    Only the open sockets use it, TLS_SOCKET_BYTES each, so scenarios
+    can run the heap budget into the ground. Returns an undo function.
+    """
+    if hasattr(gc, 'mem_free'):
+        return lambda: None  # MicroPython, measure the real heap
+
+    from core import http_client
+
+    def mem_alloc():
+        return TLS_SOCKET_BYTES * http_client.pool._open
+
+    def mem_free():
+        return heap_bytes - mem_alloc()
+
+    gc.mem_alloc = mem_alloc
+    gc.mem_free = mem_free
+
+    def undo():
+        del gc.mem_alloc
+        del gc.mem_free
+    return undo
+
+
+def _load_app(scenario, server):
+    """Import the application with the scenario's settings applied."""
+    _unload_app()
+    _clear_outbox()
+    for path in (WIFI_CACHE_FILE, STATS_FILE):
+        try:
+            uos.remove(path)
+        except OSError:
+            pass
+
+    from config import settings
+    for name, value in BASE_SETTINGS.items():
+        setattr(settings, name, value)
+    for name, value in scenario.get('settings', {}).items():
+        setattr(settings, name, value)
+
+    network.WLAN.association_ms = scenario.get('association_ms', 300)
+    network.WLAN.directed_association_ms = scenario.get(
+        'directed_association_ms')
+    network.WLAN.scan_ms = scenario.get('scan_ms', 0)
+    network.WLAN.reports_bssid = scenario.get('reports_bssid', True)
+    network.WLAN.ap_available = True
+    network.WLAN.ap_ssid = settings.WIFI_SSID.encode()
+    _route_connections(server, scenario.get('tls_handshake_ms', 150))
+
+    undo = None
+    if scenario.get('heap_bytes'):
+        undo = _simulate_heap(scenario['heap_bytes'])
+
+    import main
+    return main, undo
+
+
+async def _press(pin, hold_ms, bounces):
+    """Simulate a press with contact bounce on press and release."""
+    for _ in range(bounces):
+        pin.drive(0)
+        await uasyncio.sleep_ms(1)
+        pin.drive(1)
+        await uasyncio.sleep_ms(1)
+    pin.drive(0)
+    await uasyncio.sleep_ms(hold_ms)
+    for _ in range(bounces):
+        pin.drive(1)
+        await uasyncio.sleep_ms(1)
+        pin.drive(0)
+        await uasyncio.sleep_ms(1)
+    pin.drive(1)
+
+
+async def _scrape(port, interval_ms, result):
+    """Fetch /metrics from the status server in a loop."""
+    while True:
+        await uasyncio.sleep_ms(interval_ms)
+        try:
+            reader, writer = await uasyncio.open_connection('127.0.0.1', port)
+            writer.write(b'GET /metrics HTTP/1.0\r\n\r\n')
+            await writer.drain()
+            body = await reader.read(-1)
+            writer.close()
+            await writer.wait_closed()
+        except OSError:
+            continue
+        if body.startswith(b'HTTP/1.0 200'):
+            result['scrapes'] += 1
+
+
+async def _listen_udp(port, arrivals):
+    """Record the arrival of every new press datagram."""
+    sock = usocket.socket(usocket.AF_INET, usocket.SOCK_DGRAM)
+    sock.bind(('127.0.0.1', port))
+    sock.setblocking(False)
+    seen = set()
+    try:
+        while True:
+            try:
+                data = sock.recv(512)
+            except OSError:
+                await uasyncio.sleep_ms(1)
+                continue
+            _, _, kind, _, boot_id, seq = ustruct.unpack_from('<2sBBBII', data)
+            if kind == 1 and (boot_id, seq) not in seen:
+                seen.add((boot_id, seq))
+                arrivals.append(utime.ticks_ms())
+    finally:
+        sock.close()
+
+
+async def run_scenario(scenario, server, broker):
+    """
+    Run one scenario end to end.
+
+    Returns:
+        dict: Measured results
+    """
+    server.reset()
+    broker.reset()
+    server.configure(scenario.get('behaviors', {}))
+    app, undo_heap = _load_app(scenario, server)
+
+    first_ms = []
+    all_ms = []
+    provider_ms = {}
+    result = {'notifications': 0, 'rings': 0, 'failed_jobs': 0,
+              'scrapes': 0}
+    in_flight = [0]
+
+    notify = app.notifier.notify
+
+    async def recording_notify(message, pressed_at=None):
+        in_flight[0] += 1
+        try:
+            stats = await notify(message, pressed_at)
+        finally:
+            in_flight[0] -= 1
+        result['notifications'] += 1
+        if stats['first_delivery_ms'] is not None:
+            first_ms.append(stats['first_delivery_ms'])
+        for label, (ms, success) in stats['completions'].items():
+            if success:
+                provider_ms.setdefault(label, []).append(ms)
+        if stats['completions'] and not stats['failed']:
+            all_ms.append(max(ms for ms, _ in stats['completions'].values()))
+        result['failed_jobs'] += len(stats['failed'])
+        return stats
+
+    app.notifier.notify = recording_notify
+
+    wifi_ms = []
+    connect = app.notifier.network.connect
+
+    async def timed_connect():
+        was_connected = app.notifier.network.is_connected()
+        connected = await connect()
+        if connected and not was_connected:
+            wifi_ms.append(app.notifier.network.last_connect_ms)
+        return connected
+
+    app.notifier.network.connect = timed_connect
+
+    queue_get = app.press_queue.get
+
+    async def counting_get():
+        pressed_at, count = await queue_get()
+        result['rings'] += count
+        return pressed_at, count
+
+    app.press_queue.get = counting_get
+
+    detected_at = []
+    on_press = app.notifier.on_press
+
+    def recording_on_press(pressed_at):
+        detected_at.append(pressed_at)
+        on_press(pressed_at)
+
+    app.notifier.on_press = recording_on_press
+
+    if not scenario.get('cold'):
+        await app.notifier.network.connect()
+
+    meter = HeapMeter()
+    meter.start()
+    tasks = [
+        uasyncio.create_task(app.supervisor.run()),
+        uasyncio.create_task(app.monitor_doorbell()),
+        uasyncio.create_task(app.deliver_presses()),
+    ]
+    if app.status_server is not None:
+        tasks.append(uasyncio.create_task(app.status_server.run()))
+        tasks.append(uasyncio.create_task(_scrape(
+            app.status_server.port, scenario['scrape_interval_ms'], result)))
+    udp_arrivals = []
+    if scenario.get('settings', {}).get('PROVIDER_UDP_ENABLED'):
+        tasks.append(uasyncio.create_task(
+            _listen_udp(UDP_CONFIG['port'], udp_arrivals)))
+
+    presses = scenario['presses']
+    for index in range(presses):
+        if scenario.get('drop_link') and index:
+            app.notifier.network.wlan.drop_link()
+        await _press(app.doorbell_pin, scenario.get('hold_ms', 80),
+                     scenario.get('bounces', 2))
+        await uasyncio.sleep_ms(scenario['interval_ms'])
+
+    started = utime.ticks_ms()
+    while len(app.press_queue) or in_flight[0]:
+        if utime.ticks_diff(utime.ticks_ms(), started) > SETTLE_TIMEOUT_MS:
+            break
+        await uasyncio.sleep_ms(50)
+
+    heap_peak = meter.stop()
+    for task in tasks:
+        task.cancel()
+    await uasyncio.sleep_ms(0)
+    app.supervisor.stop()
+    for provider in app.providers:
+        if provider.name == 'MQTTProvider':
+            await provider.client.disconnect()
+
+    from core import http_client
+    pool = http_client.pool.stats()
+    http_client.pool.close_all()
+    heap = app.notifier.heap
+    if undo_heap:
+        undo_heap()
+
+    result.update({
+        'name': scenario['name'],
+        'presses': presses,
+        'detected': app.doorbell.presses,
+        'missed': presses - app.doorbell.presses,
+        'dropped': app.press_queue.dropped,
+        'first_p50': percentile(first_ms, 0.5),
+        'first_p95': percentile(first_ms, 0.95),
+        'first_max': percentile(first_ms, 1.0),
+        'all_p50': percentile(all_ms, 0.5),
+        'all_p95': percentile(all_ms, 0.95),
+        'all_max': percentile(all_ms, 1.0),
+        'heap_peak': heap_peak,
+        'requests': sum(server.requests.values()),
+        'connections': server.connections,
+        'injected_errors': server.errors + server.throttled,
+        'pool_hits': pool['hits'],
+        'pool_misses': pool['misses'],
+        'heap_low_headroom': heap.low_headroom,
+        'heap_shed': heap.shed,
+        'provider_p50': {label: percentile(values, 0.5)
+                         for label, values in provider_ms.items()},
+        'mqtt_published': sum(1 for m in broker.messages
+                              if m[0] == MQTT_CONFIG['topic']),
+        'udp_p50': percentile([utime.ticks_diff(arrived, pressed)
+                               for pressed, arrived
+                               in zip(detected_at, udp_arrivals)], 0.5),
+        'wifi_p50': percentile(wifi_ms, 0.5),
+        'wifi_max': percentile(wifi_ms, 1.0),
+    })
+    return result
+
+
+def _fmt(value):
+    return '-' if value is None else str(value)
+
+
+def print_table(results):
+    columns = (
+        ('scenario', 'name'), ('press', 'presses'), ('miss', 'missed'),
+        ('drop', 'dropped'), ('notif', 'notifications'),
+        ('first p50', 'first_p50'), ('p95', 'first_p95'),
+        ('all p50', 'all_p50'), ('p95', 'all_p95'), ('max', 'all_max'),
+        ('fail', 'failed_jobs'), ('req', 'requests'),
+        ('conn', 'connections'), ('shed', 'heap_shed'),
+        ('wifi p50', 'wifi_p50'), ('mqtt p50', 'mqtt_p50'),
+        ('udp p50', 'udp_p50'),
+        ('scrape', 'scrapes'),
+        ('heap KB', 'heap_peak'),
+    )
+    rows = [[title for title, _ in columns]]
+    for result in results:
+        row = []
+        for _, key in columns:
+            if key == 'mqtt_p50':
+                value = result['provider_p50'].get('MQTTProvider')
+            else:
+                value = result[key]
+            if key == 'heap_peak':
+                value = '{:.1f}'.format(value / 1024)
+            row.append(_fmt(value))
+        rows.append(row)
+
+    widths = [max(len(row[i]) for row in rows) for i in range(len(columns))]
+    for row in rows:
+        print('  '.join(cell.rjust(widths[i]) for i, cell in enumerate(row)))
+    print('Latencies in ms from the press edge; "all" counts only '
+          'notifications where every recipient succeeded.')
+
+
+async def main(names, as_json):
+    scenarios = [s for s in SCENARIOS if not names or s['name'] in names]
+    server = FakeServer()
+    await server.start()
+    broker = FakeBroker()
+    await broker.start()
+
+    results = []
+    try:
+        for scenario in scenarios:
+            if not as_json:
+                print('Running', scenario['name'], '...')
+            results.append(await run_scenario(scenario, server, broker))
+    finally:
+        await server.stop()
+        await broker.stop()
+
+    if as_json:
+        for result in results:
+            print(ujson.dumps(result))
+    else:
+        print_table(results)
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    for arg in args:
+        if arg.startswith('--trace='):
+            BASE_SETTINGS['TRACE_FILE'] = arg[len('--trace='):]
+            try:
+                uos.remove(BASE_SETTINGS['TRACE_FILE'])
+            except OSError:
+                pass
+    uasyncio.run(main([a for a in args if not a.startswith('--')],
+                      '--json' in args))
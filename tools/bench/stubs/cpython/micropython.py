@@ -0,0 +1,15 @@
+"""
+micropython stand-in for CPython.
+"""
+
+
+def const(value):
+    return value
+
+
+def alloc_emergency_exception_buf(size):
+    pass
+
+
+def schedule(func, arg):
+    func(arg)
@@ -0,0 +1,40 @@
+"""
+uasyncio stand-in for CPython, adding the MicroPython-only helpers.
+"""
+from asyncio import *  # noqa: F401,F403
+import asyncio as _asyncio
+
+
+async def sleep_ms(ms):
+    await _asyncio.sleep(ms / 1000)
+
+
+async def wait_for_ms(aw, timeout_ms):
+    return await _asyncio.wait_for(aw, timeout_ms / 1000)
+
+
+async def _readinto(self, buf):
+    data = await self.read(len(buf))
+    buf[:len(data)] = data
+    return len(data)
+
+
+# MicroPython streams read into a caller's buffer
+_asyncio.StreamReader.readinto = _readinto
+
+
+class ThreadSafeFlag:
+    """Event that clears itself when a waiter wakes up."""
+
+    def __init__(self):
+        self._event = _asyncio.Event()
+
+    def set(self):
+        self._event.set()
+
+    def clear(self):
+        self._event.clear()
+
+    async def wait(self):
+        await self._event.wait()
+        self._event.clear()
@@ -0,0 +1,4 @@
+"""
+ubinascii stand-in for CPython.
+"""
+from binascii import *  # noqa: F401,F403
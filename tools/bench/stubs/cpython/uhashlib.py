@@ -0,0 +1,4 @@
+"""
+uhashlib stand-in for CPython.
+"""
+from hashlib import *  # noqa: F401,F403
@@ -0,0 +1,4 @@
+"""
+ujson stand-in for CPython.
+"""
+from json import *  # noqa: F401,F403
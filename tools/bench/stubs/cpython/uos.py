@@ -0,0 +1,4 @@
+"""
+uos stand-in for CPython.
+"""
+from os import *  # noqa: F401,F403
@@ -0,0 +1,4 @@
+"""
+urandom stand-in for CPython.
+"""
+from random import *  # noqa: F401,F403
@@ -0,0 +1,4 @@
+"""
+uselect stand-in for CPython.
+"""
+from select import *  # noqa: F401,F403
@@ -0,0 +1,4 @@
+"""
+usocket stand-in for CPython.
+"""
+from socket import *  # noqa: F401,F403
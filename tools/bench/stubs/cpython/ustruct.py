@@ -0,0 +1,4 @@
+"""
+ustruct stand-in for CPython.
+"""
+from struct import *  # noqa: F401,F403
@@ -0,0 +1,45 @@
+"""
+utime stand-in for CPython with MicroPython's wrapping tick counters.
+"""
+import time as _time
+
+_TICKS_PERIOD = 1 << 30
+_TICKS_MAX = _TICKS_PERIOD - 1
+_TICKS_HALFPERIOD = _TICKS_PERIOD // 2
+
+
+def ticks_ms():
+    return int(_time.monotonic() * 1000) & _TICKS_MAX
+
+
+def ticks_us():
+    return int(_time.monotonic() * 1000000) & _TICKS_MAX
+
+
+def ticks_add(ticks, delta):
+    return (ticks + delta) & _TICKS_MAX
+
+
+def ticks_diff(ticks1, ticks2):
+    diff = (ticks1 - ticks2 + _TICKS_HALFPERIOD) & _TICKS_MAX
+    return diff - _TICKS_HALFPERIOD
+
+
+def sleep_ms(ms):
+    _time.sleep(ms / 1000)
+
+
+def sleep_us(us):
+    _time.sleep(us / 1000000)
+
+
+def sleep(seconds):
+    _time.sleep(seconds)
+
+
+def time():
+    return int(_time.time())
+
+
+def localtime(secs=None):
+    return _time.localtime(secs)[:8]
@@ -0,0 +1,64 @@
+"""
+Stand-in for the MicroPython machine module used by the benchmarks.
+"""
+
+
+class Pin:
+    """
+    Simulated GPIO pin.
+    The benchmark drives input pins with drive(), which fires the
+    registered IRQ handler on matching edges like the real hardware.
+    """
+
+    IN = 0
+    OUT = 1
+    OPEN_DRAIN = 2
+    PULL_UP = 1
+    PULL_DOWN = 2
+    IRQ_FALLING = 4
+    IRQ_RISING = 8
+
+    def __init__(self, id, mode=-1, pull=-1, value=None):
+        self.id = id
+        self.mode = mode
+        if value is not None:
+            self._value = value
+        else:
+            self._value = 1 if pull == self.PULL_UP else 0
+        self._handler = None
+        self._trigger = 0
+
+    def value(self, value=None):
+        if value is None:
+            return self._value
+        self._value = 1 if value else 0
+
+    def on(self):
+        self._value = 1
+
+    def off(self):
+        self._value = 0
+
+    def toggle(self):
+        self._value ^= 1
+
+    def irq(self, handler=None, trigger=IRQ_FALLING | IRQ_RISING, hard=False):
+        self._handler = handler
+        self._trigger = trigger
+
+    def drive(self, level):
+        """
+        Set the level seen on an input pin, firing the IRQ on an edge.
+
+        Args:
+            level (int): 0 or 1
+        """
+        previous = self._value
+        self._value = level
+
+        if not self._handler or previous == level:
+            return
+        if level == 0 and self._trigger & self.IRQ_FALLING:
+            self._handler(self)
+        elif level == 1 and self._trigger & self.IRQ_RISING:
+            self._handler(self)
@@ -0,0 +1,135 @@
+"""
+Stand-in for the MicroPython network module used by the benchmarks.
+"""
+import utime
+
+STA_IF = 0
+AP_IF = 1
+
+STAT_IDLE = 0
+STAT_CONNECTING = 1
+STAT_WRONG_PASSWORD = -3
+STAT_NO_AP_FOUND = -2
+STAT_CONNECT_FAIL = -1
+STAT_GOT_IP = 3
+
+
+class WLAN:
+    """
+    Simulated station interface.
+    Association completes ``association_ms`` after connect(), or
+    ``directed_association_ms`` when given the access point's BSSID,
+    unless the access point is made unavailable with ``ap_available``.
+    scan() blocks for ``scan_ms``, as the radio's scan does.
+    """
+
+    PM_NONE = 0x10
+    PM_PERFORMANCE = 0xA11142
+    PM_POWERSAVE = 0xA11C82
+
+    # Address handed out by DHCP
+    LEASE = ('192.168.1.50', '255.255.255.0', '192.168.1.1', '192.168.1.1')
+
+    # Simulation knobs, shared by every instance
+    association_ms = 300
+    directed_association_ms = None  # None: same as association_ms
+    scan_ms = 0
+    ap_available = True
+    ap_ssid = b'bench'
+    ap_bssid = b'\x00\x11\x22\x33\x44\x55'
+    reports_bssid = True  # False: config('bssid') fails, as on cyw43
+    reconnects = 0
+
+    def __init__(self, interface=STA_IF):
+        self._active = False
+        self._connected = False
+        self._connect_started = None
+        self._config = {
+            'mac': b'\x28\xcd\xc1\x00\x00\x01',
+            'channel': 6,
+            'ssid': '',
+            'pm': self.PM_POWERSAVE
+        }
+        self._ifconfig = self.LEASE
+
+    def active(self, state=None):
+        if state is None:
+            return self._active
+        if state and not self._active:
+            self._ifconfig = self.LEASE  # Brought up again with DHCP
+        self._active = bool(state)
+        if not state:
+            self._connected = False
+            self._connect_started = None
+        self._association_ms = WLAN.association_ms
+        self._wrong_bssid = False
+
+    def connect(self, ssid=None, key=None, bssid=None):
+        self._config['ssid'] = ssid
+        self._connected = False
+        self._connect_started = utime.ticks_ms()
+        self._association_ms = WLAN.association_ms
+        self._wrong_bssid = bssid is not None and bssid != WLAN.ap_bssid
+        if bssid is not None and WLAN.directed_association_ms is not None:
+            self._association_ms = WLAN.directed_association_ms
+        WLAN.reconnects += 1
+
+    def disconnect(self):
+        self._connected = False
+        self._connect_started = None
+
+    def drop_link(self):
+        """Simulate the access point going away."""
+        self._connected = False
+        self._connect_started = None
+
+    def _update(self):
+        if self._connected or self._connect_started is None:
+            return
+        if not WLAN.ap_available or self._wrong_bssid:
+            return
+        elapsed = utime.ticks_diff(utime.ticks_ms(), self._connect_started)
+        if elapsed >= self._association_ms:
+            self._connected = True
+
+    def isconnected(self):
+        self._update()
+        return self._connected
+
+    def status(self, param=None):
+        if param == 'rssi':
+            return -58
+        self._update()
+        if self._connected:
+            return STAT_GOT_IP
+        if self._connect_started is not None:
+            if WLAN.ap_available and not self._wrong_bssid:
+                return STAT_CONNECTING
+            return STAT_NO_AP_FOUND
+        return STAT_IDLE
+
+    def ifconfig(self, config=None):
+        if config is None:
+            return self._ifconfig
+        if not isinstance(config, tuple):
+            raise TypeError('ifconfig() takes a 4-tuple')  # As on cyw43
+        self._ifconfig = config
+
+    def ipconfig(self, dhcp4=None):
+        if dhcp4:
+            self._ifconfig = self.LEASE
+
+    def config(self, *args, **kwargs):
+        if args:
+            if args[0] == 'bssid' and WLAN.reports_bssid:
+                return WLAN.ap_bssid if self.isconnected() else None
+            if args[0] not in self._config:
+                raise ValueError('unknown config param')  # e.g. 'bssid'
+            return self._config[args[0]]
+        self._config.update(kwargs)
+
+    def scan(self):
+        utime.sleep_ms(WLAN.scan_ms)
+        if not WLAN.ap_available:
+            return []
+        return [(WLAN.ap_ssid, WLAN.ap_bssid, 6, -58, 3, False)]
@@ -0,0 +1,94 @@
+"""
+Compare import time and free memory on a Pico W for each build format.
+
+For every format the firmware is built with tools/build.py, the app files
+on the board are replaced with the build output over mpremote, and
+tools/boot_probe.py is run after a soft reset.
+
+The frozen format only deploys the filesystem part (main.py and config/):
+flash a firmware image built from build/frozen/manifest.py before running
+it, otherwise the probe reports the modules as missing.
+
+Usage (from the repository root, board connected over USB):
+    python3 tools/boot_compare.py
+    python3 tools/boot_compare.py --formats source mpy --device /dev/ttyACM0
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROBE = os.path.join(ROOT, 'tools', 'boot_probe.py')
+
+# What the build deploys, removed before every upload so stale .py and
+# .mpy files of another format can not shadow the new ones
+APP_PATHS = ('core', 'notifications', 'utils', 'config', 'main.py')
+
+FORMATS = ('source', 'mpy', 'frozen')
+
+
+def mpremote(device, *command, check=True):
+    connect = ('connect', device) if device else ()
+    return subprocess.run(('mpremote',) + connect + command, check=check,
+                          capture_output=True, text=True).stdout
+
+
+def deploy(device, fmt, build_args):
+    subprocess.run([sys.executable, os.path.join(ROOT, 'tools', 'build.py'),
+                    '--format', fmt] + build_args, check=True)
+
+    for path in APP_PATHS:
+        mpremote(device, 'rm', '-r', ':' + path, check=False)
+
+    out_dir = os.path.join(ROOT, 'build', fmt)
+    for name in sorted(os.listdir(out_dir)):
+        if name == 'manifest.py':
+            continue
+        mpremote(device, 'cp', '-r', os.path.join(out_dir, name), ':')
+
+
+def probe(device):
+    """Soft-reset the board and run the probe, returning its JSON line."""
+    output = mpremote(device, 'soft-reset', 'run', PROBE)
+    for line in reversed(output.strip().splitlines()):
+        if line.startswith('{'):
+            return json.loads(line)
+    raise RuntimeError(f'No result from the probe:\n{output}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--formats', nargs='+', choices=FORMATS,
+                        default=FORMATS)
+    parser.add_argument('--device', help='serial port, auto-detected if unset')
+    parser.add_argument('--runs', type=int, default=3,
+                        help='probe runs per format, the median is reported')
+    parser.add_argument('--opt', default='0', help='passed to build.py')
+    args = parser.parse_args()
+
+    rows = []
+    for fmt in args.formats:
+        if fmt == 'frozen':
+            print('frozen: expects firmware built from '
+                  'build/frozen/manifest.py to be flashed already')
+        deploy(args.device, fmt, ['--opt', args.opt])
+
+        results = sorted((probe(args.device) for _ in range(args.runs)),
+                         key=lambda result: result['import_ms'])
+        median = results[len(results) // 2]
+        rows.append((fmt, median))
+
+    print('{:>8} {:>10} {:>14} {:>13} {:>10}'.format(
+        'format', 'import ms', 'free before KB', 'free after KB',
+        'used KB'))
+    for fmt, result in rows:
+        print('{:>8} {:>10} {:>14.1f} {:>13.1f} {:>10.1f}'.format(
+            fmt, result['import_ms'], result['free_before'] / 1024,
+            result['free_after'] / 1024,
+            (result['free_before'] - result['free_after']) / 1024))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,33 @@
+"""
+Runs on the Pico W: import time and free memory of the deployed firmware.
+
+Serial logs and the outbox are turned off so the figures are the imports
+and setup alone, then main.py is imported like at boot and one JSON line
+is printed for tools/boot_compare.py.
+
+Usage:
+    mpremote run tools/boot_probe.py
+"""
+import gc
+
+import ujson
+import utime
+
+gc.collect()
+free_before = gc.mem_free()
+started = utime.ticks_ms()
+
+from config import settings  # noqa: E402
+settings.SERIAL_LOGS = False
+settings.OUTBOX_ENABLED = False
+
+import main  # noqa: E402, F401, builds every component at import
+
+import_ms = utime.ticks_diff(utime.ticks_ms(), started)
+gc.collect()
+
+print(ujson.dumps({
+    'import_ms': import_ms,
+    'free_before': free_before,
+    'free_after': gc.mem_free(),
+}))
@@ -0,0 +1,257 @@
+"""
+Build the firmware in src/ for deployment.
+
+Formats:
+    source  copy the .py files, the Pico compiles them at every boot
+    mpy     cross-compile every module to .mpy with mpy-cross, main.py stays
+            as source since MicroPython runs it by file name
+    frozen  write a manifest.py that freezes the modules into a custom
+            firmware image, only main.py (and config, unless
+            --freeze-config) is left for the filesystem
+
+--strip-debug removes every log.debug() call, and every
+`if log.enabled(log.DEBUG):` block, before compiling.
+
+Usage (from the repository root):
+    python3 tools/build.py --format mpy --strip-debug
+    mpremote cp -r build/mpy/. :
+"""
+import argparse
+import ast
+import os
+import shutil
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(ROOT, 'src')
+
+# Run by the firmware by file name, so never compiled or frozen
+ENTRY_POINTS = ('main.py', 'boot.py')
+
+# Holds credentials and per-device settings, kept editable on the
+# filesystem when freezing unless asked otherwise
+CONFIG_PACKAGE = 'config'
+
+
+def find_sources(src_dir):
+    """
+    List the Python modules to deploy.
+
+    Returns:
+        list: Paths relative to src_dir, sorted
+    """
+    sources = []
+    for directory, dirnames, filenames in os.walk(src_dir):
+        dirnames[:] = sorted(d for d in dirnames if d != '__pycache__')
+        for filename in sorted(filenames):
+            if filename.endswith('.py'):
+                path = os.path.join(directory, filename)
+                sources.append(os.path.relpath(path, src_dir))
+    # src/ is the device root, not a package
+    return [relpath for relpath in sources if relpath != '__init__.py']
+
+
+class DebugStripper(ast.NodeTransformer):
+    """Drop debug logging statements from a module of the firmware."""
+
+    def __init__(self, alias):
+        self.alias = alias
+        self.removed = 0
+
+    def _is_log(self, node, attr):
+        return (isinstance(node, ast.Attribute) and node.attr == attr and
+                isinstance(node.value, ast.Name) and
+                node.value.id == self.alias)
+
+    def _strip(self, statements):
+        kept = []
+        for node in statements:
+            if (isinstance(node, ast.Expr) and
+                    isinstance(node.value, ast.Call) and
+                    self._is_log(node.value.func, 'debug')):
+                self.removed += 1
+                continue
+            if (isinstance(node, ast.If) and
+                    isinstance(node.test, ast.Call) and
+                    self._is_log(node.test.func, 'enabled') and
+                    len(node.test.args) == 1 and
+                    self._is_log(node.test.args[0], 'DEBUG')):
+                self.removed += 1
+                kept.extend(self._strip(node.orelse))
+                continue
+            kept.append(node)
+        return kept
+
+    def generic_visit(self, node):
+        super().generic_visit(node)
+        for field in ('body', 'orelse', 'finalbody'):
+            statements = getattr(node, field, None)
+            if isinstance(statements, list) and statements and \
+                    isinstance(statements[0], ast.stmt):
+                stripped = self._strip(statements)
+                # A block can not be empty, orelse and finalbody can
+                if not stripped and field == 'body':
+                    stripped = [ast.Pass()]
+                setattr(node, field, stripped)
+        return node
+
+
+def _log_alias(tree):
+    """Name utils.logging is imported as, None if it is not."""
+    for node in tree.body:
+        if isinstance(node, ast.ImportFrom) and node.module == 'utils':
+            for name in node.names:
+                if name.name == 'logging':
+                    return name.asname or name.name
+    return None
+
+
+def strip_debug(src_dir, stage_dir, sources):
+    """
+    Write copies of the sources without debug logging.
+
+    Returns:
+        int: Statements removed
+    """
+    removed = 0
+    for relpath in sources:
+        with open(os.path.join(src_dir, relpath)) as f:
+            source = f.read()
+
+        tree = ast.parse(source)
+        alias = _log_alias(tree)
+        if alias:
+            stripper = DebugStripper(alias)
+            source = ast.unparse(stripper.visit(tree)) + '\n'
+            removed += stripper.removed
+
+        target = os.path.join(stage_dir, relpath)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'w') as f:
+            f.write(source)
+    return removed
+
+
+def find_mpy_cross(path=None):
+    """Locate the mpy-cross binary, from the option, PATH or pip package."""
+    if path:
+        return path
+
+    found = shutil.which('mpy-cross')
+    if found:
+        return found
+
+    try:
+        import mpy_cross
+    except ImportError:
+        sys.exit('mpy-cross not found: install it (pip install mpy-cross) '
+                 'or pass --mpy-cross')
+    return os.path.join(os.path.dirname(mpy_cross.__file__), 'mpy-cross')
+
+
+def _copy(src_dir, relpath, out_dir):
+    target = os.path.join(out_dir, relpath)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    shutil.copyfile(os.path.join(src_dir, relpath), target)
+
+
+def build_source(src_dir, out_dir, sources, args):
+    for relpath in sources:
+        _copy(src_dir, relpath, out_dir)
+
+
+def build_mpy(src_dir, out_dir, sources, args):
+    mpy_cross = find_mpy_cross(args.mpy_cross)
+
+    for relpath in sources:
+        if relpath in ENTRY_POINTS:
+            _copy(src_dir, relpath, out_dir)
+            continue
+
+        target = os.path.join(out_dir, relpath[:-3] + '.mpy')
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        command = [mpy_cross, f'-march={args.march}', f'-O{args.opt}',
+                   '-s', relpath, '-o', target,
+                   os.path.join(src_dir, relpath)]
+        subprocess.run(command, check=True)
+
+
+def build_frozen(src_dir, out_dir, sources, args):
+    """Write manifest.py and copy what stays on the filesystem."""
+    packages = []
+    modules = []
+    for relpath in sources:
+        top = relpath.split(os.sep)[0]
+        if relpath in ENTRY_POINTS or (top == CONFIG_PACKAGE and
+                                       not args.freeze_config):
+            _copy(src_dir, relpath, out_dir)
+        elif os.sep not in relpath:
+            modules.append(relpath)
+        elif top not in packages:
+            packages.append(top)
+
+    lines = [
+        '# Generated by tools/build.py, build the firmware with:',
+        '#   make -C ports/rp2 BOARD=RPI_PICO_W '
+        f'FROZEN_MANIFEST={os.path.join(out_dir, "manifest.py")}',
+        'include("$(PORT_DIR)/boards/RPI_PICO_W/manifest.py")',
+        '',
+    ]
+    for package in packages:
+        lines.append(f'package({package!r}, base_path={src_dir!r}, '
+                     f'opt={args.opt})')
+    for relpath in modules:
+        lines.append(f'module({relpath!r}, base_path={src_dir!r}, '
+                     f'opt={args.opt})')
+
+    with open(os.path.join(out_dir, 'manifest.py'), 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+
+
+BUILDERS = {
+    'source': build_source,
+    'mpy': build_mpy,
+    'frozen': build_frozen,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--format', choices=BUILDERS, default='mpy')
+    parser.add_argument('--src', default=SRC_DIR)
+    parser.add_argument('--out', help='defaults to build/<format>')
+    parser.add_argument('--mpy-cross', help='path to the mpy-cross binary')
+    parser.add_argument('--march', default='armv6m',
+                        help='native code target, armv6m for the RP2040')
+    parser.add_argument('--opt', type=int, default=0, choices=range(4),
+                        help='mpy-cross optimization level (-O)')
+    parser.add_argument('--freeze-config', action='store_true',
+                        help='also freeze config/, credentials included')
+    parser.add_argument('--strip-debug', action='store_true',
+                        help='remove debug logging from the build')
+    args = parser.parse_args()
+
+    src_dir = os.path.abspath(args.src)
+    out_dir = os.path.abspath(args.out or
+                              os.path.join(ROOT, 'build', args.format))
+    if os.path.exists(out_dir):
+        shutil.rmtree(out_dir)
+    os.makedirs(out_dir)
+
+    sources = find_sources(src_dir)
+    if args.strip_debug:
+        # Kept next to the output, a frozen manifest points at it
+        stage_dir = out_dir + '-stripped'
+        if os.path.exists(stage_dir):
+            shutil.rmtree(stage_dir)
+        removed = strip_debug(src_dir, stage_dir, sources)
+        print(f'Stripped {removed} debug statements')
+        src_dir = stage_dir
+
+    BUILDERS[args.format](src_dir, out_dir, sources, args)
+    print(f'Built {len(sources)} modules ({args.format}) into {out_dir}')
+
+
+if __name__ == '__main__':
+    main()
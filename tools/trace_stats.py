@@ -0,0 +1,103 @@
+"""
+Latency distribution per span name from exported press traces.
+
+Reads the binary dumps appended by utils.trace.save() (TRACE_FILE) or the
+JSON lines of utils.trace.write_jsonl(), from any number of files, and
+prints count, p50, p95 and max duration for every span name. Provider
+spans carry the attempt in their name, e.g. 'TelegramProvider #2'.
+
+Usage (from the repository root):
+    mpremote cp :trace.bin . && python3 tools/trace_stats.py trace.bin
+    python3 tools/trace_stats.py trace.bin.1 trace.bin --jsonl > spans.jsonl
+"""
+import argparse
+import json
+import struct
+
+MAGIC = b"DBTR"
+RECORD = struct.Struct("<IIIBII")
+OPEN = 0xFFFFFFFF
+
+
+def read_binary(data):
+    """Yield span dicts from concatenated binary dumps."""
+    pos = 0
+    while pos < len(data):
+        if data[pos:pos + 4] != MAGIC:
+            raise ValueError(f'Bad dump header at byte {pos}')
+        version, name_count = data[pos + 4], data[pos + 5]
+        if version != 1:
+            raise ValueError(f'Unsupported dump version {version}')
+        pos += 6
+
+        names = []
+        for _ in range(name_count):
+            length = data[pos]
+            names.append(data[pos + 1:pos + 1 + length].decode())
+            pos += 1 + length
+
+        count, = struct.unpack_from("<H", data, pos)
+        pos += 2
+        for _ in range(count):
+            seq, parent, root, name, start, dur = RECORD.unpack_from(data,
+                                                                     pos)
+            pos += RECORD.size
+            yield {
+                'seq': seq, 'parent': parent, 'root': root,
+                'name': names[name] if name < len(names) else '?',
+                'start_us': start, 'dur_us': None if dur == OPEN else dur,
+            }
+
+
+def read_spans(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data.startswith(MAGIC):
+        return list(read_binary(data))
+    return [json.loads(line) for line in data.decode().splitlines() if line]
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    index = int(fraction * len(ordered) + 0.5) - 1
+    return ordered[min(max(index, 0), len(ordered) - 1)]
+
+
+def print_table(spans):
+    durations = {}
+    for span in spans:
+        if span['dur_us'] is not None:
+            durations.setdefault(span['name'], []).append(span['dur_us'])
+
+    presses = sum(1 for span in spans if span['name'] == 'press')
+    print(f'{len(spans)} spans, {presses} presses')
+    print('{:>28} {:>6} {:>10} {:>10} {:>10}'.format(
+        'span', 'count', 'p50 ms', 'p95 ms', 'max ms'))
+    # Slowest typical phase first
+    for name, values in sorted(durations.items(),
+                               key=lambda item: -percentile(item[1], 0.5)):
+        print('{:>28} {:>6} {:>10.1f} {:>10.1f} {:>10.1f}'.format(
+            name[-28:], len(values), percentile(values, 0.5) / 1000,
+            percentile(values, 0.95) / 1000, max(values) / 1000))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('files', nargs='+')
+    parser.add_argument('--jsonl', action='store_true',
+                        help='print the spans as JSON lines instead')
+    args = parser.parse_args()
+
+    spans = []
+    for path in args.files:
+        spans.extend(read_spans(path))
+
+    if args.jsonl:
+        for span in spans:
+            print(json.dumps(span))
+    else:
+        print_table(spans)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""
+Host-side listener for the doorbell's UDP provider.
+
+Joins the multicast group (or listens for broadcast/unicast datagrams),
+checks the HMAC when a key is given, drops the retransmitted copies and
+prints one line per press and per notification. With --command, a shell
+command runs on every press, e.g. to play a chime.
+
+Usage (from the repository root):
+    python3 tools/udp_listener.py
+    python3 tools/udp_listener.py --key "$UDP_HMAC_KEY" --command "aplay ding.wav"
+    python3 tools/udp_listener.py --group '' --port 5068  # broadcast/unicast
+"""
+import argparse
+import hashlib
+import hmac
+import socket
+import struct
+import subprocess
+import time
+
+MAGIC = b"DB"
+HEADER = struct.Struct("<2sBBBII")
+TAG_SIZE = 16
+FLAG_SIGNED = 0x01
+KINDS = {1: 'press', 2: 'message'}
+
+# Sequence numbers remembered per boot to drop the retransmitted copies
+SEEN_LIMIT = 64
+
+
+def open_socket(group, port):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(('', port))
+    if group:
+        membership = struct.pack("4s4s", socket.inet_aton(group),
+                                 socket.inet_aton('0.0.0.0'))
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP,
+                        membership)
+    return sock
+
+
+def parse(data, key):
+    """
+    Decode a datagram.
+
+    Returns:
+        tuple: (kind, boot id, sequence number, text), or None if the
+            datagram is malformed, unsigned while a key is set, or its
+            tag does not match
+    """
+    if len(data) < HEADER.size:
+        return None
+    magic, version, kind, flags, boot_id, seq = HEADER.unpack_from(data)
+    if magic != MAGIC or version != 1:
+        return None
+
+    body = data[HEADER.size:]
+    if flags & FLAG_SIGNED:
+        if len(body) < TAG_SIZE:
+            return None
+        body, tag = body[:-TAG_SIZE], body[-TAG_SIZE:]
+        if key is not None:
+            expected = hmac.new(key, data[:-TAG_SIZE], hashlib.sha256)
+            if not hmac.compare_digest(expected.digest()[:TAG_SIZE], tag):
+                return None
+    elif key is not None:
+        return None
+    return kind, boot_id, seq, body.decode('utf-8', 'replace')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--group', default='239.255.68.66',
+                        help="Multicast group to join, '' for none")
+    parser.add_argument('--port', type=int, default=5068)
+    parser.add_argument('--key', help='UDP_HMAC_KEY from credentials.py')
+    parser.add_argument('--command', help='Shell command run on every press')
+    args = parser.parse_args()
+
+    key = args.key.encode() if args.key else None
+    sock = open_socket(args.group, args.port)
+    seen = {}  # boot id -> recent sequence numbers
+    print(f"Listening on {args.group or '*'}:{args.port}")
+
+    while True:
+        data, (host, _) = sock.recvfrom(1024)
+        event = parse(data, key)
+        if event is None:
+            print(f"{time.strftime('%H:%M:%S')} {host} rejected datagram")
+            continue
+
+        kind, boot_id, seq, text = event
+        recent = seen.setdefault(boot_id, [])
+        if seq in recent:
+            continue
+        recent.append(seq)
+        del recent[:-SEEN_LIMIT]
+
+        name = KINDS.get(kind, f'kind {kind}')
+        print(f"{time.strftime('%H:%M:%S')} {host} #{seq} {name} {text}")
+        if kind == 1 and args.command:
+            subprocess.Popen(args.command, shell=True)
+
+
+if __name__ == '__main__':
+    main()